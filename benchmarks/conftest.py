@@ -0,0 +1,58 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+import os
+import sys
+import importlib.util
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import standin
+
+### the stand-in replaces pythonnet and the EUROMOD assemblies, it must be installed before euromod is imported
+standin.install()
+
+### the benchmarks need pytest-benchmark, the other tests only need the stand-in
+if importlib.util.find_spec("pytest_benchmark") is None:
+    collect_ignore = ["test_container.py", "test_clr_array_convert.py", "test_model.py"]
+
+### number of persons of the datasets used by the benchmarks
+SIZES = (1_000, 100_000, 1_000_000)
+
+
+@pytest.fixture(scope="session")
+def model_path(tmp_path_factory):
+    return standin.create_model(str(tmp_path_factory.mktemp("euromod")), countries=("SL", "BE"), rows=1000)
+
+
+@pytest.fixture(scope="session")
+def model(model_path):
+    from euromod import Model
+    mod = Model(model_path)
+    for country in mod.countries:
+        country._load()
+    return mod
+
+
+@pytest.fixture(scope="session")
+def system(model):
+    return model["SL"]["SL_2000"]
+
+
+@pytest.fixture(scope="session", params=SIZES, ids=lambda n: f"{n}rows")
+def data(request):
+    return standin.make_data(request.param)
@@ -0,0 +1,292 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+"""
+Peak memory of the stages of :func:`euromod.System.run` across input sizes.
+
+For every input size, the run is profiled with :func:`euromod.set_profiler`, and at the end of
+every stage the harness records the peak of the Python allocations (:mod:`tracemalloc`, which
+includes the numpy arrays) and the peak resident set size (RSS, which also includes the .NET arrays
+and the memory of the engine) reached during the stage, above the memory in use before the run.
+
+The amplification is the peak memory of the process during the run, i.e. the input data plus the
+peak above the baseline, divided by the size of the input :class:`pandas.DataFrame`.
+
+The run uses the stand-in engine of :mod:`standin` on synthetic data unless ``--model`` points to a EUROMOD project.
+The real dataset of the project is then loaded and its households are resampled to every input size, see :func:`resample`.
+
+Example
+--------
+>>> python benchmarks/memory.py --sizes 10000 100000 1000000 --variables 50
+"""
+
+import os
+import gc
+import sys
+import time
+import argparse
+import threading
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _rss_reader():
+    ### current resident set size in bytes
+    try:
+        import psutil
+        process = psutil.Process()
+        return lambda: process.memory_info().rss
+    except ImportError:
+        pass
+    if os.path.exists("/proc/self/statm"):
+        page = os.sysconf("SC_PAGE_SIZE")
+        def read():
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1])*page
+        return read
+    raise ImportError("Measuring the RSS requires the package 'psutil' on this platform.")
+
+
+class RssSampler:
+    """Peak resident set size, sampled in a background thread.
+
+    Parameters
+    ----------
+    interval : :obj:`float`, optional
+        Time between two samples, in seconds. Default is 0.001.
+    """
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self._read = _rss_reader()
+        self._peak = self._read()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = self._read()
+            with self._lock:
+                self._peak = max(self._peak, rss)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def current(self):
+        """:obj:`int`: Current RSS in bytes."""
+        return self._read()
+
+    def reset_peak(self):
+        """Get the peak RSS since the previous reset, and start a new measurement."""
+        rss = self._read()
+        with self._lock:
+            peak, self._peak = max(self._peak, rss), rss
+        return peak
+
+
+class MemoryProfiler:
+    """Profiler recording the peak memory of every stage of a run, see :func:`euromod.set_profiler`.
+
+    The peaks are in bytes, above the memory in use when the profiler was created.
+    They include the memory still held from the previous stages, e.g. the input .NET array during the engine stage.
+    """
+    def __init__(self, sampler):
+        self.sampler = sampler
+        tracemalloc.reset_peak()
+        self.sampler.reset_peak()
+        self.base_traced = tracemalloc.get_traced_memory()[0]
+        self.base_rss = self.sampler.current()
+        self.stages = []
+        """: A :obj:`list` of tuples with the name, the wall time, the peak traced memory and the peak RSS of every stage, in the order of the run."""
+
+    def __call__(self, event):
+        ### called at the end of every stage: the peaks since the previous call belong to the stage
+        traced = tracemalloc.get_traced_memory()[1] - self.base_traced
+        rss = self.sampler.reset_peak() - self.base_rss
+        tracemalloc.reset_peak()
+        self.stages.append((event["phase"], event["seconds"], traced, rss))
+
+    def peak(self):
+        """:obj:`tuple`: Peak traced memory and peak RSS over all stages."""
+        return max([x[2] for x in self.stages], default=0), max([x[3] for x in self.stages], default=0)
+
+
+def _nbytes(output):
+    ### size of a simulation output in any output format
+    if hasattr(output, "memory_usage"):
+        return int(output.memory_usage(deep=True).sum())
+    return int(output.nbytes)
+
+
+def resample(data, n_rows, seed=0, id_column="idhh"):
+    """
+    Resample the households of a dataset to another number of rows.
+
+    Households are drawn with replacement until the next one would exceed `n_rows`.
+    The household and person identifiers are renumbered, and the links between persons
+    (partner, mother, father) are renumbered within every drawn household.
+
+    Parameters
+    ----------
+    data : :class:`pandas.DataFrame`
+        Input dataset, e.g. as loaded by :func:`~euromod.Country.load_data`.
+    n_rows : :obj:`int`
+        Maximum number of rows of the resampled dataset. At least one household is drawn.
+    seed : :obj:`int`, optional
+        Seed of the draws. Default is 0.
+    id_column : :obj:`str`, optional
+        Name of the household identifier variable. Default is "idhh".
+
+    Returns
+    -------
+    :class:`pandas.DataFrame`
+        The resampled dataset, with the attributes of `data`.
+    """
+    import numpy as np
+    import pandas as pd
+    from validation import LINK_VARIABLES
+    rng = np.random.default_rng(seed)
+    codes, uniques = pd.factorize(data[id_column].to_numpy())
+    order = np.argsort(codes, kind="stable") # rows of every household, household after household
+    sizes = np.bincount(codes)
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    draw = rng.integers(0, len(sizes), int(n_rows/sizes.mean()*1.2) + 1)
+    while sizes[draw].sum() < n_rows and len(draw) < 4*n_rows:
+        draw = np.r_[draw, rng.integers(0, len(sizes), len(draw))]
+    draw = draw[:max(1, int(np.searchsorted(np.cumsum(sizes[draw]), n_rows, side="right")))]
+    copy = np.repeat(np.arange(len(draw)), sizes[draw])
+    first = np.repeat(np.cumsum(sizes[draw]) - sizes[draw], sizes[draw])
+    rows = order[np.repeat(starts[draw], sizes[draw]) + np.arange(len(copy)) - first]
+    out = data.iloc[rows].reset_index(drop=True)
+    old_id = out["idperson"].to_numpy()
+    new_id = np.arange(1, len(out) + 1, dtype=np.float64)
+    persons = pd.MultiIndex.from_arrays([copy, old_id])
+    for name in LINK_VARIABLES:
+        if name in out.columns:
+            pos = persons.get_indexer(pd.MultiIndex.from_arrays([copy, out[name].to_numpy()]))
+            out[name] = np.where(pos >= 0, new_id[pos], 0)
+    out["idperson"] = new_id
+    out[id_column] = copy + 1.0
+    out.attrs.update(data.attrs)
+    return out
+
+
+def profile_run(system, data, dataset_id, sampler, **kwargs):
+    """
+    Profile the memory of a simulation run.
+
+    Parameters
+    ----------
+    system : :class:`euromod.System`
+        System to run.
+    data : :class:`pandas.DataFrame`
+        Input data.
+    dataset_id : :obj:`str`
+        ID of the dataset.
+    sampler : :class:`RssSampler`
+        Running RSS sampler.
+    **kwargs
+        Other arguments of :func:`~euromod.System.run`.
+
+    Returns
+    -------
+    :obj:`dict`
+        The size of the input, the peaks by stage and the peak and amplification of the run.
+    """
+    import euromod
+    input_bytes = int(data.memory_usage(deep=True).sum())
+    gc.collect()
+    profiler = MemoryProfiler(sampler)
+    previous = euromod.set_profiler(profiler)
+    start = time.perf_counter()
+    try:
+        out = system.run(data, dataset_id, verbose=False, **kwargs)
+    finally:
+        euromod.set_profiler(previous)
+    seconds = time.perf_counter() - start
+    traced, rss = profiler.peak()
+    output_bytes = sum(_nbytes(x) for x in out.outputs)
+    del out
+    return {"rows": len(data), "input_bytes": input_bytes, "output_bytes": output_bytes, "seconds": seconds,
+            "stages": profiler.stages, "traced": traced, "rss": rss,
+            "amplification": (input_bytes + max(traced, rss))/input_bytes}
+
+
+def _mb(nbytes):
+    return f"{nbytes/2**20:10.1f}"
+
+
+def report(result, file=None):
+    """Print the peaks of a run profiled with :func:`profile_run`."""
+    rows = result["rows"]
+    print(f"\n{rows} rows: input {_mb(result['input_bytes']).strip()} MB ({result['input_bytes']/rows:.0f} bytes/row), "
+          f"output {_mb(result['output_bytes']).strip()} MB, run {result['seconds']:.2f} s", file=file)
+    print(f"{'stage':<10} {'seconds':>9} {'traced MB':>10} {'RSS MB':>10} {'bytes/row':>10}", file=file)
+    for name, seconds, traced, rss in result["stages"]:
+        print(f"{name:<10} {seconds:9.3f} {_mb(traced)} {_mb(rss)} {max(traced, rss)/rows:10.0f}", file=file)
+    peak = max(result["traced"], result["rss"])
+    print(f"{'run':<10} {result['seconds']:9.3f} {_mb(result['traced'])} {_mb(result['rss'])} {peak/rows:10.0f}", file=file)
+    print(f"amplification: {result['amplification']:.2f}x the input DataFrame "
+          f"({(result['input_bytes'] + peak)/rows:.0f} bytes/row at peak)", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peak memory of the stages of System.run across input sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="numbers of rows of the input data")
+    parser.add_argument("--variables", type=int, default=50, help="number of input variables of the synthetic data")
+    parser.add_argument("--model", help="path to a EUROMOD project, of which the dataset is resampled to every size, default is a synthetic model run by the stand-in")
+    parser.add_argument("--country", default="SL")
+    parser.add_argument("--system", default="SL_2000")
+    parser.add_argument("--dataset", default="sl_demo_v1")
+    parser.add_argument("--output-format", default="pandas", choices=("pandas", "numpy", "arrow"))
+    parser.add_argument("--zero-copy", action="store_true", help="return views on the .NET output arrays")
+    args = parser.parse_args(argv)
+
+    import standin
+    synthetic = args.model is None
+    if synthetic:
+        import tempfile
+        standin.install()
+        args.model = standin.create_model(os.path.join(tempfile.gettempdir(), "euromod_memory"), countries=(args.country,), rows=10)
+    from euromod import Model
+    system = Model(args.model)[args.country][args.system]
+    dataset = None if synthetic else system.parent.load_data(args.dataset)
+
+    sampler = RssSampler().start()
+    tracemalloc.start()
+    try:
+        for n in args.sizes:
+            tracemalloc.stop() # the data is not part of the measurement
+            data = standin.make_data(n, args.variables) if synthetic else resample(dataset, n)
+            tracemalloc.start()
+            report(profile_run(system, data, args.dataset, sampler, output_format=args.output_format, zero_copy=args.zero_copy))
+            del data
+    finally:
+        tracemalloc.stop()
+        sampler.stop()
+
+
+if __name__ == "__main__":
+    main()
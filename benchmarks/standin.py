@@ -0,0 +1,601 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+"""
+Stand-in for the EUROMOD .NET assemblies, so that the Python layer of the connector
+can be run and benchmarked without pythonnet and the EUROMOD software, e.g. on Linux.
+
+:func:`install` registers Python modules named ``clr``, ``System``, ``EM_Executable``,
+``EM_XmlHandler``, ``EM_Common`` and ``EM_Transformer`` that must be installed before
+``euromod`` is imported. The metadata of the country models is generated by
+:func:`create_model`, and the model run is done by a pluggable engine, see :func:`set_engine`.
+
+Example
+--------
+>>> import standin
+>>> standin.install()
+>>> path = standin.create_model("/tmp/euromod", countries=("SL",))
+>>> from euromod import Model
+>>> mod = Model(path)
+>>> out = mod["SL"]["SL_2000"].run(standin.make_data(1000), "sl_demo_v1", verbose=False)
+"""
+
+import os
+import gc
+import sys
+import types
+import weakref
+
+import numpy as np
+import pandas as pd
+
+#%% System
+class _NetType:
+    ### .NET element type of an array
+    def __init__(self, name, dtype):
+        self.Name = name
+        self.dtype = np.dtype(dtype)
+    def GetElementType(self):
+        return self
+    def __repr__(self):
+        return f"System.{self.Name}"
+
+_NET_TYPES = {name: _NetType(name, dtype) for name, dtype in [
+    ("Single", np.float32), ("Double", np.float64), ("SByte", np.int8), ("Int16", np.int16),
+    ("Int32", np.int32), ("Int64", np.int64), ("Byte", np.uint8), ("UInt16", np.uint16),
+    ("UInt32", np.uint32), ("UInt64", np.uint64), ("Boolean", bool)]}
+
+
+_HEAP = weakref.WeakSet() # live arrays, i.e. the managed heap
+
+
+class Array:
+    """.NET array stored in a NumPy array."""
+    def __init__(self, data):
+        self._data = data
+        self._type = _NetType(_dtype_name(data.dtype), data.dtype)
+        _HEAP.add(self)
+    @staticmethod
+    def CreateInstance(netType, *dims):
+        return Array(np.zeros([int(x) for x in dims], dtype=netType.dtype))
+    @property
+    def Rank(self):
+        return self._data.ndim
+    @property
+    def Length(self):
+        return self._data.size
+    def GetLength(self, dim):
+        return self._data.shape[dim]
+    def GetType(self):
+        return self._type
+
+def _dtype_name(dtype):
+    for name, netType in _NET_TYPES.items():
+        if netType.dtype == dtype:
+            return name
+    raise NotImplementedError(f"No .NET type for {dtype}")
+
+
+class _IntPtr:
+    def __init__(self, address):
+        self._address = address
+    def ToInt64(self):
+        return self._address
+
+
+class GCHandle:
+    """Handle pinning an :class:`Array`. The arrays of the stand-in never move, so pinning only counts the handles."""
+    allocated = 0
+    def __init__(self, array):
+        self._array = array
+        self.IsAllocated = True
+        GCHandle.allocated += 1
+    @staticmethod
+    def Alloc(array, handleType):
+        return GCHandle(array)
+    def AddrOfPinnedObject(self):
+        return _IntPtr(self._array._data.__array_interface__["data"][0])
+    def Free(self):
+        if self.IsAllocated:
+            self.IsAllocated = False
+            self._array = None
+            GCHandle.allocated -= 1
+
+
+class GCHandleType:
+    Normal = 2
+    Pinned = 3
+
+
+class GC:
+    """``System.GC``: the managed heap is the set of live :class:`Array` objects, collected by the Python GC."""
+    MaxGeneration = 2
+    _collections = [0, 0, 0]
+    @staticmethod
+    def GetTotalMemory(forceFullCollection):
+        if forceFullCollection:
+            GC.Collect()
+        return sum(x._data.nbytes for x in list(_HEAP))
+    @staticmethod
+    def CollectionCount(generation):
+        return GC._collections[generation]
+    @staticmethod
+    def Collect(generation=2):
+        gc.collect()
+        for i in range(generation + 1):
+            GC._collections[i] += 1
+    @staticmethod
+    def WaitForPendingFinalizers():
+        pass
+
+
+class GCLargeObjectHeapCompactionMode:
+    Default = 1
+    CompactOnce = 2
+
+
+class GCSettings:
+    LargeObjectHeapCompactionMode = GCLargeObjectHeapCompactionMode.Default
+
+
+class _Process:
+    def __init__(self):
+        try:
+            import psutil
+            self.WorkingSet64 = psutil.Process().memory_info().rss
+        except ImportError:
+            with open("/proc/self/statm") as f:
+                self.WorkingSet64 = int(f.read().split()[1])*os.sysconf("SC_PAGE_SIZE")
+
+
+class Process:
+    """``System.Diagnostics.Process``."""
+    @staticmethod
+    def GetCurrentProcess():
+        return _Process()
+
+
+class NetList(list):
+    """``System.Collections.Generic.List``."""
+    def Add(self, value):
+        self.append(value)
+    @property
+    def Count(self):
+        return len(self)
+
+
+class KeyValuePair:
+    __slots__ = ("Key", "Value")
+    def __init__(self, key, value):
+        self.Key = key
+        self.Value = value
+
+
+class NetDictionary:
+    """``System.Collections.Generic.Dictionary``. As in pythonnet, iteration returns :class:`KeyValuePair` objects."""
+    def __init__(self, items=None):
+        self._dict = dict(items or {})
+    def __iter__(self):
+        return (KeyValuePair(k, v) for k, v in self._dict.items())
+    def __getitem__(self, key):
+        return self._dict[key]
+    def __setitem__(self, key, value):
+        self._dict[key] = value
+    def __len__(self):
+        return len(self._dict)
+    def __contains__(self, key):
+        return key in self._dict
+    def ContainsKey(self, key):
+        return key in self._dict
+    def Add(self, key, value):
+        self._dict[key] = value
+    def keys(self):
+        return self._dict.keys()
+    def __repr__(self):
+        return f"Dictionary({self._dict})"
+    @property
+    def Keys(self):
+        return list(self._dict.keys())
+    @property
+    def Values(self):
+        return list(self._dict.values())
+    @property
+    def Count(self):
+        return len(self._dict)
+
+
+class _Generic:
+    ### generic .NET type, e.g. List[String], of which the type arguments are ignored
+    def __init__(self, cls):
+        self._cls = cls
+    def __getitem__(self, types):
+        return self._cls
+    def __call__(self, *args):
+        return self._cls(*args)
+
+
+def _tuple(*args):
+    return tuple(args)
+
+
+#%% EM_XmlHandler
+class TAGS:
+    SYS_ID = "SysID"
+    POL_ID = "PolID"
+    FUN_ID = "FunID"
+    PAR_ID = "ParID"
+    DATA_ID = "DataID"
+    EXTENSION_ID = "ExtensionID"
+    CONFIG_PATH_EUROMODFILES = "PATH_EUROMODFILES"
+    CONFIG_PATH_DATA = "PATH_DATA"
+    CONFIG_PATH_OUTPUT = "PATH_OUTPUT"
+    CONFIG_ID_DATA = "ID_DATASET"
+    CONFIG_COUNTRY = "COUNTRY"
+    CONFIG_ID_SYSTEM = "ID_SYSTEM"
+    CONFIG_ADDON = "ADDON"
+    CONFIG_EXTENSION_SWITCH = "EXTENSION_SWITCH"
+    CONFIG_FORCE_OUTPUT_EURO = "FORCE_OUTPUT_EURO"
+    CONFIG_IGNORE_PRIVATE = "IGNORE_PRIVATE"
+
+
+class _Option:
+    ### member of a .NET enumeration
+    def __init__(self, name):
+        self.name = name
+    def __str__(self):
+        return self.name
+    def __repr__(self):
+        return self.name
+    def __hash__(self):
+        return hash(self.name)
+    def __eq__(self, other):
+        return str(self) == str(other)
+
+
+COUNTRY_OPTIONS = ("SYS", "DATA", "LOCAL_EXTENSION", "POL", "REFPOL", "FUN", "PAR",
+                   "SYS_POL", "SYS_FUN", "SYS_PAR", "SYS_DATA",
+                   "EXTENSION_POL", "EXTENSION_FUN", "EXTENSION_PAR", "EXTENSION_SWITCH")
+
+ReadCountryOptions = type("ReadCountryOptions", (), {name: _Option(name) for name in COUNTRY_OPTIONS})
+ReadModelOptions = type("ReadModelOptions", (), {"EXTENSIONS": _Option("EXTENSIONS")})
+
+
+class XmlHelpers:
+    @staticmethod
+    def CDATA(value):
+        return f"<![CDATA[{value}]]>"
+    @staticmethod
+    def RemoveCData(value):
+        value = str(value)
+        if value.startswith("<![CDATA[") and value.endswith("]]>"):
+            return value[9:-3]
+        return value
+
+
+_MODELS = {} # metadata of the synthetic models, by path
+CALLS = {"GetPieceOfInfo": 0, "GetPiecesOfInfo": 0, "GetTypeInfo": 0, "RunFromPython": 0}
+""": Number of calls of the stand-in methods of the handlers and of the engine."""
+
+
+class CountryInfoHandler:
+    """Stand-in serving the metadata of a country generated by :func:`create_model`."""
+    def __init__(self, model_path, country):
+        ### every handler has its own copy of the metadata, as when the files are read, so that edits are not shared with other processes
+        self._info = {option: {id: NetDictionary(info._dict) for id, info in infos.items()}
+                      for option, infos in _MODELS[os.path.normpath(model_path)]["countries"][country].items()}
+    def GetTypeInfo(self, option):
+        CALLS["GetTypeInfo"] += 1
+        return [KeyValuePair(key, info) for key, info in self._info[str(option)].items()]
+    def GetPieceOfInfo(self, option, id):
+        CALLS["GetPieceOfInfo"] += 1
+        return self._info[str(option)].get(id, NetDictionary())
+    def GetPiecesOfInfo(self, option, keys, patterns):
+        CALLS["GetPiecesOfInfo"] += 1
+        if isinstance(keys, str):
+            keys, patterns = [keys], [patterns]
+        return [info for info in self._info[str(option)].values() if all(info[k] == p for k, p in zip(keys, patterns))]
+    @staticmethod
+    def GetInfoInString(info):
+        return "\n".join(f"{el.Key}: {el.Value}" for el in info)
+
+
+class ModelInfoHandler:
+    """Stand-in serving the model extensions generated by :func:`create_model`."""
+    def __init__(self, model_path):
+        self._info = _MODELS[os.path.normpath(model_path)]
+    def GetModelInfo(self, option):
+        return [KeyValuePair(key, info) for key, info in self._info["extensions"].items()]
+
+
+#%% EM_Common and EM_Transformer
+class EMPath:
+    def __init__(self, model_path, isEM2):
+        self._path = model_path
+    def GetExtensionsFilePath(self, isEM2):
+        return os.path.join(self._path, "XMLParam", "Config", "Extensions.xml")
+    def GetFolderEuromodFiles(self):
+        return self._path
+
+
+class EM3Global:
+    @staticmethod
+    def Transform(path, errors, overwrite):
+        return True
+
+
+#%% EM_Executable
+class RunError:
+    def __init__(self, message, isWarning):
+        self.message = message
+        self.isWarning = isWarning
+
+
+class RunResult:
+    """Result of :func:`Control.RunFromPython`, a .NET tuple of the success flag, the outputs, the output variables and the errors."""
+    def __init__(self, success, outputs, variables, errors):
+        self.Item1 = success
+        self.Item2 = outputs
+        self.Item3 = variables
+        self.Item4 = errors
+    def get_Item1(self):
+        return self.Item1
+    def get_Item2(self):
+        return self.Item2
+    def get_Item3(self):
+        return self.Item3
+
+
+TAX_RATE = 0.2
+
+def default_engine(config, data, variables, constants, handler):
+    """
+    Engine of the stand-in, computing a flat tax on the earnings.
+
+    Parameters
+    ----------
+    config : :obj:`dict`
+        Configuration settings of the run.
+    data : :class:`numpy.ndarray`
+        Input data, with one row per variable.
+    variables : :obj:`list` [ :obj:`str` ]
+        Names of the input variables.
+    constants : :obj:`dict` or None
+        Constants to overwrite.
+    handler : CountryInfoHandler
+        Metadata of the country.
+
+    Returns
+    -------
+    :obj:`dict`
+        A tuple with the output array, with one column per variable, and the output variables, by output file-name.
+    """
+    pos = {name: i for i, name in enumerate(variables)}
+    earnings = np.zeros(data.shape[1])
+    for x in ("yem", "yse"):
+        if x in pos:
+            earnings += data[pos[x]]
+    rate = TAX_RATE
+    outputvars = list(variables) + ["ils_earns", "ils_tax", "ils_dispy"]
+    out = np.empty((data.shape[1], len(outputvars)), dtype=np.float64)
+    out[:, :len(variables)] = data.T
+    out[:, len(variables)] = earnings
+    out[:, len(variables) + 1] = rate*earnings
+    out[:, len(variables) + 2] = earnings - rate*earnings
+    return {f"{config[TAGS.CONFIG_ID_SYSTEM].lower()}_std.txt": (out, outputvars)}
+
+
+_ENGINE = [default_engine]
+
+
+def set_engine(engine):
+    """
+    Set the function run by :func:`Control.RunFromPython`, see :func:`default_engine` for its signature.
+
+    Returns
+    -------
+    callable
+        The previous engine.
+    """
+    previous = _ENGINE[0]
+    _ENGINE[0] = engine if engine is not None else default_engine
+    return previous
+
+
+class Control:
+    """Stand-in of the EUROMOD executable."""
+    @staticmethod
+    def TranslateToEM3(model_path, country, errors):
+        return True
+    def RunFromPython(self, configSettings, dataArr, variables, constantsToOverwrite=None, countryInfoHandler=None):
+        CALLS["RunFromPython"] += 1
+        config = {k: configSettings[k] for k in configSettings.keys()}
+        outputs = _ENGINE[0](config, dataArr._data, list(variables), constantsToOverwrite, countryInfoHandler)
+        return RunResult(True, {name: Array(np.ascontiguousarray(arr)) for name, (arr, outputvars) in outputs.items()},
+                         {name: NetList(outputvars) for name, (arr, outputvars) in outputs.items()}, [])
+
+
+#%% synthetic models
+def _info(**values):
+    return NetDictionary({k: str(v) for k, v in values.items()})
+
+
+def _country_info(country, systems, policies, functions, parameters, datasets, extensions):
+    cc = country.lower()
+    info = {name: {} for name in COUNTRY_OPTIONS}
+    for s in range(systems):
+        info["SYS"][f"sys{s}"] = _info(ID=f"sys{s}", Name=f"{country}_{2000 + s}", Order=s + 1, Year=2000 + s, Comment="",
+                                        CurrencyOutput="euro", CurrencyParam="euro", HeadDefInc="ils_dispy", Private="no")
+    for d in range(datasets):
+        info["DATA"][f"data{d}"] = _info(ID=f"data{d}", Name=f"{cc}_demo_v{d + 1}", YearCollection=2000 + d, YearInc=2000 + d,
+                                         Currency="euro", DecimalSign=".", Private="no", ReadXVariables="no", UseCommonDefault="no", Comment="")
+    info["LOCAL_EXTENSION"]["lext0"] = _info(ID="lext0", Name=f"{country} local extension", ShortName=f"{country}_LX")
+    extension_ids = [f"ext{e}" for e in range(extensions)] + ["lext0"]
+    for p in range(policies):
+        info["POL"][f"pol{p}"] = _info(ID=f"pol{p}", Name=f"pol{p}_{cc}", Comment=f"Policy {p}", Private="no")
+        for f in range(functions):
+            fun_id = f"fun{p}_{f}"
+            info["FUN"][fun_id] = _info(ID=fun_id, PolID=f"pol{p}", Name=("BenCalc", "ArithOp", "Elig", "DefVar")[f % 4], Comment=f"Function {f}", Private="no")
+            for k in range(parameters):
+                par_id = f"par{p}_{f}_{k}"
+                info["PAR"][par_id] = _info(ID=par_id, FunID=fun_id, Name=f"Comp_{k}", Comment=f"Parameter {k}", Group="")
+    info["REFPOL"]["refpol0"] = _info(ID="refpol0", RefPolID="pol0")
+    for s in range(systems):
+        sys_id = f"sys{s}"
+        for order, pol_id in enumerate(list(info["POL"]) + ["refpol0"]):
+            info["SYS_POL"][sys_id + pol_id] = _info(SysID=sys_id, PolID=pol_id, Order=order + 1, Switch="on")
+        for order, fun_id in enumerate(info["FUN"]):
+            info["SYS_FUN"][sys_id + fun_id] = _info(SysID=sys_id, FunID=fun_id, Order=order + 1, Switch="on")
+        for order, par_id in enumerate(info["PAR"]):
+            info["SYS_PAR"][sys_id + par_id] = _info(SysID=sys_id, ParID=par_id, Order=order + 1, Value=XmlHelpers.CDATA(f"{order % 97}#m"))
+        for d, data_id in enumerate(info["DATA"]):
+            info["SYS_DATA"][sys_id + data_id] = _info(SysID=sys_id, DataID=data_id, BestMatch="yes" if d == s % datasets else "no")
+            for ext_id in extension_ids:
+                info["EXTENSION_SWITCH"][ext_id + data_id + sys_id] = _info(ExtensionID=ext_id, DataID=data_id, SysID=sys_id, Value=("on", "off")[(s + d) % 2])
+    for p, pol_id in enumerate(info["POL"]):
+        if p % 5 == 0:
+            ext_id = extension_ids[p % len(extension_ids)]
+            info["EXTENSION_POL"][pol_id + ext_id] = _info(PolID=pol_id, ExtensionID=ext_id, BaseOff="false")
+    for f, fun_id in enumerate(info["FUN"]):
+        if f % 7 == 0:
+            ext_id = extension_ids[f % len(extension_ids)]
+            info["EXTENSION_FUN"][fun_id + ext_id] = _info(FunID=fun_id, ExtensionID=ext_id, BaseOff="false")
+    for k, par_id in enumerate(info["PAR"]):
+        if k % 11 == 0:
+            ext_id = extension_ids[k % len(extension_ids)]
+            info["EXTENSION_PAR"][par_id + ext_id] = _info(ParID=par_id, ExtensionID=ext_id, BaseOff="true")
+    return info
+
+
+def make_data(n_persons, n_variables=50, household_size=3, seed=0):
+    """
+    Generate an input dataset.
+
+    Parameters
+    ----------
+    n_persons : :obj:`int`
+        Number of persons, i.e. rows.
+    n_variables : :obj:`int`, optional
+        Number of variables, including the identifiers, demographics and incomes. Default is 50.
+    household_size : :obj:`int`, optional
+        Number of persons in every household. Default is 3.
+    seed : :obj:`int`, optional
+        Seed of the random values. Default is 0.
+
+    Returns
+    -------
+    :class:`pandas.DataFrame`
+        The dataset, with persons of the same household on contiguous rows.
+    """
+    rng = np.random.default_rng(seed)
+    idperson = np.arange(1, n_persons + 1, dtype=np.float64)
+    idhh = np.floor((idperson - 1) / household_size) + 1
+    head = (idhh - 1)*household_size + 1
+    columns = {
+        "idhh": idhh,
+        "idperson": idperson,
+        "idpartner": np.where((idperson - head) == 0, head + 1, np.where((idperson - head) == 1, head, 0)),
+        "idmother": np.where((idperson - head) == 2, head, 0),
+        "idfather": np.zeros(n_persons),
+        "dag": rng.integers(0, 90, n_persons).astype(np.float64),
+        "dgn": rng.integers(0, 2, n_persons).astype(np.float64),
+        "dwt": np.ones(n_persons),
+        "yem": np.round(rng.lognormal(7, 1, n_persons)*(rng.random(n_persons) < 0.6), 2),
+        "yse": np.round(rng.lognormal(6, 1, n_persons)*(rng.random(n_persons) < 0.1), 2),
+    }
+    columns["idpartner"] = np.where(columns["idpartner"] > n_persons, 0, columns["idpartner"])
+    for i in range(len(columns), n_variables):
+        columns[f"x{i:03d}"] = np.round(rng.random(n_persons)*100, 2)
+    return pd.DataFrame(columns)
+
+
+def create_model(path, countries=("SL",), systems=4, policies=40, functions=6, parameters=8, datasets=2, extensions=3, rows=1000):
+    """
+    Create a synthetic EUROMOD project served by the stand-in.
+
+    The folders of the project are created so that :class:`euromod.Model` finds the countries
+    and :func:`euromod.Country.load_data` finds the datasets, of which the files have `rows` persons.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Folder of the project.
+    countries : :obj:`tuple` [ :obj:`str` ], optional
+        Country codes. Default is ("SL",).
+    systems, policies, functions, parameters, datasets, extensions : :obj:`int`, optional
+        Number of systems, policies, functions per policy, parameters per function, datasets and model extensions of every country.
+    rows : :obj:`int`, optional
+        Number of persons in the dataset files. Default is 1000.
+
+    Returns
+    -------
+    :obj:`str`
+        Path to the project.
+    """
+    path = os.path.normpath(path)
+    os.makedirs(os.path.join(path, "XMLParam", "Config"), exist_ok=True)
+    open(os.path.join(path, "XMLParam", "Config", "Extensions.xml"), "w").close()
+    os.makedirs(os.path.join(path, "Input"), exist_ok=True)
+    model = {"extensions": {f"ext{e}": _info(ID=f"ext{e}", Name=f"Extension {e}", ShortName=("BTA", "TCA", "MWA", "UAA", "PBE")[e % 5] + ("" if e < 5 else str(e))) for e in range(extensions)},
+             "countries": {}}
+    for country in countries:
+        os.makedirs(os.path.join(path, "XMLParam", "Countries", country), exist_ok=True)
+        model["countries"][country] = _country_info(country, systems, policies, functions, parameters, datasets, extensions)
+        for d, info in enumerate(model["countries"][country]["DATA"].values()):
+            fname = os.path.join(path, "Input", info["Name"] + ".txt")
+            if not os.path.exists(fname):
+                make_data(rows, seed=d).to_csv(fname, sep="\t", index=False)
+    _MODELS[path] = model
+    return path
+
+
+#%% registration of the modules
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    module.__standin__ = True
+    sys.modules[name] = module
+    return module
+
+
+def install(engine=None):
+    """
+    Register the stand-in modules, replacing pythonnet and the EUROMOD assemblies.
+
+    It must be called before ``euromod`` is imported.
+
+    Parameters
+    ----------
+    engine : callable, optional
+        Function doing the model run, see :func:`set_engine`. Default is :func:`default_engine`.
+    """
+    set_engine(engine)
+    if getattr(sys.modules.get("clr"), "__standin__", False):
+        return
+    if "euromod" in sys.modules:
+        raise RuntimeError("The stand-in must be installed before euromod is imported.")
+    _module("clr", AddReference=lambda path: None)
+    generic = _module("System.Collections.Generic", List=_Generic(NetList), Dictionary=_Generic(NetDictionary))
+    collections = _module("System.Collections", Generic=generic)
+    interop = _module("System.Runtime.InteropServices", GCHandle=GCHandle, GCHandleType=GCHandleType)
+    runtime = _module("System.Runtime", InteropServices=interop, GCSettings=GCSettings, GCLargeObjectHeapCompactionMode=GCLargeObjectHeapCompactionMode)
+    diagnostics = _module("System.Diagnostics", Process=Process)
+    _module("System", Array=Array, String=str, Tuple=_Generic(_tuple), Collections=collections, Runtime=runtime,
+            Diagnostics=diagnostics, GC=GC, **_NET_TYPES)
+    _module("EM_XmlHandler", CountryInfoHandler=CountryInfoHandler, ModelInfoHandler=ModelInfoHandler, TAGS=TAGS,
+            ReadCountryOptions=ReadCountryOptions, ReadModelOptions=ReadModelOptions, XmlHelpers=XmlHelpers)
+    _module("EM_Executable", Control=Control)
+    _module("EM_Common", EMPath=EMPath)
+    _module("EM_Transformer", EM3Global=EM3Global)
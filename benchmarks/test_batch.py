@@ -0,0 +1,81 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import os
+import json
+import pytest
+import standin
+
+
+def test_run_batch_worker_crash(model_path, tmp_path):
+    ### a worker killed during a job fails the jobs it took down, the batch goes on in new workers
+    import euromod # puts the modules of the package on the path
+    from batch import run_batch, expand_jobs
+    from EM_XmlHandler import TAGS
+    def crash(config, data, *args):
+        if config[TAGS.CONFIG_ID_SYSTEM] == "SL_2001":
+            os._exit(1)
+        return standin.default_engine(config, data, *args)
+    jobs = expand_jobs({"jobs": [{"country": "SL", "system": ["SL_2001", "SL_2000", "SL_2002", "SL_2003"], "dataset": "sl_demo_v1"}]})
+    previous = standin.set_engine(crash) # inherited by the forked workers
+    try:
+        results = run_batch(model_path, jobs, str(tmp_path), workers=2, output="npy", verbose=False)
+    finally:
+        standin.set_engine(previous)
+    status = {x["name"]: x["status"] for x in results}
+    assert status["SL_2001_sl_demo_v1"] == "failed"
+    assert "BrokenProcessPool" in next(x for x in results if x["name"] == "SL_2001_sl_demo_v1")["messages"][-1]
+    assert status["SL_2003_sl_demo_v1"] == "ok" # run after the crash
+    with open(os.path.join(tmp_path, "summary.json")) as f:
+        assert [x["status"] for x in json.load(f)] == [x["status"] for x in results]
+
+
+def test_expand_jobs():
+    import euromod # puts the modules of the package on the path
+    from batch import expand_jobs
+    jobs = expand_jobs({"defaults": {"country": "SL", "dataset": "sl_demo_v1", "options": {"euro": True}},
+                        "jobs": [{"system": ["SL_2000", "SL_2001"], "dataset": ["sl_demo_v1", "sl_demo_v2"]},
+                                 {"name": "reform", "system": "SL_2000", "constants": [["$c", "", "1"]]}]})
+    assert [job["name"] for job in jobs] == ["SL_2000_sl_demo_v1", "SL_2000_sl_demo_v2", "SL_2001_sl_demo_v1", "SL_2001_sl_demo_v2", "reform"]
+    assert all(job["country"] == "SL" and job["options"] == {"euro": True} for job in jobs)
+    assert jobs[-1]["dataset"] == "sl_demo_v1"
+    assert expand_jobs([{"country": "SL", "system": "SL_2000", "dataset": "sl_demo_v1"}]*2)[1]["name"] == "SL_2000_sl_demo_v1_1"
+
+
+def test_expand_jobs_missing_key():
+    import euromod # puts the modules of the package on the path
+    from batch import expand_jobs
+    with pytest.raises(ValueError, match="Job 0 has no system"):
+        expand_jobs([{"country": "SL", "dataset": "sl_demo_v1"}])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch(model_path, tmp_path, workers):
+    import euromod # puts the modules of the package on the path
+    from batch import run_batch, expand_jobs
+    jobs = expand_jobs([{"country": "SL", "system": ["SL_2000", "SL_2001"], "dataset": "sl_demo_v1"}])
+    results = run_batch(model_path, jobs, str(tmp_path), workers=workers, output="npy", verbose=False)
+    assert [x["status"] for x in results] == ["ok", "ok"]
+    assert all(x["rows"] == 1000 for x in results)
+    for job in jobs:
+        folder = tmp_path / job["name"]
+        assert os.listdir(folder) == [job["system"].lower() + "_std"] # one folder of .npy files per output
+        assert len(os.listdir(folder / os.listdir(folder)[0])) > 0
+    with open(os.path.join(tmp_path, "summary.json")) as f:
+        assert [x["name"] for x in json.load(f)] == [job["name"] for job in jobs]
+    with open(os.path.join(tmp_path, "memory.json")) as f:
+        assert len(json.load(f)) > 0
@@ -0,0 +1,113 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import os
+import standin
+
+
+def test_memory_cache(system, tmp_path):
+    from euromod import ResultCache
+    cache = ResultCache()
+    data = standin.make_data(300)
+    calls = standin.CALLS["RunFromPython"]
+    first = system.run(data, "sl_demo_v1", verbose=False, cache=cache)
+    second = system.run(data, "sl_demo_v1", verbose=False, cache=cache)
+    assert standin.CALLS["RunFromPython"] == calls + 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.outputs[0].equals(first.outputs[0])
+    second.outputs[0].iloc[0, 0] = -1 # the outputs are copies of the cached arrays
+    assert system.run(data, "sl_demo_v1", verbose=False, cache=cache).outputs[0].equals(first.outputs[0])
+
+
+def test_cache_key_changes(system):
+    from euromod import ResultCache
+    cache = ResultCache()
+    data = standin.make_data(300)
+    system.run(data, "sl_demo_v1", verbose=False, cache=cache)
+    changed = data.copy()
+    changed.iloc[0, -1] += 1
+    system.run(changed, "sl_demo_v1", verbose=False, cache=cache)
+    system.run(data, "sl_demo_v1", verbose=False, cache=cache, constantsToOverwrite={("$c", "1"): "2"})
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_disk_cache_stale_after_model_update(tmp_path):
+    from euromod import Model, ResultCache
+    model_path = standin.create_model(str(tmp_path / "model"), countries=("SL",), rows=100)
+    system = Model(model_path)["SL"]["SL_2000"]
+    data = standin.make_data(100)
+    system.run(data, "sl_demo_v1", verbose=False, cache=ResultCache(path=str(tmp_path / "cache")))
+    cache = ResultCache(path=str(tmp_path / "cache")) # e.g. another session
+    system.run(data, "sl_demo_v1", verbose=False, cache=cache)
+    assert cache.hits == 1
+    fname = os.path.join(model_path, "XMLParam", "Config", "Extensions.xml")
+    st = os.stat(fname)
+    os.utime(fname, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    system.run(data, "sl_demo_v1", verbose=False, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_key_changes_with_switches(tmp_path):
+    from euromod import Model, ResultCache
+    from EM_XmlHandler import ReadCountryOptions
+    system = Model(standin.create_model(str(tmp_path / "model"), countries=("SL",), rows=100))["SL"]["SL_2000"]
+    pol = system.policies[0]
+    def engine(config, data, variables, constants, handler):
+        ### no tax when the first policy is switched off
+        outputs = standin.default_engine(config, data, variables, constants, handler)
+        if handler.GetPieceOfInfo(ReadCountryOptions.SYS_POL, pol.ID)["Switch"] == "off":
+            for out, columns in outputs.values():
+                out[:, columns.index("ils_tax")] = 0
+        return outputs
+    cache = ResultCache()
+    data = standin.make_data(100)
+    previous = standin.set_engine(engine)
+    try:
+        on = system.run(data, "sl_demo_v1", verbose=False, cache=cache)
+        pol.switch = "off"
+        off = system.run(data, "sl_demo_v1", verbose=False, cache=cache)
+        assert (cache.hits, cache.misses) == (0, 2)
+        assert off.outputs[0]["ils_tax"].sum() == 0 and on.outputs[0]["ils_tax"].sum() > 0
+        pol.switch = "on"
+        assert system.run(data, "sl_demo_v1", verbose=False, cache=cache).outputs[0].equals(on.outputs[0])
+        assert cache.hits == 1
+    finally:
+        standin.set_engine(previous)
+
+
+def test_cache_hit_after_restore(system):
+    from euromod import ResultCache, Policy
+    cache = ResultCache()
+    data = standin.make_data(100)
+    system.run(data, "sl_demo_v1", verbose=False, cache=cache)
+    pol = next(pol for pol in system.parent.policies if isinstance(pol, Policy))
+    snap = system.snapshot()
+    system.set_parameters({pol.functions[0].parameters[0].ID: "1"})
+    system.run(data, "sl_demo_v1", verbose=False, cache=cache)
+    system.restore(snap, keep=False)
+    system.run(data, "sl_demo_v1", verbose=False, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_key_changes_with_engine(system):
+    from euromod import ResultCache, FakeEngine
+    cache = ResultCache()
+    data = standin.make_data(100)
+    system.run(data, "sl_demo_v1", verbose=False, cache=cache)
+    fake = system.run(data, "sl_demo_v1", verbose=False, cache=cache, engine=FakeEngine())
+    assert cache.misses == 2
+    assert "ils_tax" not in fake.outputs[0].columns
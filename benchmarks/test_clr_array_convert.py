@@ -0,0 +1,69 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import numpy as np
+import pytest
+from euromod import Model # noqa: F401, sets up the import path of the euromod modules
+from utils.clr_array_convert import asNetArray, asNumpyArray, asNetArrayFromColumns, asNumpyArrays, BufferPool
+
+### number of rows of the converted arrays, with 50 columns
+SIZES = (1_000, 100_000, 1_000_000)
+N_COLUMNS = 50
+
+
+def _columns(n):
+    rng = np.random.default_rng(0)
+    return [rng.random(n) for j in range(N_COLUMNS)]
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_asNetArray(benchmark, n):
+    arr = np.column_stack(_columns(n))
+    benchmark(asNetArray, arr)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_asNetArrayFromColumns(benchmark, n):
+    columns = _columns(n)
+    benchmark(asNetArrayFromColumns, columns)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_asNetArrayFromColumns_pool(benchmark, n):
+    columns = _columns(n)
+    pool = BufferPool()
+    def convert():
+        pool.release(asNetArrayFromColumns(columns, pool=pool))
+    benchmark(convert)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_asNumpyArray(benchmark, n):
+    netArray = asNetArray(np.column_stack(_columns(n)))
+    benchmark(asNumpyArray, netArray)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_asNumpyArray_view(benchmark, n):
+    netArray = asNetArray(np.column_stack(_columns(n)))
+    benchmark(asNumpyArray, netArray, copy=False)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_asNumpyArrays(benchmark, n):
+    netArrays = [asNetArray(np.column_stack(_columns(n))) for i in range(4)]
+    benchmark(asNumpyArrays, netArrays)
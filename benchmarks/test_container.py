@@ -0,0 +1,93 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import pytest
+from euromod import Model # noqa: F401, sets up the import path of the euromod modules
+from container import Container
+
+SIZES = (100, 10_000)
+
+
+class _Element:
+    def __init__(self, i):
+        self.name = f"el{i}"
+        self.ID = f"id{i}"
+        self.comment = f"comment {i}"
+    def _short_repr(self):
+        return self.name
+    def _container_begin_repr(self):
+        return self.name
+    def _container_middle_repr(self):
+        return ""
+    def _container_end_repr(self):
+        return self.comment
+
+
+def _container(n):
+    container = Container(idDict=True)
+    for i in range(n):
+        el = _Element(i)
+        container.add(el.name, el, el.ID)
+    return container
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_add(benchmark, n):
+    benchmark(_container, n)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_getitem_name(benchmark, n):
+    container = _container(n)
+    names = [f"el{i}" for i in range(n)]
+    benchmark(lambda: [container[x] for x in names])
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_getitem_index(benchmark, n):
+    container = _container(n)
+    benchmark(lambda: [container[i] for i in range(n)])
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_slice(benchmark, n):
+    container = _container(n)
+    benchmark(container.__getitem__, slice(0, n, 2))
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_iteration(benchmark, n):
+    container = _container(n)
+    benchmark(lambda: sum(1 for x in container))
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_concatenation(benchmark, n):
+    container = _container(n)
+    benchmark(container.__add__, container)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_repr(benchmark, n):
+    container = _container(n)
+    benchmark(repr, container)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_find(benchmark, n):
+    container = _container(n)
+    benchmark(container.find, "name", "el99")
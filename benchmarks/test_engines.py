@@ -0,0 +1,182 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import os
+import time
+import numpy as np
+import pytest
+import standin
+
+
+def test_fake_engine(system):
+    from euromod import FakeEngine
+    engine = FakeEngine()
+    data = standin.make_data(30)
+    calls = standin.CALLS["RunFromPython"]
+    out = system.run(data, "sl_demo_v1", verbose=False, engine=engine, switches=[("BTA", True)])
+    assert standin.CALLS["RunFromPython"] == calls # the model is not run
+    assert out.output_filenames == ["sl_2000_std.txt"]
+    assert np.array_equal(out.outputs[0].to_numpy(), data.to_numpy())
+    assert engine.calls == [("SL_2000", "sl_demo_v1", {"constantsToOverwrite": None, "outputpath": "", "addons": [], "switches": [("BTA", True)],
+                                                       "euro": False, "public_components_only": False})]
+
+
+def test_fake_engine_function(system):
+    from euromod import FakeEngine
+    def tax(system, names, columns, options):
+        yem = columns[names.index("yem")]
+        return {"out.txt": (np.column_stack([yem, 0.1*yem]), ["yem", "ils_tax"])}
+    out = system.run(standin.make_data(30), "sl_demo_v1", verbose=False, engine=FakeEngine(tax), output_format="numpy")
+    assert out.output_variables["out.txt"] == ["yem", "ils_tax"]
+    assert np.allclose(out.outputs[0][:, 1], 0.1*out.outputs[0][:, 0])
+
+
+def test_fake_engine_validate(system):
+    from euromod import FakeEngine, InputValidationError
+    engine = FakeEngine()
+    data = standin.make_data(30)
+    data.loc[3, "idperson"] = data.loc[4, "idperson"]
+    with pytest.raises(InputValidationError):
+        system.run(data, "sl_demo_v1", verbose=False, engine=engine, validate=True)
+    assert engine.calls == []
+
+
+def test_fake_engine_cache(system):
+    from euromod import FakeEngine, ResultCache
+    engine, cache = FakeEngine(), ResultCache()
+    data = standin.make_data(30)
+    first = system.run(data, "sl_demo_v1", verbose=False, engine=engine, cache=cache)
+    first.outputs[0].iloc[0, 0] = -1 # the outputs are not the cached arrays
+    second = system.run(data, "sl_demo_v1", verbose=False, engine=engine, cache=cache)
+    assert len(engine.calls) == 1 and cache.hits == 1
+    assert np.array_equal(second.outputs[0].to_numpy(), data.to_numpy())
+
+
+def test_failed_run(system):
+    from euromod import FakeEngine, EngineResult
+    class Failing(FakeEngine):
+        def run(self, system, data, dataset_id, options):
+            return EngineResult(False, {}, [("failed", False)])
+    with pytest.raises(Exception, match="aborted with errors"):
+        system.run(standin.make_data(30), "sl_demo_v1", verbose=False, engine=Failing())
+
+
+def test_set_engine(system):
+    from euromod import FakeEngine, set_engine, get_engine
+    engine = FakeEngine()
+    previous = set_engine(engine)
+    try:
+        assert get_engine() is engine
+        system.run(standin.make_data(30), "sl_demo_v1", verbose=False)
+    finally:
+        set_engine(previous)
+    assert len(engine.calls) == 1
+    assert get_engine() is previous
+
+
+def test_in_process_engine(system):
+    from euromod import InProcessEngine
+    data = standin.make_data(30)
+    cwd = os.getcwd()
+    result = InProcessEngine().run(system, data, "sl_demo_v1", {})
+    assert result.success and os.getcwd() == cwd
+    arr, columns = result.outputs["sl_2000_std.txt"]
+    assert np.array_equal(arr, system.run(data, "sl_demo_v1", verbose=False).outputs[0].to_numpy())
+
+
+def _shm():
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+def test_subprocess_engine(system):
+    from euromod import SubprocessEngine
+    data = standin.make_data(300)
+    expected = system.run(data, "sl_demo_v1", verbose=False).outputs[0].to_numpy()
+    before = _shm()
+    with SubprocessEngine(workers=2, max_jobs=2) as engine:
+        out = system.run(data, "sl_demo_v1", verbose=False, engine=engine)
+        assert np.array_equal(out.outputs[0].to_numpy(), expected)
+        assert {"to_net", "engine", "to_numpy"} <= set(out.timings) # phases of the worker
+        systems = [system.parent[name] for name in ("SL_2000", "SL_2001", "SL_2002")]
+        results = [future.result() for future in [engine.submit(x, data, "sl_demo_v1") for x in systems]]
+        assert [list(x.outputs) for x in results] == [[f"{x.name.lower()}_std.txt"] for x in systems]
+        pool = next(iter(engine._pools.values()))
+        assert pool.jobs == 4 and pool.stats()["workers"] == 2 # the workers are replaced after 2 jobs
+    assert _shm() == before
+
+
+def test_subprocess_engine_parameters(system):
+    ### the parameter values of this process are used by the worker, and restored after the run
+    from euromod import SubprocessEngine
+    from EM_XmlHandler import ReadCountryOptions, XmlHelpers
+    pol = next(pol for pol in system.parent.policies if hasattr(pol, "functions"))
+    fun = next(fun for fun in pol.functions if fun.name == "Elig")
+    id = system.ID + fun.parameters[0].ID
+    def engine_function(config, data, variables, constants, handler):
+        value = float(XmlHelpers.RemoveCData(str(handler.GetPieceOfInfo(ReadCountryOptions.SYS_PAR, id)["Value"])).split("#")[0])
+        return {"par.txt": (np.full((data.shape[1], 1), value), ["par"])}
+    previous = standin.set_engine(engine_function)
+    snap = system.snapshot()
+    try:
+        with SubprocessEngine() as engine:
+            system.set_parameters({f"{pol.name}/{fun.name}/{fun.parameters[0].name}": "7"})
+            assert system.run(standin.make_data(3), "sl_demo_v1", verbose=False, engine=engine).outputs[0].iloc[0, 0] == 7
+            system.restore(snap)
+            assert system.run(standin.make_data(3), "sl_demo_v1", verbose=False, engine=engine).outputs[0].iloc[0, 0] != 7
+    finally:
+        system.restore(snap, keep=False)
+        standin.set_engine(previous)
+
+
+def test_subprocess_engine_switches(system):
+    ### the policy switches of this process are used by the worker, as by the in-process engine
+    from euromod import SubprocessEngine
+    from EM_XmlHandler import ReadCountryOptions
+    pol = system.policies[1]
+    def engine_function(config, data, variables, constants, handler):
+        value = handler.GetPieceOfInfo(ReadCountryOptions.SYS_POL, pol.ID)["Switch"] == "on"
+        return {"switch.txt": (np.full((data.shape[1], 1), float(value)), ["switch"])}
+    previous = standin.set_engine(engine_function)
+    try:
+        with SubprocessEngine() as engine:
+            pol.switch = "off"
+            assert system.run(standin.make_data(3), "sl_demo_v1", verbose=False, engine=engine).outputs[0].iloc[0, 0] == 0
+            assert system.run(standin.make_data(3), "sl_demo_v1", verbose=False).outputs[0].iloc[0, 0] == 0
+            pol.switch = "on"
+            assert system.run(standin.make_data(3), "sl_demo_v1", verbose=False, engine=engine).outputs[0].iloc[0, 0] == 1
+    finally:
+        pol.switch = "on"
+        standin.set_engine(previous)
+
+
+def test_subprocess_engine_timeout(system):
+    from euromod import SubprocessEngine
+    from server import JobTimeout
+    def slow(config, data, *args):
+        if data.shape[1] == 7:
+            time.sleep(30)
+        return standin.default_engine(config, data, *args)
+    previous = standin.set_engine(slow) # inherited by the forked workers
+    try:
+        with SubprocessEngine(timeout=1) as engine:
+            start = time.perf_counter()
+            with pytest.raises(JobTimeout):
+                system.run(standin.make_data(7), "sl_demo_v1", verbose=False, engine=engine)
+            assert time.perf_counter() - start < 10
+            assert len(system.run(standin.make_data(8), "sl_demo_v1", verbose=False, engine=engine).outputs[0]) == 8
+    finally:
+        standin.set_engine(previous)
@@ -0,0 +1,48 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import importlib.util
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def test_same_columns_for_every_container():
+    from euromod import SharedDataset
+    from utils.frames import get_columns
+    df = pd.DataFrame({"idhh": [1., 1., 2.], "n": [1, 2, 3], "flag": [True, False, True], "name": ["a", "b", "c"]})
+    expected = get_columns(df)
+    assert expected[0] == ["idhh", "n"]
+    inputs = [{name: df[name].to_numpy() for name in df.columns if name != "name"}]
+    with SharedDataset(df) as shared:
+        inputs.append(shared)
+        for data in inputs:
+            names, columns, attrs = get_columns(data)
+            assert names == expected[0]
+            assert all(np.array_equal(a, b) and a.dtype == np.float64 for a, b in zip(columns, expected[1]))
+        del columns
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is not None, reason="pyarrow is installed")
+def test_arrow_output_without_pyarrow(system):
+    import standin
+    calls = standin.CALLS["RunFromPython"]
+    with pytest.raises(ImportError, match="pyarrow"):
+        system.run(standin.make_data(10), "sl_demo_v1", verbose=False, output_format="arrow")
+    with pytest.raises(ImportError, match="pyarrow"):
+        next(system.run_iter([standin.make_data(10)], "sl_demo_v1", output_format="arrow"))
+    assert standin.CALLS["RunFromPython"] == calls # the model did not run
@@ -0,0 +1,31 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+from memory import resample
+
+
+def test_resample(model):
+    from validation import validate_columns
+    from utils.frames import get_columns
+    data = model["SL"].load_data("sl_demo_v1")
+    for n in (10, len(data), 5*len(data) + 1):
+        out = resample(data, n)
+        assert 0 < len(out) <= n and len(out) > n - 10
+        assert list(out.columns) == list(data.columns) and out.attrs == data.attrs
+        names, columns, attrs = get_columns(out)
+        assert validate_columns(names, columns) == []
+        assert (out["idpartner"] != 0).sum() > 0
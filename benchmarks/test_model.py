@@ -0,0 +1,74 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import standin
+
+
+def test_load_model(benchmark, model_path):
+    from euromod import Model
+    benchmark(Model, model_path)
+
+
+def test_load_country(benchmark, model_path):
+    from euromod import Model
+    def load():
+        country = Model(model_path)["SL"]
+        country._load()
+        return country
+    benchmark(load)
+
+
+def test_load_tree(benchmark, model_path):
+    ### materialization of all policies, functions and parameters of a system
+    from euromod import Model
+    def load():
+        system = Model(model_path)["SL"]["SL_2000"]
+        return sum(len(fun.parameters) for pol in system.policies if hasattr(pol, "functions") for fun in pol.functions)
+    benchmark(load)
+
+
+def test_find(benchmark, system):
+    system.policies[0].functions[0].parameters # load the tree before timing
+    benchmark(system.policies.find, "functions.parameters.name", "comp", return_children=True)
+
+
+def test_load_data(benchmark, model):
+    benchmark(model["SL"].load_data, "sl_demo_v1")
+
+
+def test_run(benchmark, system, data):
+    benchmark(system.run, data, "sl_demo_v1", verbose=False)
+
+
+def test_run_numpy(benchmark, system, data):
+    benchmark(system.run, data, "sl_demo_v1", verbose=False, output_format="numpy", zero_copy=True)
+
+
+def test_run_validate(benchmark, system, data):
+    benchmark(system.run, data, "sl_demo_v1", verbose=False, validate=True)
+
+
+def test_run_chunked(benchmark, system, data):
+    benchmark(system.run_chunked, data, "sl_demo_v1", chunk_households=10_000, verbose=False)
+
+
+def test_engine_calls(system):
+    ### the run reaches the engine once, with the data of the call
+    calls = standin.CALLS["RunFromPython"]
+    out = system.run(standin.make_data(300), "sl_demo_v1", verbose=False)
+    assert standin.CALLS["RunFromPython"] == calls + 1
+    assert len(out.outputs[0]) == 300
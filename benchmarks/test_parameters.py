@@ -0,0 +1,120 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+import pytest
+
+
+def _value(system, id):
+    from EM_XmlHandler import ReadCountryOptions, XmlHelpers
+    return XmlHelpers.RemoveCData(str(system.parent._countryInfoHandler.GetPieceOfInfo(ReadCountryOptions.SYS_PAR, id)["Value"]))
+
+
+def _referenced_parameter(system):
+    ### path and identifier of a parameter of a policy that has a reference policy in the country
+    from euromod import Policy, ReferencePolicy
+    country = system.parent
+    referenced = {pol.name for pol in country.policies if isinstance(pol, ReferencePolicy)}
+    pol = next(pol for pol in country.policies if isinstance(pol, Policy) and pol.name in referenced)
+    names = [fun.name for fun in pol.functions]
+    fun = next(fun for fun in pol.functions if names.count(fun.name) == 1) # a path must match a single parameter
+    return f"{pol.name}/{fun.name}/{fun.parameters[0].name}", system.ID + fun.parameters[0].ID
+
+
+def test_set_parameter_of_referenced_policy(system):
+    path, id = _referenced_parameter(system)
+    snap = system.snapshot()
+    try:
+        system.set_parameters({path: "123"})
+        assert _value(system, id) == "123"
+    finally:
+        system.restore(snap, keep=False)
+
+
+def test_restore(system):
+    path, id = _referenced_parameter(system)
+    original = _value(system, id)
+    snap = system.snapshot()
+    system.set_parameters({path: "1"})
+    system.set_parameters({path: "2"})
+    assert _value(system, id) == "2"
+    system.restore(snap, keep=False)
+    assert _value(system, id) == original
+
+
+def test_unknown_path(system):
+    with pytest.raises(KeyError):
+        system.set_parameters({"nopolicy/nofunction/noparameter": "1"})
+
+
+def test_parameter_of_another_system(model, system):
+    ### the identifier of a parameter of another system is not a parameter of this system
+    path, id = _referenced_parameter(system)
+    other = next(sys for sys in model["SL"].systems if sys.ID != system.ID)
+    with pytest.raises(KeyError):
+        system.set_parameters({other.ID + id[len(system.ID):]: "1"})
+
+
+def test_paths_read_once(system, monkeypatch):
+    ### the parameters of the country are read once for all the paths of a call
+    from euromod import System
+    unique = [(path, ids[0]) for path, ids in system._parameter_paths().items() if len(ids) == 1][:3]
+    calls = []
+    paths = System._parameter_paths
+    monkeypatch.setattr(System, "_parameter_paths", lambda self: calls.append(1) or paths(self))
+    snap = system.snapshot()
+    try:
+        system.set_parameters({path: str(i) for i, (path, id) in enumerate(unique)})
+        assert len(calls) == 1
+        assert [_value(system, system.ID + id) for path, id in unique] == ["0", "1", "2"]
+    finally:
+        system.restore(snap, keep=False)
+
+
+def test_edits_in_chunk_workers(system):
+    ### the workers of run_chunked run with the parameter values and the switches of this process
+    ### the workers load the model again: the stand-in handlers do not share the edits of this process with them
+    import numpy as np
+    import standin
+    path, id = _referenced_parameter(system)
+    pol = system.policies[1]
+    def engine_function(config, data, variables, constants, handler):
+        from EM_XmlHandler import ReadCountryOptions, XmlHelpers
+        value = XmlHelpers.RemoveCData(str(handler.GetPieceOfInfo(ReadCountryOptions.SYS_PAR, id)["Value"]))
+        switch = handler.GetPieceOfInfo(ReadCountryOptions.SYS_POL, pol.ID)["Switch"] == "on"
+        return {"par.txt": (np.tile([float(value), float(switch)], (data.shape[1], 1)), ["par", "switch"])}
+    previous = standin.set_engine(engine_function) # inherited by the forked workers
+    snap = system.snapshot()
+    try:
+        system.set_parameters({path: "7"})
+        pol.switch = "off"
+        expected = system.run(standin.make_data(300), "sl_demo_v1", verbose=False).outputs[0]
+        out = system.run_chunked(standin.make_data(300), "sl_demo_v1", chunk_households=20, workers=2, verbose=False)
+        assert (out.outputs[0]["par"] == 7).all() and (out.outputs[0]["switch"] == 0).all()
+        assert out.outputs[0].equals(expected)
+    finally:
+        system.restore(snap, keep=False)
+        pol.switch = "on"
+        standin.set_engine(previous)
+
+
+def test_run_chunk_restores_the_tracer(model_path, system):
+    ### a chunk run in this process leaves the active tracer as it was
+    import standin
+    from chunking import run_chunk
+    from tracing import get_tracer
+    outputs, errors, events = run_chunk(model_path, "SL", system.name, {}, standin.make_data(30), "sl_demo_v1", {}, trace=True)
+    assert len(events) > 0
+    assert get_tracer() is None
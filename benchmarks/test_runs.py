@@ -0,0 +1,46 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+
+import numpy as np
+import pytest
+import standin
+
+
+@pytest.fixture(scope="module")
+def single(system):
+    data = standin.make_data(500)
+    return data, system.run(data, "sl_demo_v1", verbose=False).outputs[0]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_chunked_same_as_run(system, single, workers):
+    data, expected = single
+    sim = system.run_chunked(data, "sl_demo_v1", chunk_households=37, workers=workers, verbose=False)
+    output = sim.outputs[0]
+    assert list(output.columns) == list(expected.columns)
+    assert np.array_equal(output.to_numpy(), expected.to_numpy())
+
+
+def test_run_iter_same_as_run(system, single):
+    data, expected = single
+    starts = np.flatnonzero(np.diff(data["idhh"].to_numpy())) + 1 # first row of every household
+    cuts = [0, *np.unique(starts[np.searchsorted(starts, [100, 200, 300, 400])]), len(data)]
+    frames = [data.iloc[a:b] for a, b in zip(cuts[:-1], cuts[1:])] # whole households in every frame
+    outputs = [sim.outputs[0] for sim in system.run_iter(iter(frames), "sl_demo_v1")]
+    assert len(outputs) == len(frames) == 5
+    assert np.array_equal(np.concatenate([x.to_numpy() for x in outputs]), expected.to_numpy())
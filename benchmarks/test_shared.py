@@ -0,0 +1,84 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+
+import os
+import pickle
+import numpy as np
+import pytest
+import standin
+
+
+def test_columns():
+    from euromod import SharedDataset
+    data = standin.make_data(100)
+    with SharedDataset(data) as shared:
+        assert shared.names == list(data.columns)
+        assert len(shared) == len(data)
+        columns = shared.to_dict()
+        for name in data.columns:
+            assert np.array_equal(columns[name], data[name].to_numpy(np.float64))
+        with pytest.raises(ValueError):
+            columns["idhh"][0] = 0 # read-only
+
+
+def test_slice_and_pickle():
+    from euromod import SharedDataset
+    data = standin.make_data(100)
+    with SharedDataset(data) as shared:
+        part = pickle.loads(pickle.dumps(shared[10:30]))
+        assert part.name == shared.name and len(part) == 20
+        assert np.array_equal(part.to_dict()["idperson"], data["idperson"].to_numpy(np.float64)[10:30])
+        assert len(part[5:100]) == 15
+        with pytest.raises(TypeError):
+            shared[::2]
+        part.unlink() # not the owner, the block is not released
+        assert os.path.exists(f"/dev/shm/{shared.name}")
+
+
+def test_unlink():
+    from euromod import SharedDataset
+    shared = SharedDataset(standin.make_data(100))
+    name = shared.name
+    assert os.path.exists(f"/dev/shm/{name}")
+    shared.unlink()
+    assert not os.path.exists(f"/dev/shm/{name}")
+
+
+def test_run_on_shared_dataset(system):
+    from euromod import SharedDataset
+    data = standin.make_data(300)
+    expected = system.run(data, "sl_demo_v1", verbose=False).outputs[0]
+    with SharedDataset(data) as shared:
+        output = system.run(shared, "sl_demo_v1", verbose=False).outputs[0]
+        assert np.array_equal(output.to_numpy(), expected.to_numpy())
+        first = int(np.flatnonzero(np.diff(data["idhh"].to_numpy()))[20]) + 1 # first row of a household
+        part = system.run(shared[first:], "sl_demo_v1", verbose=False).outputs[0]
+        assert np.array_equal(part.to_numpy(), expected.to_numpy()[first:])
+
+
+def test_share_arrays():
+    import euromod # puts the modules of the package on the path
+    from shared import share_arrays, read_shared_arrays
+    outputs = {"sl_2000_std.txt": (np.arange(6.0).reshape(2, 3), ["a", "b", "c"])}
+    shared, blocks = share_arrays(outputs)
+    read = read_shared_arrays(shared) # the writer still holds its handles, as on Windows the blocks would be destroyed otherwise
+    for shm in blocks:
+        shm.close()
+    assert np.array_equal(read["sl_2000_std.txt"][0], outputs["sl_2000_std.txt"][0])
+    assert read["sl_2000_std.txt"][1] == ["a", "b", "c"]
+    assert not any(os.path.exists(f"/dev/shm/{name}") for name, shape, dtype, columns in shared.values())
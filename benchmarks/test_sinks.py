@@ -0,0 +1,92 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import os
+import numpy as np
+import pytest
+import standin
+
+
+def _read_npy(path, name):
+    folder = os.path.join(path, os.path.splitext(name)[0])
+    return {os.path.splitext(f)[0]: np.load(os.path.join(folder, f)) for f in os.listdir(folder)}
+
+
+def test_npy_sink_same_layout_for_run_and_run_chunked(system, tmp_path):
+    from euromod import NpySink
+    data = standin.make_data(300)
+    system.run(data, "sl_demo_v1", verbose=False, sink=NpySink(str(tmp_path / "run")))
+    system.run_chunked(data, "sl_demo_v1", chunk_households=7, verbose=False, sink=NpySink(str(tmp_path / "chunked")))
+    assert os.listdir(tmp_path / "run") == os.listdir(tmp_path / "chunked") == ["SL_2000_sl_demo_v1"]
+    single = _read_npy(str(tmp_path / "run" / "SL_2000_sl_demo_v1"), "sl_2000_std.txt")
+    chunked = _read_npy(str(tmp_path / "chunked" / "SL_2000_sl_demo_v1"), "sl_2000_std.txt")
+    assert single.keys() == chunked.keys()
+    for name in single:
+        assert np.array_equal(single[name], chunked[name])
+
+
+def test_run_chunked_scenario(system, tmp_path):
+    from euromod import NpySink
+    system.run_chunked(standin.make_data(30), "sl_demo_v1", verbose=False, sink=NpySink(str(tmp_path)), scenario="reform")
+    assert os.listdir(tmp_path) == ["reform"]
+
+
+def test_callback_sink_in_chunk_order(system):
+    data = standin.make_data(300)
+    expected = system.run(data, "sl_demo_v1", verbose=False).outputs[0]
+    received = []
+    sim = system.run_chunked(data, "sl_demo_v1", chunk_households=11, workers=2, verbose=False,
+                             sink=lambda name, df, chunk: received.append((name, chunk, df)))
+    assert len(sim.outputs) == 0 # the outputs are not kept in memory
+    assert [chunk for name, chunk, df in received] == list(range(len(received)))
+    assert {name for name, chunk, df in received} == {"sl_2000_std.txt"}
+    assert np.array_equal(np.concatenate([df.to_numpy() for name, chunk, df in received]), expected.to_numpy())
+
+
+def test_memory_sink():
+    from euromod import MemorySink
+    import pandas as pd
+    sink = MemorySink()
+    sink.write("out.txt", pd.DataFrame({"a": [1, 2]}), 0)
+    sink.write_array("out.txt", np.array([[3.0]]), ["a"], 1)
+    outputs = sink.close()
+    assert list(outputs) == ["out.txt"]
+    assert list(outputs["out.txt"]["a"]) == [1, 2, 3]
+    assert sink.close() == {}
+
+
+def test_sink_closed_when_a_chunk_fails(system):
+    from euromod import MemorySink
+    class Sink(MemorySink):
+        closed = False
+        def close(self):
+            self.closed = True
+            return super().close()
+    calls = []
+    def engine(config, data, *args):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError("chunk failed")
+        return standin.default_engine(config, data, *args)
+    sink = Sink()
+    previous = standin.set_engine(engine)
+    try:
+        with pytest.raises(RuntimeError):
+            system.run_chunked(standin.make_data(300), "sl_demo_v1", chunk_households=11, verbose=False, sink=sink)
+    finally:
+        standin.set_engine(previous)
+    assert sink.closed
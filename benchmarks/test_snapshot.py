@@ -0,0 +1,94 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+
+import os
+import pytest
+import standin
+
+
+@pytest.fixture(scope="module")
+def snapshot(model, tmp_path_factory):
+    from euromod import Model
+    path = str(tmp_path_factory.mktemp("snapshot") / "euromod.snapshot")
+    model.save_snapshot(path)
+    return Model.from_snapshot(path)
+
+
+def test_same_content_as_model(model, snapshot):
+    assert sorted(snapshot.countries.keys()) == sorted(model.countries.keys())
+    for country in model.countries:
+        assert [sys.name for sys in snapshot[country.name].systems] == [sys.name for sys in country.systems]
+        assert [ds.name for ds in snapshot[country.name].datasets] == [ds.name for ds in country.datasets]
+
+
+def test_parameter_values(model, snapshot):
+    from euromod import Policy
+    values = snapshot["SL"]["SL_2000"].parameter_values()
+    assert set(values.index) == {par.ID for pol in model["SL"].policies if isinstance(pol, Policy) for fun in pol.functions for par in fun.parameters}
+    assert list(values.columns) == ["policy", "function", "parameter", "group", "value"]
+    assert snapshot["SL"]["SL_2000"].diff(snapshot["SL"]["SL_2000"]).empty
+
+
+def test_diff(tmp_path):
+    from euromod import Model, Policy
+    model = Model(standin.create_model(str(tmp_path / "model"), countries=("SL",), rows=100))
+    model.save_snapshot(str(tmp_path / "before.snapshot"))
+    system = model["SL"]["SL_2000"]
+    pol = next(pol for pol in model["SL"].policies if isinstance(pol, Policy))
+    fun = next(fun for fun in pol.functions if [x.name for x in pol.functions].count(fun.name) == 1)
+    system.set_parameters({f"{pol.name}/{fun.name}/{fun.parameters[0].name}": "123"})
+    model.save_snapshot(str(tmp_path / "after.snapshot"))
+    before = Model.from_snapshot(str(tmp_path / "before.snapshot"))["SL"]["SL_2000"]
+    after = Model.from_snapshot(str(tmp_path / "after.snapshot"))["SL"]["SL_2000"]
+    diff = before.diff(after)
+    assert list(diff.index) == [fun.parameters[0].ID]
+    assert diff["value_right"].iloc[0] == "123"
+
+
+def test_switch_values(model, snapshot):
+    live = model["SL"].get_switch_value()
+    snap = snapshot["SL"].get_switch_value()
+    assert [(x.extension_name, x.data_name, x.sys_name, x.value) for x in live] == list(snap.itertuples(index=False, name=None))
+
+
+def test_stale(tmp_path):
+    from euromod import Model
+    model_path = standin.create_model(str(tmp_path / "model"), countries=("SL",), rows=100)
+    path = str(tmp_path / "euromod.snapshot")
+    Model(model_path).save_snapshot(path)
+    assert not Model.from_snapshot(path).is_stale()
+    fname = os.path.join(model_path, "XMLParam", "Config", "Extensions.xml")
+    st = os.stat(fname)
+    os.utime(fname, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    with pytest.raises(Exception):
+        Model.from_snapshot(path, rebuild=False)
+    assert not Model.from_snapshot(path).is_stale() # rebuilt from the project
+
+
+def test_open_snapshot_without_dotnet(snapshot):
+    ### a new process without the stand-in, where pythonnet and the EUROMOD assemblies cannot be loaded
+    import subprocess
+    import sys
+    code = ("import sys, euromod; snap = euromod.open_snapshot(sys.argv[1]); "
+            "print(len(snap['SL']['SL_2000'].parameter_values()), 'core' in sys.modules, 'clr' in sys.modules)")
+    src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code, snapshot.path], capture_output=True, text=True, check=True,
+                         env={**os.environ, "PYTHONPATH": os.path.join(src, "src")})
+    rows, core, clr = out.stdout.split()
+    assert int(rows) == len(snapshot["SL"]["SL_2000"].parameter_values())
+    assert (core, clr) == ("False", "False")
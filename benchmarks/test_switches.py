@@ -0,0 +1,42 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+
+def test_switch_matrix(model):
+    country = model["SL"]
+    matrix = country.switch_matrix()
+    assert list(matrix.columns) == [sys.name for sys in country.systems]
+    stacked = matrix.stack()
+    ext_names, dataset_names, sys_names = (list(x) for x in zip(*stacked.index))
+    assert list(country.get_switch_states(ext_names, dataset_names, sys_names)) == list(stacked)
+    for switch in country.get_switch_value():
+        assert matrix.loc[(switch.extension_name, switch.data_name), switch.sys_name] == switch.value
+
+
+def test_switch_matrix_after_edit(model):
+    ### the matrix is read again when a switch is edited
+    country = model["SL"]
+    country.switch_matrix()
+    switch = country.get_switch_value()[0]
+    state = switch.value
+    switch.value = "off" if state == "on" else "on"
+    try:
+        assert country.switch_matrix().loc[(switch.extension_name, switch.data_name), switch.sys_name] == switch.value
+        assert list(country.get_switch_states([switch.extension_name], [switch.data_name], [switch.sys_name])) == [switch.value]
+    finally:
+        switch.value = state
+    assert country.switch_matrix().loc[(switch.extension_name, switch.data_name), switch.sys_name] == state
@@ -0,0 +1,69 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import numpy as np
+import pytest
+import standin
+
+
+def _problems(system, data, required=None):
+    from euromod import InputValidationError
+    try:
+        system.validate_input(data, required)
+    except InputValidationError as e:
+        return e.problems
+    return []
+
+
+def test_valid_data(system):
+    assert _problems(system, standin.make_data(300)) == []
+
+
+def test_all_problems_reported(system):
+    data = standin.make_data(30)
+    data.loc[2, "yem"] = np.nan
+    data.loc[5, "idperson"] = data.loc[6, "idperson"]
+    data.loc[0, "idpartner"] = 1000
+    data.loc[3, "idmother"] = 1
+    data["name"] = "x"
+    problems = _problems(system, data, ["nope"])
+    assert len(problems) >= 6 # the duplicated identifier also breaks a link
+    for expected in ("missing", "Non-numeric", "NaN", "Duplicated", "unknown persons", "another household"):
+        assert any(expected in x for x in problems), expected
+
+
+def test_missing_identifiers(system):
+    data = standin.make_data(30)
+    data.loc[1, "idperson"] = np.nan
+    data.loc[5, "idperson"] = data.loc[6, "idperson"]
+    problems = _problems(system, data)
+    assert len(problems) == 1 and "idperson" in problems[0]
+
+
+def test_missing_link(system):
+    data = standin.make_data(30)
+    data.loc[1, "idpartner"] = np.nan
+    problems = _problems(system, data)
+    assert len(problems) == 1 and "idpartner" in problems[0]
+
+
+def test_run_validate(system):
+    from euromod import InputValidationError
+    data = standin.make_data(30)
+    data.loc[5, "idperson"] = data.loc[6, "idperson"]
+    with pytest.raises(InputValidationError):
+        system.run(data, "sl_demo_v1", verbose=False, validate=True)
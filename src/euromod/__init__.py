@@ -22,10 +22,35 @@ MODEL_PATH = os.path.dirname(__file__)
 if MODEL_PATH not in sys.path:
     sys.path.insert(0, MODEL_PATH)
 del os, sys, MODEL_PATH
-    
-from core import Model,Country,Policy,System,ReferencePolicy, PolicyInSystem, FunctionInSystem, Parameter, ParameterInSystem, Function, Dataset, DatasetInSystem, Extension
-from info import Info
-from base import ExtensionSwitch
+
+### module of every public name. The modules are imported when a name is first used, so that e.g. 
+### a snapshot can be browsed with open_snapshot without loading pythonnet and the EUROMOD assemblies
+_MODULES = {**dict.fromkeys(["Model", "Country", "Policy", "System", "ReferencePolicy", "PolicyInSystem", "FunctionInSystem", 
+                             "Parameter", "ParameterInSystem", "Function", "Dataset", "DatasetInSystem", "Extension"], "core"),
+            "Info": "info",
+            "ExtensionSwitch": "base",
+            "ResultCache": "cache",
+            "InputValidationError": "validation",
+            "set_profiler": "profiling", "get_profiler": "profiling",
+            "measure_metadata": "instrumentation",
+            "trace": "tracing",
+            "runtime_stats": "runtime", "release_memory": "runtime",
+            "SharedDataset": "shared",
+            **dict.fromkeys(["Engine", "EngineResult", "InProcessEngine", "SubprocessEngine", "FakeEngine", "set_engine", "get_engine"], "engines"),
+            "BufferPool": "utils.clr_array_convert",
+            **dict.fromkeys(["Sink", "MemorySink", "CallbackSink", "ParquetSink", "FeatherSink", "NpySink"], "sinks"),
+            **dict.fromkeys(["ModelSnapshot", "open_snapshot"], "snapshot")}
+
+def __getattr__(name):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(_MODULES[name]), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES))
 
 
 __all__ = ["Model",
@@ -42,6 +67,31 @@ __all__ = ["Model",
            "ParameterInSystem",
            "Extension",
            "ExtensionSwitch",
+           "ResultCache",
+           "BufferPool",
+           "SharedDataset",
+           "Engine",
+           "EngineResult",
+           "InProcessEngine",
+           "SubprocessEngine",
+           "FakeEngine",
+           "set_engine",
+           "get_engine",
+           "InputValidationError",
+           "set_profiler",
+           "get_profiler",
+           "measure_metadata",
+           "trace",
+           "runtime_stats",
+           "release_memory",
+           "Sink",
+           "MemorySink",
+           "CallbackSink",
+           "ParquetSink",
+           "FeatherSink",
+           "NpySink",
+           "ModelSnapshot",
+           "open_snapshot",
            "__version__",
            "__doc__"]
 
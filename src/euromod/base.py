@@ -21,6 +21,17 @@ clr.AddReference(os.path.join(DLL_PATH, "EM_XmlHandler.dll" ))
 from EM_XmlHandler import  XmlHelpers, ReadModelOptions
 from container import Container
 
+### attributes holding collections that are loaded on first access
+_LAZY_ATTRIBUTES = {"systems", "policies", "datasets", "bestmatch_datasets", "local_extensions", "extensions", "functions", "parameters"}
+
+class _NotLoaded:
+    """Placeholder shown in representations for collections that are not loaded yet."""
+    def _short_repr(self):
+        return "not loaded"
+    def __repr__(self):
+        return "not loaded"
+NOT_LOADED = _NotLoaded()
+
 class Base_Element:
     
     def _short_repr(self):
@@ -44,16 +55,28 @@ class Euromod_Element(Base_Element):
         self.parent = parent
     def _get_extension_repr(self):
         ext = ""
-        if len(self.extensions) > 0:
+        extensions = self._peek_attribute("extensions")
+        if extensions is NOT_LOADED: #do not link the extensions only for the representation
+            return ext
+        if len(extensions) > 0:
             ext = " (with switch set for "
-            for i,el in enumerate(self.extensions):
+            for i,el in enumerate(extensions):
                 ext += el.shortName
-                if i<len(self.extensions) - 1:
+                if i<len(extensions) - 1:
                     ext += ", "
                     
             ext += ") "
         return ext
 
+    def _peek_attribute(self, name):
+        ### get the attribute without loading collections that are not loaded yet
+        if name in self.__dict__:
+            value = self.__dict__[name]
+            if value is None and name in _LAZY_ATTRIBUTES:
+                return NOT_LOADED
+            return value
+        return getattr(self, name)
+
 
     
     def __setattr__(self, name, value):
@@ -65,6 +88,7 @@ class Euromod_Element(Base_Element):
             if tempname in __class__._CDATAvars:
                 valueAdjusted = XmlHelpers.CDATA(value)
 
+            self._record_edit(tempname)
             self._info[tempname] = valueAdjusted
         elif name == "_info":
             for el in value:
@@ -83,9 +107,13 @@ class Euromod_Element(Base_Element):
         super().__setattr__(name,value)
           
            
+    def _record_edit(self, key):
+        ### called before a value of the information is changed, see Country._record_edit
+        pass
+           
     def get_properties(self):
         properties = [x  for x in super().__dir__() if not x.startswith("_") and x not in  ["get_properties","load_data","run", "model","parent", "parentSystem", "parentTypeObject","show_attr"]] 
-        properties = [x for x in properties if not x.startswith("get_") ]
+        properties = [x for x in properties if not x.startswith("get_") and not callable(getattr(type(self),x,None))]
         properties.sort()
         return properties
     def __repr__(self):
@@ -93,7 +121,7 @@ class Euromod_Element(Base_Element):
         rep += self.__class__.__name__ + "\n"
         rep += "-"*30 + "\n"
         for el in self.get_properties():
-            attr = getattr(self,el)
+            attr = self._peek_attribute(el)
             if hasattr(attr,"_short_repr"):
                 attr_repr = attr._short_repr()
             else:
@@ -140,10 +168,17 @@ class SpineElement(Euromod_Element):
             return self.order + order_child
         else:
             return self.parent._get_spine_order( "." + self.order + order_child)
+    def _record_edit(self, key):
+        if "parent" not in self.__dict__: #still initialising
+            return
+        parent = self.parent
+        while (parent.__class__.__name__ != "Country"):
+            parent = parent.parent
+        parent._record_edit(str(self._objectType), self.ID, key, self._info)
     
 
 class SystemElement(Euromod_Element):
-    
+    _ctryOption = None
     def __init__(self,info,id,parentSystemObject,parentTypeObject):
         self._info = info
         self.ID: str = id
@@ -156,6 +191,15 @@ class SystemElement(Euromod_Element):
             return getattr(self.parentTypeObject,name)
         raise AttributeError(f"Attribute with name {name} not found.")
         
+    def _record_edit(self, key):
+        if "_initialised" in self.__dict__ and self._ctryOption is not None:
+            self.parentSystem.parent._record_edit(str(self._ctryOption), self.ID, key, self._info)
+        
+    def _peek_attribute(self, name):
+        if name not in self.__dict__ and not hasattr(type(self), name): #attribute of the parentType
+            return self.parentTypeObject._peek_attribute(name)
+        return super()._peek_attribute(name)
+        
     def show_attr(self):
         self.parentTypeObject.show_attr() #show the available attributes both for parentType
         for el in self._info.Keys:
@@ -181,6 +225,16 @@ def get_csharp_key(key):
         key = key[0].upper() + key[1:]
     return key
 
+def info_to_dict(info):
+    """Convert a csharp info dictionary into a python dict with cleaned keys and CDATA removed."""
+    infoDict = {}
+    for el in info:
+        value = el.Value
+        if str(el.Key) in Euromod_Element._CDATAvars:
+            value = XmlHelpers.RemoveCData(value)
+        infoDict[get_cleaned_key(str(el.Key))] = str(value)
+    return infoDict
+
 
     
     
\ No newline at end of file
@@ -0,0 +1,412 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import os
+import json
+import time
+import hashlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pandas as pd
+from utils.frames import get_columns
+from sinks import ParquetSink, FeatherSink, NpySink
+from server import run_options
+from runtime import release_memory_above, PeakMemory, worker_model
+
+SINKS = {"parquet": ParquetSink, "feather": FeatherSink, "npy": NpySink}
+### keys of a job that can be lists, expanded into one job per combination
+EXPANDED_KEYS = ("country", "system", "dataset")
+
+
+def _import_yaml():
+    try:
+        import yaml
+    except ImportError as e:
+        raise ImportError("Reading a YAML jobs file requires the package 'pyyaml'.") from e
+    return yaml
+
+
+def load_jobs(path):
+    """
+    Read a jobs file.
+
+    The file, in YAML or JSON, contains a list of jobs, or a mapping with the list of "jobs" and the "defaults" of all jobs.
+    A job is a mapping with:
+
+    - "country", "system" and "dataset": a name, or a list of names to run every combination;
+    - "name" (optional): name of the job, used as the folder of its outputs. Default is "<system>_<dataset>";
+    - "data" (optional): path to the tab-separated input file. Default is the dataset in the "Input" folder of the project;
+    - "constants" (optional): list of ``[name, group, value]`` constants to overwrite;
+    - "switches" (optional): mapping of extension short names to ``true`` or ``false``;
+    - "addons" (optional): list of ``[addon, system]`` addons;
+    - "options" (optional): other arguments of :func:`~System.run`, e.g. ``euro: true``.
+
+    Example
+    --------
+    .. code-block:: yaml
+
+        defaults:
+          country: SL
+          dataset: sl_demo_v4
+        jobs:
+          - system: [SL_1996, SL_1997]
+          - system: SL_1996
+            name: SL_1996_reform
+            constants:
+              - [$tinna_rate2, "", "0.4"]
+            switches:
+              BTA: true
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Path to the jobs file.
+
+    Returns
+    -------
+    :obj:`list` [ :obj:`dict` ]
+        The jobs, with one combination of country, system and dataset each and a unique name.
+    """
+    with open(path) as f:
+        if os.path.splitext(path)[1].lower() == ".json":
+            spec = json.load(f)
+        else:
+            spec = _import_yaml().safe_load(f)
+    return expand_jobs(spec)
+
+
+def expand_jobs(spec):
+    """Expand the content of a jobs file, see :func:`load_jobs`."""
+    if isinstance(spec, list):
+        spec = {"jobs": spec}
+    defaults = spec.get("defaults") or {}
+    jobs = []
+    for i, entry in enumerate(spec.get("jobs") or []):
+        entry = {**defaults, **entry}
+        for key in EXPANDED_KEYS:
+            if key not in entry:
+                raise ValueError(f"Job {i} has no {key}.")
+        values = [entry[key] if isinstance(entry[key], list) else [entry[key]] for key in EXPANDED_KEYS]
+        for combination in itertools.product(*values):
+            job = {**entry, **dict(zip(EXPANDED_KEYS, combination))}
+            if "name" not in entry or len(values[0])*len(values[1])*len(values[2]) > 1:
+                job["name"] = (entry["name"] + "_" if "name" in entry else "") + f"{job['system']}_{job['dataset']}"
+            jobs.append(job)
+    names = [job["name"] for job in jobs]
+    for i, job in enumerate(jobs):
+        if names.count(job["name"]) > 1:
+            job["name"] = f"{job['name']}_{i}"
+    return jobs
+
+
+def job_arguments(job):
+    """Get the arguments of :func:`~System.run` of a job, see :func:`load_jobs`."""
+    options = dict(job.get("options") or {})
+    if job.get("constants"):
+        options["constantsToOverwrite"] = [[[name, group], value] for name, group, value in job["constants"]]
+    if job.get("switches"):
+        options["switches"] = list(job["switches"].items())
+    if job.get("addons"):
+        options["addons"] = job["addons"]
+    return run_options(options)
+
+
+def _input_path(model_path, job):
+    return os.path.abspath(job.get("data") or os.path.join(model_path, "Input", job["dataset"] + ".txt"))
+
+
+def convert_input(path, folder):
+    """
+    Convert a tab-separated input file to a folder with one ``.npy`` file per numeric variable.
+
+    The conversion is skipped when the folder already holds the conversion of the current version of the file.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Path to the input file.
+    folder : :obj:`str`
+        Folder of the converted input.
+
+    Returns
+    -------
+    :obj:`list` [ :obj:`str` ]
+        Names of the variables.
+    """
+    manifest = os.path.join(folder, "source.json")
+    stat = os.stat(path)
+    source = {"path": path, "size": stat.st_size, "mtime": stat.st_mtime}
+    if os.path.exists(manifest):
+        with open(manifest) as f:
+            info = json.load(f)
+        if info["source"] == source:
+            return info["variables"]
+    names, columns, attrs = get_columns(pd.read_csv(path, sep="\t"))
+    os.makedirs(folder, exist_ok=True)
+    for name, column in zip(names, columns):
+        np.save(os.path.join(folder, name + ".npy"), column)
+    with open(manifest, "w") as f:
+        json.dump({"source": source, "variables": names}, f)
+    return names
+
+
+def input_size(folder, names):
+    """:obj:`int`: Number of rows of an input converted by :func:`convert_input`."""
+    return len(np.load(os.path.join(folder, names[0] + ".npy"), mmap_mode="r")) if len(names) > 0 else 0
+
+
+def load_input(folder, names):
+    """Map the variables of an input converted by :func:`convert_input`."""
+    return {name: np.load(os.path.join(folder, name + ".npy"), mmap_mode="r") for name in names}
+
+
+def _job_result(job, status="ok", message=None):
+    ### result of a job before it runs, or of a job that did not return a result
+    return {"name": job["name"], "country": job["country"], "system": job["system"], "dataset": job["dataset"],
+            "status": status, "rows": 0, "seconds": 0.0, "timings": {}, "files": [], "messages": [] if message is None else [message],
+            "input_bytes": 0, "output_bytes": 0, "peak_bytes": 0}
+
+
+def run_job(model_path, job, input_folder, names, out_dir, output="parquet", memory_limit=None):
+    """
+    Run a job of a batch, in this process or in a worker process.
+
+    The model is loaded once per process and kept for the next jobs.
+
+    Returns
+    -------
+    :obj:`dict`
+        The name, status ("ok" or "failed"), number of rows, wall time, timings by phase,
+        output files and messages of the job, the size of its input and output arrays
+        and the peak memory of the process during the job above the memory before the job.
+    """
+    start = time.perf_counter()
+    result = _job_result(job)
+    try:
+        system = worker_model(model_path)[job["country"]][job["system"]]
+        with PeakMemory() as memory:
+            data = load_input(input_folder, names)
+            result["rows"] = len(data[names[0]]) if len(names) > 0 else 0
+            sink = SINKS[output](out_dir)
+            sim = system.run(data, job["dataset"], verbose=False, sink=sink, keep_in_memory=False, scenario=job["name"], **job_arguments(job))
+            result["timings"] = {phase: timing["seconds"] for phase, timing in sim.timings.items()}
+            result["input_bytes"] = result["rows"]*len(names)*8
+            result["output_bytes"] = sim.timings.get("sink", {}).get("bytes", 0)
+            result["files"] = sorted(sink.files.values())
+            result["messages"] = [message for message in sim.errors]
+            del sim, data
+        result["peak_bytes"] = memory.increase
+    except Exception as e:
+        result["status"] = "failed"
+        result["messages"].append(f"{type(e).__name__}: {e}")
+    result["seconds"] = time.perf_counter() - start
+    release_memory_above(memory_limit)
+    return result
+
+
+class MemoryModel:
+    """Estimates of the peak memory of the jobs of a batch, learnt from the jobs that were run.
+
+    The peak memory of a job is estimated as ``rows * (input variables + output variables) * 8 * amplification``,
+    i.e. the size of its input and output arrays times an amplification factor. The number of output variables
+    and the amplification are learnt by country and system from the observed peaks: the amplification is
+    the highest of the last observations, plus a safety margin.
+
+    Parameters
+    ----------
+    path : :obj:`str`, optional
+        JSON file in which the observations are kept across batches. Default is :obj:`None`, i.e. not kept.
+    amplification : :obj:`float`, optional
+        Amplification used before a system was observed. Default is 3.
+    margin : :obj:`float`, optional
+        Relative safety margin added to the learnt amplification. Default is 0.2.
+    history : :obj:`int`, optional
+        Number of observations kept by country and system. Default is 5.
+    """
+    def __init__(self, path=None, amplification=3.0, margin=0.2, history=5):
+        self.path = path
+        self.amplification = amplification
+        self.margin = margin
+        self.history = history
+        self.observations = {}
+        """: A :obj:`dict` with the observed amplifications and output bytes per row, by "<country>/<system>"."""
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                self.observations = json.load(f)
+
+    @staticmethod
+    def _key(job):
+        return f"{job['country']}/{job['system']}"
+
+    def estimate(self, job, rows, n_variables):
+        """
+        Estimate the peak memory of a job.
+
+        Parameters
+        ----------
+        job : :obj:`dict`
+            The job, see :func:`load_jobs`.
+        rows : :obj:`int`
+            Number of rows of the input.
+        n_variables : :obj:`int`
+            Number of input variables.
+
+        Returns
+        -------
+        :obj:`int`
+            Estimated peak memory in bytes.
+        """
+        observed = self.observations.get(self._key(job))
+        input_bytes = rows*n_variables*8
+        if observed is None:
+            return int(2*input_bytes*self.amplification) # as many output as input variables
+        output_bytes = rows*observed["output_bytes_per_row"]
+        return int((input_bytes + output_bytes)*max(observed["amplification"])*(1 + self.margin))
+
+    def observe(self, result):
+        """Learn from the result of a job returned by :func:`run_job`."""
+        if result["status"] != "ok" or result["rows"] == 0 or result["input_bytes"] + result["output_bytes"] == 0:
+            return
+        observed = self.observations.setdefault(self._key(result), {"amplification": [], "output_bytes_per_row": 0})
+        observed["amplification"] = (observed["amplification"] + [result["peak_bytes"]/(result["input_bytes"] + result["output_bytes"])])[-self.history:]
+        observed["output_bytes_per_row"] = result["output_bytes"]/result["rows"]
+
+    def save(self):
+        """Write the observations to the JSON file."""
+        if self.path is not None:
+            with open(self.path, "w") as f:
+                json.dump(self.observations, f, indent=1)
+
+
+def run_batch(model_path, jobs, out_dir, workers=1, output="parquet", memory_limit=None, memory_budget=None, memory_model=None, verbose=True):
+    """
+    Run a batch of jobs in parallel processes.
+
+    The input files are converted once for all jobs to ``.npy`` files in ``<out_dir>/.inputs``, that are reused by later batches
+    while the input files do not change. The outputs of every job are written to ``<out_dir>/<job name>/``,
+    and a summary of the jobs to ``<out_dir>/summary.json``.
+
+    Parameters
+    ----------
+    model_path : :obj:`str`
+        Path to the EUROMOD project.
+    jobs : :obj:`list` [ :obj:`dict` ]
+        Jobs, see :func:`load_jobs`.
+    out_dir : :obj:`str`
+        Folder of the outputs.
+    workers : :obj:`int`, optional
+        Number of worker processes. Default is 1, i.e. the jobs are run in this process.
+    output : :obj:`str`, optional
+        Format of the outputs: "parquet", "feather" or "npy". Default is "parquet".
+    memory_limit : :obj:`int`, optional
+        Working set of a process, in bytes, above which :func:`~euromod.release_memory` is called after a job. Default is :obj:`None`.
+    memory_budget : :obj:`int`, optional
+        Memory available to the jobs running in parallel, in bytes, not counting the memory of the idle worker processes.
+        A job is started only when its estimated peak memory fits in the budget left by the running jobs, 
+        the largest jobs first. A job that does not fit in the whole budget is run alone.
+        Default is :obj:`None`, i.e. the jobs are started as soon as a worker is free.
+    memory_model : :class:`MemoryModel`, optional
+        Estimates of the peak memory of the jobs, updated with the observed peaks. Default is a :class:`MemoryModel`
+        kept in ``<out_dir>/memory.json``.
+    verbose : :obj:`bool`, optional
+        If True, a summary of every job is printed when it finishes. Default is :obj:`True`.
+
+    Returns
+    -------
+    :obj:`list` [ :obj:`dict` ]
+        The results of the jobs, in the order of the jobs, see :func:`run_job`. When a worker process stops abruptly, 
+        e.g. killed for lack of memory, the jobs it was running, and the other running jobs, are marked "failed"
+        and the batch goes on in new worker processes. Jobs that were not run, e.g. when the batch is interrupted,
+        are marked "not run" in the summary.
+    """
+    if output not in SINKS:
+        raise ValueError(f"Parameter 'output' must be one of {tuple(SINKS)}.")
+    if output != "npy":
+        SINKS[output](out_dir) # fails early when pyarrow is missing
+    os.makedirs(out_dir, exist_ok=True)
+    inputs = {}
+    for job in jobs:
+        path = _input_path(model_path, job)
+        if path not in inputs:
+            folder = os.path.join(out_dir, ".inputs", hashlib.blake2b(path.encode(), digest_size=8).hexdigest())
+            inputs[path] = (folder, convert_input(path, folder))
+    if memory_model is None:
+        memory_model = MemoryModel(os.path.join(out_dir, "memory.json"))
+    args = [(model_path, job, *inputs[_input_path(model_path, job)], out_dir, output, memory_limit) for job in jobs]
+    results = [None]*len(jobs)
+    if verbose:
+        print(f"{'job':<30} {'status':<7} {'rows':>9} {'seconds':>9} {'engine':>9} {'peak MB':>9} {'est. MB':>9}")
+    def report(i, result, estimate):
+        results[i] = result
+        result["estimated_bytes"] = estimate
+        memory_model.observe(result)
+        if verbose:
+            print(f"{result['name']:<30} {result['status']:<7} {result['rows']:>9} {result['seconds']:9.2f} {result['timings'].get('engine', 0.0):9.2f} "
+                  f"{result['peak_bytes']/2**20:9.0f} {estimate/2**20:9.0f}")
+            if result["status"] == "failed":
+                print("    " + result["messages"][-1])
+    def estimate(i):
+        folder, names = inputs[_input_path(model_path, jobs[i])]
+        return memory_model.estimate(jobs[i], input_size(folder, names), len(names))
+    try:
+        if workers > 1:
+            pool = ProcessPoolExecutor(workers)
+            pending = list(range(len(jobs)))
+            running = {} # estimated peak memory and index of the running jobs, by future
+            try:
+                while pending or running:
+                    ### the estimates improve with the jobs that finished, the largest jobs are admitted first
+                    estimates = {i: estimate(i) for i in pending}
+                    pending.sort(key=lambda i: -estimates[i])
+                    used = sum(x for x, i in running.values())
+                    for i in list(pending):
+                        if len(running) >= workers:
+                            break
+                        if memory_budget is None or not running or used + estimates[i] <= memory_budget:
+                            running[pool.submit(run_job, *args[i])] = (estimates[i], i)
+                            used += estimates[i]
+                            pending.remove(i)
+                    done, not_done = wait(list(running), return_when=FIRST_COMPLETED)
+                    if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                        done = wait(list(running))[0] # all running jobs are lost with the pool
+                    for future in done:
+                        x, i = running.pop(future)
+                        if isinstance(future.exception(), BrokenProcessPool):
+                            report(i, _job_result(jobs[i], "failed", "BrokenProcessPool: a worker process stopped abruptly, e.g. killed for lack of memory, "
+                                                                     "while running this job or another job."), x)
+                        else:
+                            report(i, future.result(), x)
+                    if any(isinstance(future.exception(), BrokenProcessPool) for future in done): # the batch goes on in a new pool
+                        pool.shutdown(wait=False) # its jobs were all reported
+                        pool = ProcessPoolExecutor(workers)
+            finally:
+                for future in running: # the jobs that did not start are not run, without cancel_futures of Python 3.9
+                    future.cancel()
+                pool.shutdown(wait=True)
+        else:
+            for i, arg in enumerate(args):
+                report(i, run_job(*arg), estimate(i))
+    finally:
+        memory_model.save()
+        for i, job in enumerate(jobs):
+            if results[i] is None:
+                results[i] = _job_result(job, "not run")
+        with open(os.path.join(out_dir, "summary.json"), "w") as f:
+            json.dump(results, f, indent=1)
+    return results
@@ -0,0 +1,229 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+import os
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+
+
+def make_key(columns, variables, configSettings, constantsToOverwrite, parameters, model="", engine=""):
+    """
+    Fingerprint of the input data, the configuration and the model files of a simulation run.
+
+    Parameters
+    ----------
+    columns : :obj:`list` [ :class:`numpy.ndarray` ]
+        Input variables as passed to the model.
+    variables : :obj:`list` [ :obj:`str` ]
+        Names of the input variables.
+    configSettings : :obj:`dict`
+        Configuration settings of the run, including the system, dataset, addons and switches.
+    constantsToOverwrite : :obj:`dict` or None
+        Constants overwritten in the run.
+    parameters : :obj:`dict`
+        Current values of the metadata of the system that differ from the files of the model, e.g. changed parameters and policy switches.
+    model : :obj:`str`, optional
+        Fingerprint of the files of the EUROMOD project, see :func:`~snapshot.model_fingerprint`, so that
+        the results stored on disk are not reused after the model is updated. Default is "".
+    engine : :obj:`str`, optional
+        Identity of the engine running the model, see :attr:`~engines.Engine.cache_id`. Default is "".
+
+    Returns
+    -------
+    :obj:`str`
+        Hexadecimal digest identifying the run.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for column in columns:
+        column = np.ascontiguousarray(column)
+        digest.update(f"{column.dtype.str}{column.shape}".encode())
+        digest.update(memoryview(column).cast("B"))
+    digest.update(repr(list(variables)).encode())
+    digest.update(repr(sorted(configSettings.items())).encode())
+    digest.update(repr(sorted((constantsToOverwrite or {}).items())).encode())
+    digest.update(repr(sorted(parameters.items())).encode())
+    digest.update(model.encode())
+    digest.update(engine.encode())
+    return digest.hexdigest()
+
+
+class CachedResult:
+    """Outputs and messages of a simulation run stored in a :class:`ResultCache`."""
+    def __init__(self, outputs, errors):
+        self.outputs: dict = outputs
+        """: A :obj:`dict` with a tuple of the output array and the list of output variables, by output file-name."""
+        self.errors: list = errors
+        """: A :obj:`list` of tuples with the message and a boolean that is True for warnings."""
+    @property
+    def nbytes(self):
+        """:obj:`int`: Size of the output arrays in bytes."""
+        return sum(arr.nbytes for arr,columns in self.outputs.values())
+
+
+class ResultCache:
+    """Cache of simulation results for :func:`~System.run`.
+
+    Results are stored in memory with a least-recently-used eviction policy under a byte budget.
+    When a path is provided, results are also stored on disk as ``.npz`` files, so that
+    they can be reused by other processes and sessions.
+    The cache is keyed by a hash of the input data, of the configuration of the run and of the XMLParam files of the model,
+    so that results are not reused after the model is updated.
+
+    Parameters
+    ----------
+    max_bytes : :obj:`int`, optional
+        Maximum size of the results kept in memory. Default is 1 GiB.
+    path : :obj:`str`, optional
+        Folder for the on-disk cache. Default is :obj:`None`, i.e. in-memory only.
+
+    Example
+    --------
+    >>> from euromod import Model, ResultCache
+    >>> mod=Model("C:\\EUROMOD_RELEASES_I6.0+")
+    >>> cache = ResultCache(max_bytes=2**30, path="C:\\temp\\euromod_cache")
+    >>> out=mod.countries['SL'].systems['SL_1996'].run(data,'sl_demo_v4',cache=cache)
+    """
+    _instances = weakref.WeakSet() #: live caches, of which the memory is cleared by :func:`euromod.release_memory`
+    def __init__(self, max_bytes: int = 2**30, path: str = None):
+        self.max_bytes: int = max_bytes
+        """: Maximum size of the results kept in memory."""
+        self.path: str = path
+        """: Folder for the on-disk cache."""
+        self.hits: int = 0
+        """: Number of runs served from the cache."""
+        self.misses: int = 0
+        """: Number of runs not found in the cache."""
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        ResultCache._instances.add(self)
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    @property
+    def nbytes(self):
+        """:obj:`int`: Size of the results kept in memory."""
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".npz")
+
+    def get(self, key):
+        """
+        Get a result from the cache.
+
+        Parameters
+        ----------
+        key : :obj:`str`
+            Key of the run, see :func:`make_key`.
+
+        Returns
+        -------
+        CachedResult or None
+            The cached result, or :obj:`None` if the run is not in the cache.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        if self.path is not None and os.path.exists(self._file(key)):
+            entry = _load_npz(self._file(key))
+            self._put_memory(key, entry)
+            with self._lock:
+                self.hits += 1
+            return entry
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, entry):
+        """
+        Store a result in the cache.
+
+        Parameters
+        ----------
+        key : :obj:`str`
+            Key of the run, see :func:`make_key`.
+        entry : :class:`CachedResult`
+            Result of the run.
+        """
+        self._put_memory(key, entry)
+        if self.path is not None and not os.path.exists(self._file(key)):
+            _save_npz(self._file(key), entry)
+
+    def _put_memory(self, key, entry):
+        if entry.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key).nbytes
+            self._entries[key] = entry
+            self._nbytes += entry.nbytes
+            while self._nbytes > self.max_bytes: # evict the least recently used results
+                old_key, old = self._entries.popitem(last=False)
+                self._nbytes -= old.nbytes
+
+    def clear(self, disk: bool = False):
+        """
+        Remove the results from the cache.
+
+        Parameters
+        ----------
+        disk : :obj:`bool`, optional
+            If True, the on-disk results are removed as well. Default is :obj:`False`.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+        if disk and self.path is not None:
+            for fname in os.listdir(self.path):
+                if fname.endswith(".npz"):
+                    os.remove(os.path.join(self.path, fname))
+
+    def __repr__(self):
+        return f"ResultCache with {len(self)} results ({self._nbytes} bytes in memory), {self.hits} hits and {self.misses} misses"
+
+
+def _save_npz(fname, entry):
+    arrays = {}
+    names = list(entry.outputs.keys())
+    for i,name in enumerate(names):
+        arr, columns = entry.outputs[name]
+        arrays[f"data_{i}"] = arr
+        arrays[f"columns_{i}"] = np.array(columns, dtype=str)
+    arrays["names"] = np.array(names, dtype=str)
+    arrays["messages"] = np.array([message for message,isWarning in entry.errors], dtype=str)
+    arrays["warnings"] = np.array([isWarning for message,isWarning in entry.errors], dtype=bool)
+    tmp = fname + ".tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, fname)
+
+
+def _load_npz(fname):
+    with np.load(fname, allow_pickle=False) as npz:
+        outputs = {}
+        for i,name in enumerate(npz["names"]):
+            outputs[str(name)] = (npz[f"data_{i}"], [str(x) for x in npz[f"columns_{i}"]])
+        errors = [(str(message), bool(isWarning)) for message,isWarning in zip(npz["messages"], npz["warnings"])]
+    return CachedResult(outputs, errors)
@@ -0,0 +1,207 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+import os
+import numpy as np
+import pandas as pd
+from tracing import Tracer, span, set_tracer
+from runtime import release_memory_above, worker_model
+
+ID_HOUSEHOLD = "idhh"
+
+
+def household_starts(idhh):
+    """
+    Get the first row of every household.
+
+    Parameters
+    ----------
+    idhh : :class:`numpy.ndarray`
+        Household identifier of every row. The rows of a household must be contiguous.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        Position of the first row of every household.
+    """
+    idhh = np.asarray(idhh)
+    if len(idhh) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, idhh[1:] != idhh[:-1]])
+
+
+def check_contiguous(idhh):
+    """
+    Check that the rows of every household are contiguous.
+
+    Raises
+    ------
+    ValueError
+        Is raised if the rows of a household are spread over the data.
+    """
+    codes, uniques = pd.factorize(np.asarray(idhh))
+    if len(codes) > 0 and (np.diff(codes) < 0).any(): # codes are in order of first appearance
+        raise ValueError("The rows of every household must be contiguous. Sort the data by household identifier.")
+
+
+def household_chunks(frames, chunk_households, id_column=ID_HOUSEHOLD):
+    """
+    Split data in chunks of complete households.
+
+    Parameters
+    ----------
+    frames : iterable of :class:`pandas.DataFrame`
+        Data to split, e.g. the chunks read from a file. A household may continue from one frame into the next.
+    chunk_households : :obj:`int`
+        Number of households in every chunk. The last chunk can contain fewer households.
+    id_column : :obj:`str`, optional
+        Name of the household identifier variable. Default is "idhh".
+
+    Yields
+    ------
+    :class:`pandas.DataFrame`
+        Chunks of the data that never split a household.
+    """
+    if chunk_households < 1:
+        raise ValueError("Parameter 'chunk_households' must be a positive integer.")
+    pending = None
+    for frame in frames:
+        if id_column not in frame.columns:
+            raise KeyError(f"Household identifier variable {id_column} not found in the data.")
+        if pending is not None and len(pending) > 0:
+            attrs = dict(frame.attrs)
+            frame = pd.concat([pending, frame], ignore_index=True)
+            frame.attrs.update(attrs)
+        starts = household_starts(frame[id_column].to_numpy())
+        pos = 0
+        while len(starts) - 1 - pos >= chunk_households: # the last household can continue in the next frame
+            yield frame.iloc[starts[pos]:starts[pos + chunk_households]]
+            pos += chunk_households
+        pending = frame.iloc[starts[pos]:] if len(starts) > 0 else None
+    if pending is not None and len(pending) > 0:
+        yield pending
+
+
+def read_frames(path, read_rows, attrs=None):
+    """
+    Read a EUROMOD input file in frames of rows.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Path to the tab-separated input file.
+    read_rows : :obj:`int`
+        Number of rows read at a time.
+    attrs : :obj:`dict`, optional
+        Attributes set on every frame. Default is :obj:`None`.
+
+    Yields
+    ------
+    :class:`pandas.DataFrame`
+        The frames of the file.
+    """
+    for frame in pd.read_csv(path, sep="\t", chunksize=read_rows):
+        frame.attrs.update(attrs or {})
+        yield frame
+
+
+def partition_households(idhh, n_parts):
+    """
+    Partition data in contiguous parts with about the same number of persons.
+
+    The parts never split a household, and are balanced by number of rows, i.e. persons,
+    instead of number of households.
+
+    Parameters
+    ----------
+    idhh : :class:`numpy.ndarray`
+        Household identifier of every row. The rows of a household must be contiguous.
+    n_parts : :obj:`int`
+        Number of parts. Fewer parts are returned when there are fewer households.
+
+    Returns
+    -------
+    :obj:`list` [ :obj:`tuple` [ :obj:`int`, :obj:`int` ]]
+        First and last-plus-one row of every part, in the order of the data.
+    """
+    n = len(idhh)
+    starts = household_starts(idhh)
+    if n == 0:
+        return []
+    targets = np.arange(1, n_parts) * n / n_parts
+    pos = np.clip(np.searchsorted(starts, targets), 1, len(starts) - 1) if len(starts) > 1 else np.zeros(0, dtype=np.int64)
+    # choose the household start nearest to the target
+    nearer_previous = (targets[:len(pos)] - starts[pos - 1]) < (starts[pos] - targets[:len(pos)])
+    cuts = np.where(nearer_previous, starts[pos - 1], starts[pos])
+    bounds = np.unique(np.r_[0, cuts, n])
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def run_chunk(model_path, country, system, edits, chunk, dataset_id, kwargs, index=0, trace=False, memory_limit=None):
+    """
+    Run the simulation of a chunk in a worker process.
+
+    The model is loaded once per worker process and kept for the next chunks.
+
+    Parameters
+    ----------
+    model_path : :obj:`str`
+        Path to the EUROMOD project.
+    country : :obj:`str`
+        Name of the country.
+    system : :obj:`str`
+        Name of the system.
+    edits : :obj:`dict`
+        Metadata of the country changed in the calling process, e.g. parameter values and policy switches, 
+        by type of information, identifier and key. They are undone after the run.
+    chunk : :class:`pandas.DataFrame`
+        Input data of the chunk.
+    dataset_id : :obj:`str`
+        ID of the dataset.
+    kwargs : :obj:`dict`
+        Other arguments of :func:`~System.run`.
+    index : :obj:`int`, optional
+        Index of the chunk. Default is 0.
+    trace : :obj:`bool`, optional
+        If True, the spans of the chunk are recorded and returned. Default is :obj:`False`.
+    memory_limit : :obj:`int`, optional
+        Working set of the worker process, in bytes, above which :func:`~euromod.release_memory` is called after the chunk.
+        Default is :obj:`None`.
+
+    Returns
+    -------
+    :obj:`tuple`
+        The outputs of the chunk by output file-name, a list of tuples with the messages and a boolean that is True for warnings,
+        and the list of trace events of the chunk.
+    """
+    tracer = Tracer(f"euromod worker {os.getpid()}") if trace else None
+    previous = set_tracer(tracer)
+    try:
+        with span("chunk", "job", chunk=index, rows=len(chunk)):
+            sys = worker_model(model_path)[country][system]
+            undo = sys._set_edits(edits)
+            try:
+                sim = sys.run(chunk, dataset_id, verbose=False, **kwargs)
+            finally:
+                sys._set_edits(undo)
+            with span("serialize", "job", chunk=index):
+                outputs = dict(sim.outputs.items())
+    finally:
+        set_tracer(previous)
+    errors = [(message, message in sim._warnings) for message in sim.errors]
+    del sim
+    release_memory_above(memory_limit)
+    return outputs, errors, tracer.events if tracer is not None else []
@@ -22,6 +22,7 @@ class Container:
     - via keys that are the name of the objects or,
     - via integer indexing as in a list.
     """
+    _repr_max_rows = 60 #: maximum number of elements shown in the representation of the container
     def __init__(self,idDict=False):
         self.containerDict = {}
         self.containerList = []
@@ -57,26 +58,32 @@ class Container:
         else:
             return self.dictIds[id]
     def __repr__(self):
+        n = len(self.containerList)
+        if n > self._repr_max_rows: # show the head and the tail of large containers
+            n_head = self._repr_max_rows // 2
+            shown = list(range(n_head)) + list(range(n - (self._repr_max_rows - n_head), n))
+        else:
+            shown = list(range(n))
+        ### compute the representation of every element only once
+        rows = []
+        for i in shown:
+            el = self.containerList[i]
+            rows.append((i, el._container_begin_repr(), el._container_middle_repr(), el._container_end_repr()))
+        maxlen_begin = max([len(begin) + len(str(i)) for i,begin,middle,end in rows], default=0)
+        maxlen_middle = max([len(middle) + len(str(i)) for i,begin,middle,end in rows], default=0)
+        end_is_empty = all(len(end) == 0 for i,begin,middle,end in rows)
         s= ""
-        maxlen_begin = 0
-        maxlen_middle = 0
-        end_is_empty = True
-        for i,el in enumerate(self.containerList):
-            maxlen_begin = maxlen_begin if len(el._container_begin_repr()) + len(str(i)) < maxlen_begin else len(el._container_begin_repr()) + len(str(i))
-            repr_middle = el._container_middle_repr()
-            maxlen_middle = maxlen_middle if len(repr_middle) + len(str(i)) < maxlen_middle else len(repr_middle) + len(str(i))
-            if len(el._container_end_repr()) > 0:
-                end_is_empty = False
-        for i,el in enumerate(self.containerList):
-            name_repr = el._container_begin_repr() + " "*(maxlen_begin - len(el._container_begin_repr()) -len(str(i)))
-            repr_middle = el._container_middle_repr() 
-            repr_middle_adj = repr_middle + " "*(maxlen_middle - len(repr_middle)) #pretty pritting adjustment middle text
-            if maxlen_middle > 0 + len(str(len(self.containerList))):
+        for k,(i,begin,middle,end) in enumerate(rows):
+            if k > 0 and i != rows[k-1][0] + 1:
+                s += f"... ({i - rows[k-1][0] - 1} more elements, use slicing to display them, e.g. [{rows[k-1][0] + 1}:{i}])\n"
+            name_repr = begin + " "*(maxlen_begin - len(begin) -len(str(i)))
+            repr_middle_adj = middle + " "*(maxlen_middle - len(middle)) #pretty pritting adjustment middle text
+            if maxlen_middle > 0 + len(str(n)):
                 s += f"{i}: {name_repr}     | {repr_middle_adj} "
             else:
                 s += f"{i}: {name_repr}" 
             if not end_is_empty:
-                s += f"    |    {el._container_end_repr()} \n"
+                s += f"    |    {end} \n"
             else:
                 s += "\n"
         return s
@@ -16,25 +16,52 @@ See the Licence for the specific language governing permissions and limitations
 
 
 import os
+import time
 import pandas as pd
 import numpy as np
 from utils._paths import CWD_PATH, DLL_PATH
-from base import SystemElement, Euromod_Element, SpineElement
+from base import SystemElement, Euromod_Element, SpineElement, info_to_dict, get_cleaned_key
 import clr as clr
 import System as SystemCs
-from utils.clr_array_convert import asNetArray,asNumpyArray
+from utils.clr_array_convert import asNumpyArray,asNumpyArrays,asNetArrayFromColumns,BufferPool
+from utils.frames import get_columns, get_column_names, make_output, output_array, OUTPUT_FORMATS
+from validation import validate_columns, InputValidationError, ID_VARIABLES
+from profiling import RunTimer
+from instrumentation import InstrumentedHandler
+from tracing import span, get_tracer
+from runtime import release_memory_above
 from utils.utils import is_iterable
 clr.AddReference(os.path.join(DLL_PATH, "EM_Executable.dll" ))
 from EM_Executable import Control
 clr.AddReference(os.path.join(DLL_PATH, "EM_XmlHandler.dll" ))
-from EM_XmlHandler import CountryInfoHandler,TAGS, ReadCountryOptions,ModelInfoHandler, ReadModelOptions
+from EM_XmlHandler import CountryInfoHandler,TAGS, ReadCountryOptions,ModelInfoHandler, ReadModelOptions, XmlHelpers
 clr.AddReference(os.path.join(DLL_PATH, "EM_Common.dll" ))
 from EM_Common import EMPath
 clr.AddReference(os.path.join(DLL_PATH, "EM_Transformer.dll" ))
 from EM_Transformer import EM3Global
 from container import Container
+from cache import ResultCache, CachedResult, make_key
+from chunking import household_chunks, check_contiguous, read_frames, household_starts, partition_households, run_chunk
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import deque
+from sinks import get_sink, Sink, _import_pyarrow
+from shared import SharedDataset
+from engines import Engine, InProcessEngine, get_engine
+from snapshot import open_snapshot, write_snapshot, model_fingerprint, COUNTRY_TYPES, MODEL_COUNTRY
 from typing import Dict, Tuple, Optional, List
 
+### keys composing the identifier of the information that is linked to a system or an extension
+_LINK_ID_KEYS = {
+    "SYS_POL": (TAGS.SYS_ID, TAGS.POL_ID),
+    "SYS_FUN": (TAGS.SYS_ID, TAGS.FUN_ID),
+    "SYS_PAR": (TAGS.SYS_ID, TAGS.PAR_ID),
+    "SYS_DATA": (TAGS.SYS_ID, TAGS.DATA_ID),
+    "EXTENSION_POL": (TAGS.POL_ID, TAGS.EXTENSION_ID),
+    "EXTENSION_FUN": (TAGS.FUN_ID, TAGS.EXTENSION_ID),
+    "EXTENSION_PAR": (TAGS.PAR_ID, TAGS.EXTENSION_ID),
+    "EXTENSION_SWITCH": (TAGS.EXTENSION_ID, TAGS.DATA_ID, TAGS.SYS_ID),
+    }
+
 
 
 class Model(Euromod_Element):
@@ -110,7 +137,81 @@ class Model(Euromod_Element):
 
     def __getitem__(self, country):
         return self.countries[country]
-    
+
+    def save_snapshot(self, path: str, countries: Optional[List[str]] = None):
+        """
+        Save the metadata of the model to a snapshot file.
+        
+        The snapshot contains the systems, datasets, extensions, spine and parameter values 
+        of the countries. It is stored as a SQLite database with one table per type of information.
+        Use :func:`~Model.from_snapshot` to browse the snapshot without loading the countries.
+
+        Parameters
+        ----------
+        path : :obj:`str`
+            Path of the snapshot file. An existing file is replaced.
+        countries : :obj:`list` [ :obj:`str` ], optional
+            Names of the countries to include. Default is all countries of the model.
+            
+        Example
+        --------
+        >>> from euromod import Model
+        >>> mod=Model("C:\\EUROMOD_RELEASES_I6.0+")
+        >>> mod.save_snapshot("C:\\temp\\euromod.snapshot")
+        """
+        if countries is None:
+            countries = list(self.countries.keys())
+        def rows():
+            for el in self._modelInfoHandler.GetModelInfo(ReadModelOptions.EXTENSIONS):
+                info = info_to_dict(el.Value)
+                yield MODEL_COUNTRY, "EXTENSIONS", info["ID"], info
+            for country in countries:
+                ctry = self.countries[country]
+                ctry._load()
+                for typ in COUNTRY_TYPES:
+                    for info in ctry._get_all_info(getattr(ReadCountryOptions, typ)):
+                        yield country, typ, _get_link_id(typ, info), info
+        write_snapshot(path, self.model_path, rows())
+
+    @staticmethod
+    def from_snapshot(path: str, rebuild: bool = True):
+        """
+        Open a snapshot of the model metadata for read-only browsing.
+        
+        Parameters
+        ----------
+        path : :obj:`str`
+            Path of the snapshot file written by :func:`~Model.save_snapshot`.
+        rebuild : :obj:`bool`, optional
+            If True, a snapshot of which the XMLParam files of the EUROMOD project changed 
+            is rebuilt from the project before it is opened. If False, an exception is raised instead. Default is :obj:`True`.
+
+        Raises
+        ------
+        Exception
+            Exception when the snapshot is out of date and `rebuild` is False.
+
+        Returns
+        -------
+        ModelSnapshot
+            A read-only representation of the model with the same countries, systems, policies, 
+            functions and parameters as the :class:`Model`.
+            
+        Example
+        --------
+        >>> from euromod import Model
+        >>> snap=Model.from_snapshot("C:\\temp\\euromod.snapshot")
+        >>> snap["SL"]["SL_1996"].diff(snap["SL"]["SL_2023"])
+        """
+        return open_snapshot(path, rebuild)
+
+### states of an extension switch, by code in the switch matrix
+SWITCH_STATES = ["n/a", "on", "off"]
+
+def _get_link_id(typ, info):
+    if typ not in _LINK_ID_KEYS:
+        return info["ID"]
+    return "".join(info.get(get_cleaned_key(key), "") for key in _LINK_ID_KEYS[typ])
                 
 
 
@@ -163,15 +264,26 @@ class Country(Euromod_Element):
         """: A :obj:`Container` with :class:`Extension` objects. These are the local extensions defined for the country."""
         self.extensions: Container[Extension] | None = None #: Container with `core.Extension` objects
         """: A :obj:`Container` with :class:`Extension` objects. These are the local + model extensions defined."""
+        self._switch_matrix: tuple | None = None #cached (states, extensions, datasets, systems) of the extension switches
+        self._original_info: dict = {} #information and value in the files of the changed metadata, by (type, identifier, key)
 
         
     def _load(self):
         if not self._hasCIH:
-            if not Control.TranslateToEM3(self.model.model_path, self.name, SystemCs.Collections.Generic.List[str]()):
-                raise Exception("Country XML EM3 Translation failed. Probably provided a non-euromod project as an input-path.")
-            self._countryInfoHandler = CountryInfoHandler(self.model.model_path, self.name)
+            with span("country load", "country", country=self.name):
+                with span("translation", "country", country=self.name):
+                    if not Control.TranslateToEM3(self.model.model_path, self.name, SystemCs.Collections.Generic.List[str]()):
+                        raise Exception("Country XML EM3 Translation failed. Probably provided a non-euromod project as an input-path.")
+                self._countryInfoHandler = InstrumentedHandler(CountryInfoHandler(self.model.model_path, self.name)) #counts the metadata requests
             self._hasCIH = True;
     
+    def _record_edit(self, typ, id, key, info):
+        ### keep the value in the files of a piece of information before it is changed
+        if typ == str(ReadCountryOptions.EXTENSION_SWITCH):
+            self._switch_matrix = None #read again with the new state of the switch
+        if (typ, id, key) not in self._original_info:
+            self._original_info[(typ, id, key)] = (info, info[key])
+    
     def __getattribute__(self,name):
         if name == "systems" and self.__dict__["systems"] is None:
             self._load()
@@ -196,6 +308,43 @@ class Country(Euromod_Element):
         return super().__getattribute__(name)
     
         
+    def metadata_stats(self, reset: bool = False):
+        """Get the number of calls and the cumulative time of the metadata requests of the country.
+
+        The metadata of the country model, e.g. policies, functions, parameters and extension switches, 
+        is requested to the EUROMOD country handler when it is first accessed. The requests are counted by 
+        method and type of information, which shows the costly ones. Use :func:`measure_metadata` to count the 
+        requests within a scope.
+
+        Parameters
+        ----------
+        reset : :obj:`bool`, optional
+            If True, the statistics are set to zero after they are returned. Default is :obj:`False`.
+
+        Returns
+        -------
+        :obj:`dict` [ :obj:`tuple` [ :obj:`str`, :obj:`str` ], :obj:`dict` ]
+            A :obj:`dict` with the number of calls ("calls") and the cumulative time in seconds ("seconds"),
+            by tuple of method and type of information, e.g. ``("GetPieceOfInfo", "SYS_PAR")``.
+
+        Example
+        --------
+        >>> mod['SL']['SL_1996'].policies[0].functions[0].parameters
+        >>> mod['SL'].metadata_stats()
+        """
+        if not self._hasCIH:
+            return {}
+        stats = self._countryInfoHandler.stats.to_dict()
+        if reset:
+            self._countryInfoHandler.stats.reset()
+        return stats
+
+    def _get_all_info(self, option):
+        ### all pieces of information of a type, without filtering on keys
+        keys = SystemCs.Collections.Generic.List[SystemCs.String]()
+        patterns = SystemCs.Collections.Generic.List[SystemCs.String]()
+        return [info_to_dict(el) for el in self._countryInfoHandler.GetPiecesOfInfo(option,keys,patterns)]
+        
     def _load_local_extensions(self):
         self.local_extensions = Container(True)
         for el in self._countryInfoHandler.GetTypeInfo(ReadCountryOptions.LOCAL_EXTENSION):
@@ -322,6 +471,84 @@ class Country(Euromod_Element):
             extension_switches.add(i, ExtensionSwitch(ext_switch,self))
         return extension_switches
     
+    def _load_switch_matrix(self):
+        extensions = pd.Index([x.shortName for x in self.extensions])
+        datasets = pd.Index([x.name for x in self.datasets])
+        systems = pd.Index([x.name for x in self.systems])
+        ext_pos = {x.ID:i for i,x in enumerate(self.extensions)}
+        data_pos = {x.ID:i for i,x in enumerate(self.datasets)}
+        sys_pos = {x.ID:i for i,x in enumerate(self.systems)}
+        states = np.zeros((len(extensions),len(datasets),len(systems)),dtype=np.int8)
+        ext_key = get_cleaned_key(TAGS.EXTENSION_ID)
+        data_key = get_cleaned_key(TAGS.DATA_ID)
+        sys_key = get_cleaned_key(TAGS.SYS_ID)
+        for info in self._get_all_info(ReadCountryOptions.EXTENSION_SWITCH): #one pass over all the switches
+            state = SWITCH_STATES.index(info["value"]) if info.get("value") in SWITCH_STATES else 0
+            states[ext_pos[info[ext_key]],data_pos[info[data_key]],sys_pos[info[sys_key]]] = state
+        self._switch_matrix = (states,extensions,datasets,systems)
+    
+    def switch_matrix(self):
+        """
+        Get the configuration of all extension switches of the country.
+        
+        The configuration is read at once for all extensions, datasets and systems 
+        and is cached in the country until a switch is changed.
+
+        Returns
+        -------
+        :class:`pandas.DataFrame`
+            The state of the switches, 'on', 'off' or 'n/a', with a row per extension and dataset
+            and a column per system.
+            
+        Example
+        --------
+        >>> from euromod import Model
+        >>> mod=Model("C:\\EUROMOD_RELEASES_I6.0+")
+        >>> mod.countries['SL'].switch_matrix().loc['BTA']
+        """
+        self._load()
+        if self._switch_matrix is None:
+            self._load_switch_matrix()
+        states,extensions,datasets,systems = self._switch_matrix
+        index = pd.MultiIndex.from_product([extensions,datasets],names=["extension","dataset"])
+        values = np.array(SWITCH_STATES)[states.reshape(len(extensions)*len(datasets),len(systems))]
+        return pd.DataFrame(values,index=index,columns=pd.Index(systems,name="system"))
+    
+    def get_switch_states(self, ext_names, dataset_names, sys_names):
+        """
+        Get the state of the extension switches for a batch of configurations.
+
+        Parameters
+        ----------
+        ext_names : array-like of :obj:`str`
+            Short names of the extensions.
+        dataset_names : array-like of :obj:`str`
+            Names of the datasets.
+        sys_names : array-like of :obj:`str`
+            Names of the systems.
+
+        Raises
+        ------
+        KeyError
+            Is raised if an extension, dataset or system is not configured in the model.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The state of the switch, 'on', 'off' or 'n/a', for each combination of extension, dataset and system at the same position.
+        """
+        self._load()
+        if self._switch_matrix is None:
+            self._load_switch_matrix()
+        states,extensions,datasets,systems = self._switch_matrix
+        positions = []
+        for labels,names,kind in [(extensions,ext_names,"extension"),(datasets,dataset_names,"dataset"),(systems,sys_names,"system")]:
+            pos = labels.get_indexer(np.asarray(names,dtype=object))
+            if (pos < 0).any():
+                raise KeyError(f"{np.asarray(names)[pos < 0][0]} is not a configured {kind} in this model.")
+            positions.append(pos)
+        return np.array(SWITCH_STATES)[states[positions[0],positions[1],positions[2]]]
+    
     
 class ExtensionSwitch(Euromod_Element):
     """A class containing the extension switches of an object.
@@ -356,6 +583,10 @@ class ExtensionSwitch(Euromod_Element):
         return  ""
     def _short_repr(self):
         return f"{self.extension_name}, {self.data_name}, {self.sys_name}"
+    def _record_edit(self, key):
+        if "parent" in self.__dict__:
+            id = self._info[TAGS.EXTENSION_ID] + self._info[TAGS.DATA_ID] + self._info[TAGS.SYS_ID]
+            self.parent._record_edit(str(ReadCountryOptions.EXTENSION_SWITCH), id, key, self._info)
               
         
 
@@ -416,6 +647,7 @@ class System(Euromod_Element):
         """: A :obj:`Container` of :class:`PolicyInSystem` objects in the system."""
         self.bestmatch_datasets: Container[Dataset] | None = None
         """: A :obj:`Container` with best-match :class:`Dataset` objects in the system."""
+        self._snapshots: list = [] #active ParameterSnapshot objects recording the parameter edits
     def __getattribute__(self,name):
         if name == 'policies' and self.__dict__["policies"] is None:
             self._load_policies()
@@ -447,14 +679,137 @@ class System(Euromod_Element):
             id = self.ID + pol.ID
             syspol = self.parent._countryInfoHandler.GetPieceOfInfo(ReadCountryOptions.SYS_POL,id)
             self.policies.add(id,PolicyInSystem(syspol, id, self, pol))
-    def _get_dataArray(self, df):
-        ### check data format
-        if type(df) != pd.core.frame.DataFrame:
-            raise TypeError("Parameter 'data' must be a pandas.core.frame.DataFrame.")
-        ### converting the numpy array to a DotNet/csharp array        
-        dataArr=asNetArray(df.to_numpy(np.float64).T)
-        return dataArr
+    def _parameter_paths(self):
+        ### identifiers of the parameters of the country by "policy/function/parameter" path
+        paths = {}
+        for pol in self.parent.policies:
+            if not isinstance(pol, Policy): # reference policies have no functions
+                continue
+            for fun in pol.functions:
+                for par in fun.parameters:
+                    paths.setdefault(f"{pol.name}/{fun.name}/{par.name}", []).append(par.ID)
+        return paths
+    
+    def _get_parameter_id(self, key, paths):
+        ### identifier of the parameter in the system from a parameter identifier or a "policy/function/parameter" path
+        ### paths is filled with the parameters of the country by path when a path is looked up first
+        handler = self.parent._countryInfoHandler
+        for id in (self.ID + key, key):
+            if id.startswith(self.ID) and len(handler.GetPieceOfInfo(ReadCountryOptions.SYS_PAR,id)) > 0: # not a parameter of another system
+                return id
+        if len(key.split("/")) != 3:
+            raise KeyError(f"{key} is neither a parameter identifier of system {self.name} nor a path of the form 'policy/function/parameter'.")
+        if len(paths) == 0:
+            paths.update(self._parameter_paths())
+        matches = paths.get(key, [])
+        if len(matches) == 0:
+            raise KeyError(f"Parameter {key} not found in system {self.name}.")
+        if len(matches) > 1:
+            raise KeyError(f"Path {key} matches {len(matches)} parameters. Use the parameter identifier instead.")
+        return self.ID + matches[0]
+    
+    def _record_parameter(self, id, info):
+        ### store the original value in the active snapshots before the parameter is changed
+        self.parent._record_edit(str(ReadCountryOptions.SYS_PAR), id, "Value", info)
+        for snap in self._snapshots:
+            if id not in snap.values:
+                snap.values[id] = info["Value"]
+    
+    def _refresh_loaded_parameters(self, ids):
+        ### update the value of the ParameterInSystem objects that are already loaded
+        if self.__dict__["policies"] is None:
+            return
+        for pol in self.__dict__["policies"]:
+            if pol.__dict__["functions"] is None:
+                continue
+            for fun in pol.__dict__["functions"]:
+                if fun.__dict__["parameters"] is None:
+                    continue
+                for par in fun.__dict__["parameters"]:
+                    if par.ID in ids:
+                        object.__setattr__(par, "value", XmlHelpers.RemoveCData(par._info["Value"]))
+    
+    def set_parameters(self, values: Dict[str, str]):
+        """
+        Set the values of several parameters of the system at once.
         
+        The changes are recorded by the active snapshots of the system, see :func:`~System.snapshot`.
+
+        Parameters
+        ----------
+        values : :obj:`dict` [ :obj:`str`, :obj:`str` ]
+            A :obj:`dict` with the new parameter values. The key is either the identifier of the parameter
+            or a path of the form "policy/function/parameter" with the names of the policy, function and parameter.
+
+        Raises
+        ------
+        KeyError
+            Is raised if a parameter is not found in the system or if a path matches more than one parameter. 
+            In that case none of the parameters is changed.
+            
+        Example
+        --------
+        >>> from euromod import Model
+        >>> mod=Model("C:\\EUROMOD_RELEASES_I6.0+")
+        >>> sys=mod.countries['SL'].systems['SL_1996']
+        >>> sys.set_parameters({"bch_sl/BenCalc/Comp_perElig":"200#m"})
+        """
+        handler = self.parent._countryInfoHandler
+        paths = {} #the parameters of the country by path, read once for all the keys
+        edits = [(self._get_parameter_id(key,paths),str(value)) for key,value in values.items()] #resolve all keys before changing anything
+        for id,value in edits:
+            info = handler.GetPieceOfInfo(ReadCountryOptions.SYS_PAR,id)
+            self._record_parameter(id, info)
+            info["Value"] = XmlHelpers.CDATA(value)
+        self._refresh_loaded_parameters({id for id,value in edits})
+    
+    def snapshot(self):
+        """
+        Start recording the parameter changes of the system.
+        
+        Only the parameters that are changed after the snapshot is taken are recorded,
+        either with :func:`~System.set_parameters` or by setting the value of a :class:`ParameterInSystem`.
+
+        Returns
+        -------
+        ParameterSnapshot
+            The snapshot to pass to :func:`~System.restore`.
+            
+        Example
+        --------
+        >>> snap = sys.snapshot()
+        >>> sys.set_parameters({"bch_sl/BenCalc/Comp_perElig":"200#m"})
+        >>> out = sys.run(data,'sl_demo_v4')
+        >>> sys.restore(snap)
+        """
+        snap = ParameterSnapshot(self)
+        self._snapshots.append(snap)
+        return snap
+    
+    def restore(self, snap, keep: bool = True):
+        """
+        Restore the parameters changed since a snapshot was taken.
+
+        Parameters
+        ----------
+        snap : :class:`ParameterSnapshot`
+            Snapshot returned by :func:`~System.snapshot`.
+        keep : :obj:`bool`, optional
+            If True, the snapshot keeps recording the changes so that it can be restored again. Default is :obj:`True`.
+        """
+        if snap.system is not self or snap not in self._snapshots:
+            raise ValueError("The snapshot is not active for this system.")
+        handler = self.parent._countryInfoHandler
+        self._snapshots.remove(snap)
+        for id,value in snap.values.items():
+            info = handler.GetPieceOfInfo(ReadCountryOptions.SYS_PAR,id)
+            self._record_parameter(id, info)
+            info["Value"] = value
+        self._refresh_loaded_parameters(set(snap.values.keys()))
+        snap.values = {}
+        if keep:
+            self._snapshots.append(snap)
+    
     def _convert_configsettings(self, configSettings):
         ### check configSettings format
         if type(configSettings) != dict:
@@ -465,10 +820,10 @@ class System(Euromod_Element):
             configSettingsDict[SystemCs.String(key) ] = SystemCs.String(value)
         return configSettingsDict
     
-    def _get_variables(self, df):
+    def _get_variables(self, names):
         #### Initialise Csharp object    
         variables = SystemCs.Collections.Generic.List[SystemCs.String]()
-        for col in df.columns:
+        for col in names:
             variables.Add(col)
         return variables
     
@@ -497,6 +852,41 @@ class System(Euromod_Element):
     
 
                 
+    def _get_run_config(self, attrs, dataset_id, outputpath, addons, switches, euro, public_components_only):
+        configSettings = self._get_config_settings(dataset_id)
+        if len(dataset_id) == 0:
+            if TAGS.CONFIG_ID_DATA in attrs.keys():
+                configSettings[TAGS.CONFIG_ID_DATA] = attrs[TAGS.CONFIG_ID_DATA] 
+            else:
+                configSettings[TAGS.CONFIG_ID_DATA] = dataset_id
+        else:
+            configSettings[TAGS.CONFIG_ID_DATA] = dataset_id
+        if TAGS.CONFIG_PATH_DATA in attrs.keys():
+            configSettings[TAGS.CONFIG_PATH_DATA] = attrs[TAGS.CONFIG_PATH_DATA]
+        else:
+            configSettings[TAGS.CONFIG_PATH_DATA] = os.path.join(configSettings[TAGS.CONFIG_PATH_EUROMODFILES], "Input")
+            
+        configSettings[TAGS.CONFIG_PATH_OUTPUT] = os.path.join(outputpath)
+        
+        if len(addons) > 0:
+            for i,addon in enumerate(addons):
+                if not is_iterable(addon):
+                    raise(TypeError(str(type(addon)) + " is incorrect type for defining addon"))
+                configSettings[TAGS.CONFIG_ADDON + str(i)] = addon[0] + "|" +  addon[1]
+        if len(switches) > 0:
+            for i,switch in enumerate(switches):
+                if not is_iterable(switch):
+                    raise(TypeError(str(type(switch)) + " is incorrect type for defining extension switch"))
+                status = "on" if switch[1] else "off"
+                configSettings[TAGS.CONFIG_EXTENSION_SWITCH + str(i)] = switch[0] + '=' +  status
+        
+        ### check for euro boolean
+        if euro:
+            configSettings[TAGS.CONFIG_FORCE_OUTPUT_EURO] = "yes"
+        if public_components_only:
+            configSettings[TAGS.CONFIG_IGNORE_PRIVATE] = "yes"
+        return configSettings
+    
     def _get_config_settings(self,dataset):
         configsettings = {}
         configsettings[TAGS.CONFIG_PATH_EUROMODFILES] = self.parent.model.model_path
@@ -508,14 +898,14 @@ class System(Euromod_Element):
         return configsettings
         
         
-    def run(self,data: pd.DataFrame,dataset_id: str,constantsToOverwrite: Optional[Dict[Tuple[str, str], str]] = None,verbose: bool = True,outputpath: str = "",  addons: List[Tuple[str, str]] = [],  switches: List[Tuple[str, bool]] = [],nowarnings=False,euro=False,public_components_only=False):
+    def run(self,data: pd.DataFrame,dataset_id: str,constantsToOverwrite: Optional[Dict[Tuple[str, str], str]] = None,verbose: bool = True,outputpath: str = "",  addons: List[Tuple[str, str]] = [],  switches: List[Tuple[str, bool]] = [],nowarnings=False,euro=False,public_components_only=False,cache: Optional[ResultCache] = None,sink: Optional[Sink] = None,keep_in_memory: bool = True,scenario: Optional[str] = None,output_format: str = "pandas",zero_copy: bool = False,buffer_pool: Optional[BufferPool] = None,validate: bool = False,engine: Optional[Engine] = None):
         """Run the simulation of a EUROMOD tax-benefit system.
         
 
         Parameters
         ----------
-        data : :class:`pandas.DataFrame`
-            input dataframe passed to the EUROMOD model.
+        data : :class:`pandas.DataFrame`, :class:`pyarrow.Table`, :class:`polars.DataFrame`, :class:`SharedDataset` or :obj:`dict` [ :obj:`str`, :class:`numpy.ndarray` ]
+            input data passed to the EUROMOD model. Only the numeric variables are passed.
         dataset_id : :obj:`str`
             ID of the dataset.
         constantsToOverwrite : :obj:`dict` [ :obj:`tuple` [ :obj:`str`, :obj:`str` ], :obj:`str` ], optional
@@ -538,9 +928,38 @@ class System(Euromod_Element):
             If True, the monetary variables will be converted to euro for the simulation. Default value is :obj:`False`.
         public_compoments_only : :obj:`bool`, optional
             If True, the the model will be on with only the public compoments. Default value is :obj:`False`.
+        cache : :class:`ResultCache`, optional
+            Cache of simulation results. When an identical run, i.e. with the same input data, configuration, 
+            metadata values, e.g. parameters and switches, and engine, is found in the cache, its results are returned without running the model. 
+            The cache is not used when `outputpath` is provided. Default is :obj:`None`.
+        sink : :class:`Sink`, optional
+            Destination to which the outputs are written directly from the model output arrays, 
+            e.g. :class:`ParquetSink`, :class:`FeatherSink` or :class:`NpySink`. Default is :obj:`None`.
+        keep_in_memory : :obj:`bool`, optional
+            If False, the outputs written to the `sink` are not kept in the :obj:`outputs` of the :class:`Simulation`. Default is :obj:`True`.
+        scenario : :obj:`str`, optional
+            Name of the scenario under which the `sink` writes the outputs. Default is the name of the system followed by the dataset ID.
+        output_format : :obj:`str`, optional
+            Format of the :obj:`outputs` of the :class:`Simulation`: "pandas" for :class:`pandas.DataFrame`, 
+            "numpy" for :class:`numpy.ndarray` or "arrow" for :class:`pyarrow.Table`. Default is "pandas".
+        zero_copy : :obj:`bool`, optional
+            If True, the "pandas" and "numpy" outputs are views of the arrays returned by the model instead of copies,
+            which halves the peak memory at the end of the run. The arrays of the model stay pinned in memory
+            until the outputs are garbage-collected. Default is :obj:`False`.
+        buffer_pool : :class:`BufferPool`, optional
+            Pool recycling the input and output arrays across runs. The output arrays are returned to the pool
+            by :func:`~Simulation.release`. Default is :obj:`None`.
+        validate : :obj:`bool`, optional
+            If True, the input data is checked by :func:`~System.validate_input` before it is converted for the model. Default is :obj:`False`.
+        engine : :class:`Engine`, optional
+            Backend running the model, e.g. :class:`SubprocessEngine` to run it in worker processes or :class:`FakeEngine` 
+            to simulate it in tests. `zero_copy` and `buffer_pool` only apply to the :class:`InProcessEngine`.
+            Default is the engine set by :func:`~euromod.set_engine`, or the :class:`InProcessEngine`.
        
         Raises
         ------
+        InputValidationError
+            Exception when `validate` is True and the input data is not valid.
         Exception
             Exception when simulation does not finish succesfully, i.e. without errors.
 
@@ -564,69 +983,379 @@ class System(Euromod_Element):
         ### initialize the simulation dictionary
         if hasattr(self, 'simulations') is False:
             self.simulations = {}      
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Parameter 'output_format' must be one of {OUTPUT_FORMATS}.")
+        if output_format == "arrow": #fail before the model runs
+            _import_pyarrow("Output format 'arrow'")
      
+        if engine is None:
+            engine = get_engine()
+        in_process = engine is None or isinstance(engine, InProcessEngine)
+     
+        with span("run", "run", system=self.name, dataset=dataset_id):
+            prepared = self._prepare_run(data, dataset_id, constantsToOverwrite, outputpath, addons, switches, euro, public_components_only, cache, buffer_pool, validate, convert=in_process,
+                                         engine_id=(engine or InProcessEngine()).cache_id)
+            if not in_process and prepared["entry"] is None:
+                options = {"constantsToOverwrite": constantsToOverwrite, "outputpath": outputpath, "addons": addons, "switches": switches, 
+                           "euro": euro, "public_components_only": public_components_only}
+                start, wall = time.perf_counter(), time.time()
+                result = engine.run(self, data, dataset_id, options)
+                seconds = time.perf_counter() - start
+                ### phases measured by the engine, e.g. in a worker process, the rest of the call is counted as "engine"
+                for phase,timing in result.timings.items():
+                    if phase != "engine":
+                        prepared["timer"].add(phase, timing["seconds"], timing["bytes"])
+                        seconds -= timing["seconds"]
+                prepared["timer"].add("engine", max(seconds, 0.0), 0, wall)
+                prepared["entry"] = result
+                prepared["success"] = result.success
+                prepared["copy"] = False
+                if prepared["key"] is not None and result.success and (keep_in_memory or sink is None):
+                    prepared["cache"].put(prepared["key"], result)
+                    prepared["copy"] = True # the cached arrays are not returned
+            prepared["sink"] = sink
+            prepared["keep_in_memory"] = keep_in_memory or sink is None
+            prepared["scenario"] = scenario if scenario is not None else f"{self.name}_{dataset_id}"
+            prepared["output_format"] = output_format
+            prepared["zero_copy"] = zero_copy
+            return self._execute_run(prepared, verbose)
+    
+    def _prepare_run(self, data, dataset_id, constantsToOverwrite, outputpath, addons, switches, euro, public_components_only, cache, buffer_pool=None, validate=False, convert=True, engine_id=None):
+        ### build the configuration and the Csharp input objects of a run, the latter only if convert is True
+        timer = RunTimer(system=self.name, dataset=dataset_id)
+        prepared = {"dataset_id": dataset_id, "constantsToOverwrite": constantsToOverwrite, "cache": cache, "key": None, "entry": None, "buffer_pool": buffer_pool, "timer": timer}
+        with timer.phase("columns") as event:
+            names,columns,attrs = get_columns(data) #numeric variables only
+            event["bytes"] = sum(x.nbytes for x in columns)
+        if validate: # fail before the conversion
+            with timer.phase("validate"):
+                problems = validate_columns(names, columns, [x for x in get_column_names(data) if x not in set(names)])
+            if len(problems) > 0:
+                raise InputValidationError(problems)
+        with timer.phase("config"):
+            configSettings = self._get_run_config(attrs, dataset_id, outputpath, addons, switches, euro, public_components_only)
+
+        ### look up the result of an identical run
+        if cache is not None and len(outputpath) == 0:
+            with timer.phase("cache"):
+                prepared["key"] = make_key(columns, names, configSettings, constantsToOverwrite, self._get_edits(), model_fingerprint(self.parent.model.model_path), 
+                                           engine_id or InProcessEngine().cache_id)
+                prepared["entry"] = cache.get(prepared["key"])
+            if prepared["entry"] is not None:
+                return prepared
+        if not convert:
+            return prepared
+
+        ### get Csharp objects
+        with timer.phase("to_net", sum(x.nbytes for x in columns)):
+            prepared["dataArr"] = asNetArrayFromColumns(columns, pool=buffer_pool)
+        del columns
+        with timer.phase("config"):
+            prepared["configSettings"] = self._convert_configsettings(configSettings)
+            prepared["variables"] = self._get_variables(names)  
+            prepared["constantsToOverwrite_"] = self._get_constantsToOverwrite(constantsToOverwrite)      
+        return prepared
+    
+    def _execute_run(self, prepared, verbose):
+        ### run the model on the prepared input, or return the cached result
+        dataset_id = prepared["dataset_id"]
+        constantsToOverwrite = prepared["constantsToOverwrite"]
+        sink = prepared.get("sink")
+        keep_in_memory = prepared.get("keep_in_memory", True)
+        output_format = prepared.get("output_format", "pandas")
+        timer = prepared["timer"]
+        if prepared["entry"] is not None:
+            entry = prepared["entry"]
+            if sink is not None:
+                with timer.phase("sink", entry.nbytes):
+                    for key,(arr,columns) in entry.outputs.items():
+                        sink.write_array(key, arr, columns, 0, prepared["scenario"])
+                    sink.close()
+            with timer.phase("outputs", entry.nbytes if keep_in_memory else 0):
+                sim = Simulation._from_cache(entry, constantsToOverwrite, output_format, prepared.get("copy", True)) if keep_in_memory else Simulation._from_outputs({}, entry.errors, constantsToOverwrite)
+            sim.timings = timer.timings
+            self._report_run(entry.errors, prepared.get("success", True), dataset_id, verbose)
+            return sim
+
+        dataArr = prepared.pop("dataArr")
+        out = self._run_model(prepared, dataArr)
+        buffer_pool = prepared.get("buffer_pool")
+        if buffer_pool is not None:
+            buffer_pool.release(dataArr)
+        del dataArr
+        with span("simulation", "run", system=self.name, dataset=dataset_id):
+            sim = Simulation(out, constantsToOverwrite, sink, prepared.get("scenario"), keep_in_memory, output_format, prepared.get("zero_copy", False), buffer_pool, timer) 
+        if sink is not None:
+            with timer.phase("sink"):
+                sink.close()
+        if prepared["key"] is not None and out.Item1 and keep_in_memory:
+            with timer.phase("cache"):
+                prepared["cache"].put(prepared["key"], sim._to_cache())
+        self._report_run([(error.message, error.isWarning) for error in out.Item4], out.Item1, dataset_id, verbose)
+        return sim
+    
+    def _run_model(self, prepared, dataArr):
+        ### run the model on the Csharp input objects of _prepare_run, from the folder of the EUROMOD assemblies
+        os.chdir(DLL_PATH)
+        try:
+            ### run system
+            with prepared["timer"].phase("engine"):
+                out = Control().RunFromPython(prepared.pop("configSettings"), dataArr, prepared.pop("variables"), \
+                                              constantsToOverwrite = prepared.pop("constantsToOverwrite_"),countryInfoHandler = self.parent._countryInfoHandler.handler)
+        finally:
+            os.chdir(CWD_PATH)
+        return out
+    
+    def validate_input(self, data, required: Optional[List[str]] = None):
+        """Check the input data of a simulation run before it is passed to the model.
+
+        The checks are vectorized, so that they take a fraction of the time of the run:
+
+        - the household and person identifiers, and the `required` variables, are in the data and numeric;
+        - no variable is non-numeric, as such variables are not passed to the model;
+        - no variable has NaN or infinite values;
+        - the person identifiers are unique;
+        - the partner, mother and father identifiers, when not 0, refer to persons of the same household.
+
+        Parameters
+        ----------
+        data : :class:`pandas.DataFrame`, :class:`pyarrow.Table`, :class:`polars.DataFrame` or :obj:`dict` [ :obj:`str`, :class:`numpy.ndarray` ]
+            Input data, see :func:`~System.run`.
+        required : :obj:`list` [ :obj:`str` ], optional
+            Other variables that must be in the data. Default is :obj:`None`.
+
+        Raises
+        ------
+        InputValidationError
+            Exception listing all problems found in the data.
+
+        Example
+        --------
+        >>> mod['SL']['SL_1996'].validate_input(data)
+        """
+        names,columns,attrs = get_columns(data)
+        problems = validate_columns(names, columns, [x for x in get_column_names(data) if x not in set(names)], list(ID_VARIABLES) + list(required or []))
+        if len(problems) > 0:
+            raise InputValidationError(problems)
+
+    def run_iter(self, frames, dataset_id: str, constantsToOverwrite: Optional[Dict[Tuple[str, str], str]] = None, verbose: bool = False, addons: List[Tuple[str, str]] = [], switches: List[Tuple[str, bool]] = [], euro=False, public_components_only=False, cache: Optional[ResultCache] = None, output_format: str = "pandas", zero_copy: bool = False, buffer_pool: Optional[BufferPool] = None):
+        """Run the simulation of a EUROMOD tax-benefit system for every frame of an iterable.
         
-        configSettings = self._get_config_settings(dataset_id)
-        if len(dataset_id) == 0:
-            if TAGS.CONFIG_ID_DATA in data.attrs.keys():
-                configSettings[TAGS.CONFIG_ID_DATA] = data.attrs[TAGS.CONFIG_ID_DATA] 
-            else:
-                configSettings[TAGS.CONFIG_ID_DATA] = dataset_id
-        else:
-            configSettings[TAGS.CONFIG_ID_DATA] = dataset_id
-        if TAGS.CONFIG_PATH_DATA in data.attrs.keys():
-            configSettings[TAGS.CONFIG_PATH_DATA] = data.attrs[TAGS.CONFIG_PATH_DATA]
-        else:
-            configSettings[TAGS.CONFIG_PATH_DATA] = os.path.join(configSettings[TAGS.CONFIG_PATH_EUROMODFILES], "Input")
-            
-        configSettings[TAGS.CONFIG_PATH_OUTPUT] = os.path.join(outputpath)
-        
-        if len(addons) > 0:
-            for i,addon in enumerate(addons):
-                if not is_iterable(addon):
-                    raise(TypeError(str(type(addon)) + " is incorrect type for defining addon"))
-                configSettings[TAGS.CONFIG_ADDON + str(i)] = addon[0] + "|" +  addon[1]
-        if len(switches) > 0:
-            for i,switch in enumerate(switches):
-                if not is_iterable(switch):
-                    raise(TypeError(str(type(switch)) + " is incorrect type for defining extension switch"))
-                status = "on" if switch[1] else "off"
-                configSettings[TAGS.CONFIG_EXTENSION_SWITCH + str(i)] = switch[0] + '=' +  status
-        
+        This is a generator yielding one :class:`Simulation` per input frame. While the model runs on 
+        a frame, the next frame is read and converted to the model input in a background thread.
+        Note that the frames are simulated independently, so a household must not be split over two frames.
+
+        Parameters
+        ----------
+        frames : iterable of :class:`pandas.DataFrame`, :class:`pyarrow.Table`, :class:`polars.DataFrame` or :obj:`dict`
+            Input data, e.g. from ``pandas.read_csv(..., chunksize=...)`` or a database cursor.
+        dataset_id : :obj:`str`
+            ID of the dataset.
+        constantsToOverwrite : :obj:`dict` [ :obj:`tuple` [ :obj:`str`, :obj:`str` ], :obj:`str` ], optional
+            A :obj:`dict` with constants to overwrite, see :func:`~System.run`. Default is :obj:`None`.
+        verbose : :obj:`bool`, optional
+            If True then information on the output of every frame will be printed. Default is :obj:`False`.
+        addons : :obj:`list` [ :obj:`tuple` [ :obj:`str`, :obj:`str` ]], optional
+            List of tuples with addons to be integrated in the spine, see :func:`~System.run`. Default is [].
+        switches : :obj:`list` [ :obj:`tuple` [ :obj:`str`, :obj:`bool` ]], optional
+            List of tuples with extensions to be switched on or of, see :func:`~System.run`. Default is [].
+        euro : :obj:`bool`, optional
+            If True, the monetary variables will be converted to euro for the simulation. Default value is :obj:`False`.
+        public_compoments_only : :obj:`bool`, optional
+            If True, the the model will be on with only the public compoments. Default value is :obj:`False`.
+        cache : :class:`ResultCache`, optional
+            Cache of simulation results, see :func:`~System.run`. Default is :obj:`None`.
+        output_format : :obj:`str`, optional
+            Format of the simulation outputs, see :func:`~System.run`. Default is "pandas".
+        zero_copy : :obj:`bool`, optional
+            If True, the outputs are views of the arrays returned by the model, see :func:`~System.run`. Default is :obj:`False`.
+        buffer_pool : :class:`BufferPool`, optional
+            Pool recycling the input and output arrays across frames, see :func:`~System.run`. Default is :obj:`None`.
+
+        Yields
+        ------
+        Simulation 
+            A class containing the simulation output and error messages of a frame.
+
+        Example
+        --------
+        >>> import pandas as pd
+        >>> frames = pd.read_csv("C:\\EUROMOD_RELEASES_I6.0+\\Input\\sl_demo_v4.txt",sep="\t",chunksize=500)
+        >>> for out in mod.countries['SL'].systems['SL_1996'].run_iter(frames,'sl_demo_v4'):
+        ...     print(out.outputs[0].shape)
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Parameter 'output_format' must be one of {OUTPUT_FORMATS}.")
+        if output_format == "arrow": #fail before the model runs
+            _import_pyarrow("Output format 'arrow'")
+        frames = iter(frames)
+        def prepare_next():
+            ### read and convert the next frame, the iterator is only advanced by one task at a time
+            frame = next(frames, None)
+            if frame is None:
+                return None
+            prepared = self._prepare_run(frame, dataset_id, constantsToOverwrite, "", addons, switches, euro, public_components_only, cache, buffer_pool)
+            prepared["output_format"] = output_format
+            prepared["zero_copy"] = zero_copy
+            return prepared
+        with ThreadPoolExecutor(1) as pool:
+            future = pool.submit(prepare_next)
+            while True:
+                prepared = future.result()
+                if prepared is None:
+                    break
+                future = pool.submit(prepare_next) #read and convert the next frame during the run
+                yield self._execute_run(prepared, verbose)
+                del prepared
+    
+    def run_chunked(self, data, dataset_id: str, chunk_households: Optional[int] = None, sink=None, id_column: str = "idhh", read_rows: Optional[int] = None, workers: int = 1, memory_limit: Optional[int] = None, scenario: Optional[str] = None, verbose: bool = True, **kwargs):
+        """Run the simulation of a EUROMOD tax-benefit system in chunks of households.
         
-        data = data.select_dtypes(['number'])
-        ### check for euro boolean
-        if euro:
-            configSettings[TAGS.CONFIG_FORCE_OUTPUT_EURO] = "yes"
-        if public_components_only:
-            configSettings[TAGS.CONFIG_IGNORE_PRIVATE] = "yes"
+        The data is split in chunks of complete households that are simulated one after the other,
+        so that only one chunk of input and output data is in memory at a time.
+        The rows of every household must be contiguous in the data.
 
+        Parameters
+        ----------
+        data : :class:`pandas.DataFrame` or :obj:`str`
+            Input dataframe, or path to a tab-separated input file that is read chunk by chunk.
+        dataset_id : :obj:`str`
+            ID of the dataset.
+        chunk_households : :obj:`int`, optional
+            Number of households in a chunk. Default is 10000 when `workers` is 1.
+            With several workers and a dataframe as input, the data is split in parts with about the same number of persons,
+            4 parts per worker or more when `chunk_households` is provided. The data is then published once in shared memory,
+            see :class:`SharedDataset`, and the workers read their parts from it.
+        sink : :class:`Sink` or callable, optional
+            Destination of the outputs of the chunks. A callable is called as ``sink(name, df, chunk)`` for every output of every chunk.
+            Default is :obj:`None`, i.e. the outputs are concatenated in memory.
+        id_column : :obj:`str`, optional
+            Name of the household identifier variable. Default is "idhh".
+        read_rows : :obj:`int`, optional
+            Number of rows read at a time when `data` is a path. Default is 8 times `chunk_households`.
+        workers : :obj:`int`, optional
+            Number of worker processes running the chunks in parallel. Each worker loads the model once.
+            The outputs are written to the sink in the order of the data. Default is 1, i.e. the chunks are run in this process.
+            Note that on Windows a script starting worker processes must be protected by ``if __name__ == "__main__":``.
+        memory_limit : :obj:`int`, optional
+            Working set of a process, in bytes, above which :func:`~euromod.release_memory` is called after a chunk,
+            in this process or in the worker processes. Default is :obj:`None`, i.e. the memory is left to the garbage collectors.
+        scenario : :obj:`str`, optional
+            Name of the scenario under which the `sink` writes the outputs. Default is the name of the system followed by the dataset ID,
+            as for :func:`~System.run`.
+        verbose : :obj:`bool`, optional
+            If True then information on the output will be printed. Default is :obj:`True`.
+        **kwargs
+            Other arguments of :func:`~System.run`, except `outputpath`.
 
-        ### get Csharp objects
-        dataArr = self._get_dataArray(data)
-        configSettings_ = self._convert_configsettings(configSettings)
-        variables = self._get_variables(data)  
-        constantsToOverwrite_ = self._get_constantsToOverwrite(constantsToOverwrite)      
+        Returns
+        -------
+        Simulation 
+            A class containing the simulation output kept in memory by the sink and the error messages of all chunks.
 
-        os.chdir(DLL_PATH)
-        ### run system
-        out = Control().RunFromPython(configSettings_, dataArr, variables, \
-                                      constantsToOverwrite = constantsToOverwrite_,countryInfoHandler = self.parent._countryInfoHandler)
-        os.chdir(CWD_PATH)
-        sim = Simulation(out, constantsToOverwrite) 
-        for error in out.Item4:
-            if error.isWarning:
-            	print(f"Warning: {error.message}")
+        Example
+        --------
+        >>> from euromod import Model, ParquetSink
+        >>> mod=Model("C:\\EUROMOD_RELEASES_I6.0+")
+        >>> out=mod.countries['SL'].systems['SL_1996'].run_chunked("C:\\EUROMOD_RELEASES_I6.0+\\Input\\sl_demo_v4.txt",'sl_demo_v4',chunk_households=100,sink=ParquetSink("C:\\temp\\output"))
+        """
+        for arg in ("outputpath", "keep_in_memory", "output_format"):
+            if arg in kwargs:
+                raise TypeError(f"Parameter '{arg}' of run is not supported for chunked runs.")
+        if isinstance(data, str):
+            attrs = {TAGS.CONFIG_ID_DATA: os.path.splitext(os.path.basename(data))[0], TAGS.CONFIG_PATH_DATA: os.path.dirname(data)}
+            frames = read_frames(data, read_rows or 8*(chunk_households or 10000), attrs)
+        else:
+            check_contiguous(data[id_column].to_numpy())
+            frames = [data]
+        if workers > 1 and not isinstance(data, str): # parts balanced by number of persons
+            n_parts = 4*workers
+            if chunk_households is not None:
+                n_parts = max(n_parts, -(-len(household_starts(data[id_column].to_numpy())) // chunk_households))
+            shared = SharedDataset(data)
+            chunks = (shared[a:b] for a,b in partition_households(data[id_column].to_numpy(), n_parts))
+        else:
+            shared = None
+            chunks = household_chunks(frames, chunk_households or 10000, id_column)
+        sink = get_sink(sink)
+        if scenario is None:
+            scenario = f"{self.name}_{dataset_id}"
+        errors = []
+        def write(i, outputs, chunk_errors, events=()):
+            if len(events) > 0: #spans recorded by the worker
+                get_tracer().merge(events)
+            with span("sink", "job", chunk=i):
+                for name,df in outputs.items():
+                    sink.write(name, df, i, scenario)
+            errors.extend(x for x in chunk_errors if x not in errors)
+        timer = RunTimer(system=self.name, dataset=dataset_id)
+        try:
+            if workers > 1:
+                edits = self._get_edits()
+                kwargs = {k:v for k,v in kwargs.items() if k != "cache"} #the cache is not shared with the workers
+                try:
+                    with ProcessPoolExecutor(workers) as pool:
+                        pending = deque()
+                        for i,chunk in enumerate(chunks):
+                            pending.append(pool.submit(run_chunk, self.parent.model.model_path, self.parent.name, self.name, edits, chunk, dataset_id, kwargs, i, get_tracer() is not None, memory_limit))
+                            while len(pending) >= 2*workers or (len(pending) > 0 and pending[0].done()): # write the outputs in the order of the chunks
+                                write(i - len(pending) + 1, *pending.popleft().result())
+                        n = i + 1 if len(pending) > 0 else 0
+                        while len(pending) > 0:
+                            write(n - len(pending), *pending.popleft().result())
+                finally:
+                    if shared is not None:
+                        shared.unlink()
+            else:
+                for i,chunk in enumerate(chunks):
+                    with span("chunk", "job", chunk=i, rows=len(chunk)):
+                        sim = self.run(chunk, dataset_id, verbose=False, **kwargs)
+                    with timer.phase("sink"):
+                        write(i, dict(sim.outputs.items()), [(message, message in sim._warnings) for message in sim.errors])
+                    for phase,timing in sim.timings.items(): # the events were passed to the profiler by the run of the chunk
+                        total = timer.timings.setdefault(phase, {"seconds": 0.0, "bytes": 0})
+                        total["seconds"] += timing["seconds"]
+                        total["bytes"] += timing["bytes"]
+                    del sim
+                    release_memory_above(memory_limit)
+        finally: # the writers of the sink are closed when a chunk fails as well
+            with timer.phase("sink"):
+                outputs = sink.close()
+        if verbose:
+            print(f"Simulation for system {self.name} with dataset {dataset_id} finished.")
+        sim = Simulation._from_outputs(outputs, errors, kwargs.get("constantsToOverwrite"))
+        sim.timings = timer.timings
+        return sim
+    
+    def _report_run(self, errors, success, dataset_id, verbose):
+        for message,isWarning in errors:
+            if isWarning:
+            	print(f"Warning: {message}")
             else:
-                print(f"Error: {error.message}")
-        if out.Item1:
+                print(f"Error: {message}")
+        if success:
             ### load "Simulations" Container
             if verbose:
                 print(f"Simulation for system {self.name} with dataset {dataset_id} finished.")
         else:
             raise Exception(f"Simulation for system {self.name} with dataset {dataset_id} aborted with errors.")
-      
-        return sim
+    
+    def _get_edits(self):
+        ### current value of the metadata of the country and of the system that differs from the files, by (type, identifier, key)
+        return {(typ,id,key):str(info[key]) for (typ,id,key),(info,original) in self.parent._original_info.items() 
+                if str(info[key]) != str(original) and (not typ.startswith("SYS_") or id.startswith(self.ID))}
+    
+    def _set_edits(self, edits):
+        ### change the metadata as returned by _get_edits, e.g. in a worker process, and return the changes that undo it
+        handler = self.parent._countryInfoHandler
+        previous = {}
+        for (typ,id,key),value in edits.items():
+            info = handler.GetPieceOfInfo(getattr(ReadCountryOptions,typ),id)
+            self.parent._record_edit(typ, id, key, info)
+            previous[(typ,id,key)] = str(info[key])
+            info[key] = value
+        self._refresh_loaded_parameters({id for typ,id,key in edits if typ == str(ReadCountryOptions.SYS_PAR)})
+        return previous
     
     #def __repr__(self):
      #   return f"System {self.name}"
@@ -634,6 +1363,22 @@ class System(Euromod_Element):
         return f"{self.name}"
     def _container_middle_repr(self):
         return ""
+class ParameterSnapshot:
+    """Original values of the parameters changed in a system since the snapshot was taken.
+    
+       This class is returned by the :func:`~System.snapshot` method and should not 
+       be used by the user as a stand alone.
+    """
+    def __init__(self, system):
+        self.system: System = system
+        """: The system of which the parameters are recorded."""
+        self.values: dict = {}
+        """: A :obj:`dict` with the original value of each changed parameter, by identifier of the parameter in the system."""
+    def __len__(self):
+        return len(self.values)
+    def __repr__(self):
+        return f"ParameterSnapshot of system {self.system.name} with {len(self.values)} changed parameters"
+
 class OutputContainer(Container):
     def add(self,name,data):
         self.containerDict[name] = data
@@ -668,7 +1413,7 @@ class Simulation(Euromod_Element):
         A class with simulation output.
     """
     
-    def __init__(self, out, constantsToOverwrite):
+    def __init__(self, out, constantsToOverwrite, sink=None, scenario=None, keep_in_memory=True, output_format="pandas", zero_copy=False, buffer_pool=None, timer=None):
         '''
         A class with results from the simulation :obj:`run`.
         
@@ -679,27 +1424,102 @@ class Simulation(Euromod_Element):
             For indexing use an integer or a label from :obj:`output_filenames`."""
         self.output_filenames: list[str] | [] = []
         """ A :obj:`list` of file-names of simulation output."""
+        self.output_variables: dict[str,list[str]] = {}
+        """: A :obj:`dict` with the :obj:`list` of output variables, by file-name of simulation output."""
+        if timer is None:
+            timer = RunTimer()
+        self.timings: dict[str,dict] = timer.timings
+        """: A :obj:`dict` with the wall time in seconds ("seconds") and the bytes moved ("bytes"), by phase of the run,
+            i.e. "columns", "validate", "config", "cache", "to_net", "engine", "to_numpy", "outputs" and "sink"."""
         if constantsToOverwrite is None:
             constantsToOverwrite = {}
+        self._buffer_pool = buffer_pool
+        self._buffers = []
 
         if (out.get_Item1()):
             dataDict = dict(out.get_Item2())
             variableNameDict = dict(out.get_Item3())
-            for key in dataDict.keys():
-
-                clr_arr = dataDict[key]
-                temp = asNumpyArray(clr_arr)
-
+            keys = list(dataDict.keys())
+            with timer.phase("to_numpy") as event:
+                if keep_in_memory and not zero_copy: 
+                    ### copy all outputs at once, in parallel blocks
+                    arrays = asNumpyArrays([dataDict[key] for key in keys], pool=buffer_pool)
+                    event["bytes"] = sum(x.nbytes for x in arrays)
+                else: #a view is enough when the output is only written to the sink
+                    arrays = [asNumpyArray(dataDict[key], copy=False) for key in keys]
+            del dataDict
+            for key in keys:
+                temp = arrays.pop(0)
                 outputvars = list(variableNameDict[key])
-                self.outputs.add(key, pd.DataFrame(temp, columns=outputvars))
+                if sink is not None:
+                    with timer.phase("sink", temp.nbytes):
+                        sink.write_array(key, temp, outputvars, 0, scenario)
+                if keep_in_memory:
+                    with timer.phase("outputs", temp.nbytes):
+                        self.outputs.add(key, make_output(temp, outputvars, output_format))
+                    if buffer_pool is not None and not zero_copy:
+                        if output_format == "arrow": #the arrow table holds a copy
+                            buffer_pool.release(temp)
+                        else:
+                            self._buffers.append(temp)
+                del temp
                 self.output_filenames.append(key)
+                self.output_variables[key] = outputvars
 
         self.errors: list[str] = [x.message for x in out.Item4]
         """: A :obj:`list` with errors and warnings from the simulation run."""
+        self._warnings = {x.message for x in out.Item4 if x.isWarning}
         
         self.constantsToOverwrite: dict[tuple(str,str),str] = constantsToOverwrite.copy()
         """: A :obj:`dict`-type object with user-defined constants.""" 
 
+    @classmethod
+    def _from_outputs(cls, outputs, errors, constantsToOverwrite):
+        ### simulation from outputs that were not returned by the model
+        sim = cls.__new__(cls)
+        sim._buffer_pool = None
+        sim._buffers = []
+        sim.outputs = OutputContainer()
+        sim.output_filenames = []
+        sim.output_variables = {}
+        sim.timings = {}
+        for key,df in outputs.items():
+            sim.outputs.add(key, df)
+            sim.output_filenames.append(key)
+            sim.output_variables[key] = [str(x) for x in df.columns] if hasattr(df, "columns") else []
+        sim.errors = [message for message,isWarning in errors]
+        sim._warnings = {message for message,isWarning in errors if isWarning}
+        sim.constantsToOverwrite = dict(constantsToOverwrite or {})
+        return sim
+
+    @classmethod
+    def _from_cache(cls, entry, constantsToOverwrite, output_format="pandas", copy=True):
+        outputs = {key:make_output(arr.copy() if copy else arr, columns, output_format) for key,(arr,columns) in entry.outputs.items()}
+        sim = cls._from_outputs(outputs, entry.errors, constantsToOverwrite)
+        sim.output_variables = {key:list(columns) for key,(arr,columns) in entry.outputs.items()}
+        return sim
+
+    def release(self):
+        """Return the output arrays to the :class:`BufferPool` of the run and remove the outputs.
+
+        The outputs, and any data frame or array sharing their memory, must not be used afterwards.
+        
+        Example
+        --------
+        >>> out = mod['SL']['SL_1996'].run(data, 'sl_demo_v4', buffer_pool=pool)
+        >>> total = out.outputs[0]['ils_dispy'].sum()
+        >>> out.release()
+        """
+        self.outputs = OutputContainer()
+        if self._buffer_pool is not None:
+            for arr in self._buffers:
+                self._buffer_pool.release(arr)
+        self._buffers = []
+
+    def _to_cache(self):
+        outputs = {key:(output_array(output).copy(),list(self.output_variables[key])) for key,output in self.outputs.items()}
+        return CachedResult(outputs, [(message,message in self._warnings) for message in self.errors])
+
 
 
 
@@ -968,6 +1788,7 @@ class PolicyInSystem(SystemElement):
         A class with system-specific policies.
     """
     _objectType = ReadCountryOptions.SYS_POL
+    _ctryOption = ReadCountryOptions.SYS_POL
     def __init__(self,*arg):
         self.parent: Country
         """The country-specific class."""
@@ -1056,6 +1877,10 @@ class ParameterInSystem(SystemElement):
     _extensionType = ReadCountryOptions.EXTENSION_PAR
     _ctryOption = ReadCountryOptions.SYS_PAR
 
+    def __setattr__(self, name, value):
+        if name == "value" and "_initialised" in self.__dict__: #record the change in the snapshots of the system
+            self.parentSystem._record_parameter(self.ID, self._info)
+        super().__setattr__(name, value)
     def _short_repr(self):
         return f"{self.parentTypeObject.name}" 
     def _container_middle_repr(self):
@@ -0,0 +1,251 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.clr_array_convert import asNumpyArrays
+from utils.frames import get_columns
+from shared import SharedDataset
+from cache import CachedResult
+
+_ENGINE = None
+
+
+def set_engine(engine):
+    """
+    Set the engine used by :func:`~System.run` when no engine is given.
+
+    Parameters
+    ----------
+    engine : :class:`Engine` or None
+        The engine, or :obj:`None` for the :class:`InProcessEngine`.
+
+    Returns
+    -------
+    :class:`Engine` or None
+        The previous engine.
+
+    Example
+    --------
+    >>> import euromod
+    >>> euromod.set_engine(euromod.SubprocessEngine(workers=4, timeout=600))
+    """
+    global _ENGINE
+    previous = _ENGINE
+    _ENGINE = engine
+    return previous
+
+
+def get_engine():
+    """Get the engine set by :func:`set_engine`, or :obj:`None`."""
+    return _ENGINE
+
+
+class EngineResult(CachedResult):
+    """Outputs and messages of a run of an :class:`Engine`."""
+    def __init__(self, success, outputs, errors, timings=None):
+        super().__init__(outputs, errors)
+        self.success: bool = success
+        """: True if the run succeeded."""
+        self.timings: dict = timings or {}
+        """: A :obj:`dict` with the wall time in seconds ("seconds") and the bytes moved ("bytes"), by phase of the run."""
+
+
+class Engine:
+    """Backend running the EUROMOD model for :func:`~System.run`.
+
+    An engine runs a system on input data and returns the outputs as NumPy arrays in an :class:`EngineResult`.
+    It does not raise an exception when the model reports errors, the errors are returned in the result.
+    Engines can be used as context managers, that call :func:`close` at the end.
+    """
+    @property
+    def cache_id(self):
+        """:obj:`str`: Identity of the engine in the keys of a :class:`ResultCache`, the results of different engines are cached separately."""
+        return f"{type(self).__module__}.{type(self).__qualname__}"
+    def run(self, system, data, dataset_id, options):
+        """
+        Run a system.
+
+        Parameters
+        ----------
+        system : :class:`System`
+            System to run, with its current parameter values.
+        data : :class:`pandas.DataFrame`, :class:`SharedDataset` or :obj:`dict` [ :obj:`str`, :class:`numpy.ndarray` ]
+            Input data, see :func:`~System.run`.
+        dataset_id : :obj:`str`
+            ID of the dataset.
+        options : :obj:`dict`
+            Other arguments of :func:`~System.run` defining the run: "constantsToOverwrite", "outputpath", "addons", "switches", "euro" and "public_components_only".
+
+        Returns
+        -------
+        EngineResult
+            The outputs and messages of the run.
+        """
+        raise NotImplementedError
+    def close(self):
+        """Release the resources of the engine."""
+        pass
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+
+
+class InProcessEngine(Engine):
+    """Engine running the model in this process through the EUROMOD .NET assemblies. 
+
+    This is the default engine of :func:`~System.run`, which then uses its own conversions of the input 
+    and output arrays, e.g. with ``zero_copy`` or a ``buffer_pool``.
+    Called directly, :func:`run` converts the data, runs the model from the folder of the EUROMOD assemblies
+    and restores the working directory as :func:`~System.run` does, but does not use a cache, a sink nor a buffer pool,
+    and does not print nor raise the errors of the model.
+    """
+    def run(self, system, data, dataset_id, options):
+        prepared = system._prepare_run(data, dataset_id, options.get("constantsToOverwrite"), options.get("outputpath", ""), options.get("addons", []), options.get("switches", []),
+                                       options.get("euro", False), options.get("public_components_only", False), None)
+        timer = prepared["timer"]
+        out = system._run_model(prepared, prepared.pop("dataArr"))
+        outputs = {}
+        if out.get_Item1():
+            dataDict = dict(out.get_Item2())
+            variableNameDict = dict(out.get_Item3())
+            keys = list(dataDict.keys())
+            with timer.phase("to_numpy") as event:
+                arrays = asNumpyArrays([dataDict[key] for key in keys])
+                event["bytes"] = sum(x.nbytes for x in arrays)
+            outputs = {key: (arr, list(variableNameDict[key])) for key, arr in zip(keys, arrays)}
+        return EngineResult(bool(out.get_Item1()), outputs, [(x.message, x.isWarning) for x in out.Item4], timer.timings)
+
+
+class SubprocessEngine(Engine):
+    """Engine running the model in a pool of worker processes.
+
+    The input data is published to the workers in shared memory, see :class:`SharedDataset`, 
+    and the outputs are returned in shared memory as well. Every worker loads the model once,
+    and runs the system with the metadata of the calling process, e.g. its parameter values and policy switches.
+    Runs in the workers are isolated from this process: a run exceeding the timeout is killed, and 
+    workers can be replaced after a number of runs to release the memory of the .NET runtime.
+    Runs can be done in parallel from several threads, or with :func:`submit`.
+
+    Parameters
+    ----------
+    workers : :obj:`int`, optional
+        Number of worker processes. Default is 1.
+    timeout : :obj:`float`, optional
+        Maximum run time in seconds. Default is :obj:`None`, i.e. no limit.
+    max_jobs : :obj:`int`, optional
+        Number of runs after which a worker is replaced. Default is :obj:`None`, i.e. never.
+    countries : :obj:`list` [ :obj:`str` ], optional
+        Countries loaded by the workers when they start. Default is [].
+
+    Example
+    --------
+    >>> from euromod import Model, SubprocessEngine
+    >>> mod=Model("C:\\EUROMOD_RELEASES_I6.0+")
+    >>> with SubprocessEngine(workers=4, timeout=600, max_jobs=50) as engine:
+    ...     futures = [engine.submit(mod['SL'][system], data, 'sl_demo_v4') for system in ['SL_1996', 'SL_1997']]
+    ...     outputs = [future.result().outputs for future in futures]
+    """
+    def __init__(self, workers=1, timeout=None, max_jobs=None, countries=()):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self.countries = list(countries)
+        self._pools = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self, model_path):
+        from server import WorkerPool
+        with self._lock:
+            if model_path not in self._pools: # workers are started at the first run of a model
+                self._pools[model_path] = WorkerPool(model_path, self.workers, self.countries, self.timeout, max_jobs=self.max_jobs)
+            return self._pools[model_path]
+
+    def run(self, system, data, dataset_id, options):
+        ### the dataset is published before the workers start, so that they share the resource tracker of this process
+        shared = data if isinstance(data, SharedDataset) else SharedDataset(data)
+        try:
+            pool = self._pool(system.parent.model.model_path)
+            return pool.run(system.parent.name, system.name, dataset_id, shared, options, 
+                            shared_outputs=True, wait=True, edits=system._get_edits())
+        finally:
+            if shared is not data:
+                shared.unlink()
+
+    def submit(self, system, data, dataset_id, **options):
+        """
+        Start a run in a worker.
+
+        Parameters
+        ----------
+        system, data, dataset_id
+            See :func:`run`.
+        **options
+            Other arguments of :func:`run`.
+
+        Returns
+        -------
+        :class:`concurrent.futures.Future`
+            The future :class:`EngineResult` of the run.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers)
+        return self._executor.submit(self.run, system, data, dataset_id, options)
+
+    def close(self):
+        """Stop the workers."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for pool in self._pools.values():
+            pool.close()
+        self._pools = {}
+
+
+class FakeEngine(Engine):
+    """Engine simulating the model in memory, without the EUROMOD software, e.g. to test code running simulations.
+
+    Parameters
+    ----------
+    function : callable, optional
+        Function called as ``function(system, names, columns, options)`` with the names and the arrays of the input variables,
+        returning the outputs as a :obj:`dict` with a tuple of a 2-dimensional array and the list of output variables, 
+        by output file-name. Default returns the input variables as the output "<system>_std.txt".
+    """
+    def __init__(self, function=None):
+        self.function = function
+        self.calls = []
+        """: A :obj:`list` with a tuple of the system name, the dataset ID and the options of every run."""
+        self._lock = threading.Lock()
+
+    @property
+    def cache_id(self):
+        return f"{super().cache_id} {id(self)}" # the outputs depend on the function
+
+    def run(self, system, data, dataset_id, options):
+        import numpy as np
+        names, columns, attrs = get_columns(data)
+        with self._lock:
+            self.calls.append((system.name, dataset_id, dict(options)))
+        if self.function is not None:
+            outputs = self.function(system, names, columns, options)
+        else:
+            outputs = {f"{system.name.lower()}_std.txt": (np.column_stack(columns) if columns else np.zeros((0, 0)), list(names))}
+        return EngineResult(True, outputs, [])
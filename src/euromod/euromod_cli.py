@@ -14,6 +14,83 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the Licence for the specific language governing permissions and limitations under the Licence.
 '''
 
+import argparse
+
+
 def cli():
 	import euromod as em
-	return em
\ No newline at end of file
+	return em
+
+
+def _serve(args):
+	import euromod
+	from server import serve
+	serve(args.model, args.host, args.port, args.workers, args.countries, args.timeout, args.max_queue, args.max_jobs, args.quiet)
+	return 0
+
+
+def _parse_bytes(value):
+	### size in bytes, with an optional K, M or G suffix
+	units = {"K": 2**10, "M": 2**20, "G": 2**30}
+	value = value.strip().upper().rstrip("B")
+	if value[-1:] in units:
+		return int(float(value[:-1])*units[value[-1]])
+	return int(value)
+
+
+def _run(args):
+	import euromod
+	from batch import load_jobs, run_batch, MemoryModel
+	try:
+		jobs = load_jobs(args.jobs)
+		memory_model = MemoryModel(args.memory_profile) if args.memory_profile is not None else None
+		results = run_batch(args.model, jobs, args.out, args.workers, args.format, args.memory_limit, args.memory_budget, memory_model)
+	except (OSError, ValueError) as e: # invalid jobs file or missing input file, before any job is run
+		print(f"Error: {e}")
+		return 2
+	failed = [x for x in results if x["status"] != "ok"]
+	print(f"{len(results) - len(failed)} of {len(results)} jobs finished in {args.out}.")
+	return 1 if failed else 0
+
+
+def main(argv=None):
+	"""
+	Entry point of the ``euromod`` command.
+
+	Example
+	--------
+	>>> euromod run --model "C:\\EUROMOD_RELEASES_I6.0+" --jobs jobs.yaml --workers 4 --out "C:\\temp\\output"
+	>>> euromod serve --model "C:\\EUROMOD_RELEASES_I6.0+" --workers 4 --countries SL BE
+	"""
+	parser = argparse.ArgumentParser(prog="euromod", description="Run the microsimulation model EUROMOD.")
+	commands = parser.add_subparsers(dest="command", required=True)
+
+	run = commands.add_parser("run", help="run a batch of simulations from a jobs file")
+	run.add_argument("--model", required=True, help="path to the EUROMOD project")
+	run.add_argument("--jobs", required=True, help="YAML or JSON file with the jobs to run")
+	run.add_argument("--workers", type=int, default=1, help="number of worker processes (default: %(default)s)")
+	run.add_argument("--out", required=True, help="folder of the outputs")
+	run.add_argument("--format", default="parquet", choices=("parquet", "feather", "npy"), help="format of the outputs (default: %(default)s)")
+	run.add_argument("--memory-limit", type=_parse_bytes, help="memory of a process, e.g. 8G, above which memory is released after a job")
+	run.add_argument("--memory-budget", type=_parse_bytes, help="memory available to the jobs running in parallel, e.g. 64G")
+	run.add_argument("--memory-profile", help="JSON file with the observed peaks of the jobs (default: memory.json in the output folder)")
+	run.set_defaults(func=_run)
+
+	serve = commands.add_parser("serve", help="serve simulation requests over HTTP with warm worker processes")
+	serve.add_argument("--model", required=True, help="path to the EUROMOD project")
+	serve.add_argument("--host", default="127.0.0.1", help="address on which the server listens (default: %(default)s)")
+	serve.add_argument("--port", type=int, default=8765, help="port of the server (default: %(default)s)")
+	serve.add_argument("--workers", type=int, default=2, help="number of worker processes (default: %(default)s)")
+	serve.add_argument("--countries", nargs="*", default=[], help="countries loaded by the workers when they start")
+	serve.add_argument("--timeout", type=float, default=300, help="maximum run time of a job in seconds (default: %(default)s)")
+	serve.add_argument("--max-queue", type=int, help="maximum number of jobs waiting for a worker (default: 2 per worker)")
+	serve.add_argument("--max-jobs", type=int, help="number of jobs after which a worker is replaced")
+	serve.add_argument("--quiet", action="store_true", help="do not log the requests")
+	serve.set_defaults(func=_serve)
+
+	args = parser.parse_args(argv)
+	return args.func(args)
+
+
+if __name__ == "__main__":
+	raise SystemExit(main())
@@ -0,0 +1,135 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+import time
+import threading
+from contextlib import contextmanager
+
+### methods of the CountryInfoHandler that are counted, with the option as first argument
+COUNTED_METHODS = ("GetPieceOfInfo", "GetPiecesOfInfo", "GetTypeInfo")
+
+_SCOPES = []
+_LOCK = threading.Lock()
+
+
+class MetadataStats:
+    """Number of calls and cumulative time of the metadata requests to the EUROMOD country handler.
+
+    The statistics are kept by tuple of the name of the method and the name of the :obj:`ReadCountryOptions` type,
+    e.g. ``("GetPieceOfInfo", "SYS_PAR")``.
+    """
+    def __init__(self):
+        self._stats = {}
+
+    def add(self, method, option, seconds):
+        stats = self._stats.get((method, option))
+        if stats is None:
+            stats = self._stats[(method, option)] = {"calls": 0, "seconds": 0.0}
+        stats["calls"] += 1
+        stats["seconds"] += seconds
+
+    def to_dict(self):
+        """
+        Get the statistics.
+
+        Returns
+        -------
+        :obj:`dict` [ :obj:`tuple` [ :obj:`str`, :obj:`str` ], :obj:`dict` ]
+            A :obj:`dict` with the number of calls ("calls") and the cumulative time in seconds ("seconds"),
+            by method and type of information, sorted by decreasing time.
+        """
+        with _LOCK:
+            items = sorted(self._stats.items(), key=lambda x: -x[1]["seconds"])
+            return {key: dict(stats) for key, stats in items}
+
+    @property
+    def calls(self):
+        """:obj:`int`: Total number of calls."""
+        with _LOCK:
+            return sum(x["calls"] for x in self._stats.values())
+
+    @property
+    def seconds(self):
+        """:obj:`float`: Total time of the calls in seconds."""
+        with _LOCK:
+            return sum(x["seconds"] for x in self._stats.values())
+
+    def reset(self):
+        """Set the statistics to zero."""
+        with _LOCK:
+            self._stats = {}
+
+    def __repr__(self):
+        rep = f"MetadataStats with {self.calls} calls in {self.seconds:.3f} seconds\n"
+        for (method, option), stats in self.to_dict().items():
+            rep += f"\t {method}({option}): {stats['calls']} calls, {stats['seconds']:.3f} seconds\n"
+        return rep
+
+
+class InstrumentedHandler:
+    """Proxy of a csharp CountryInfoHandler counting the calls of the metadata requests.
+
+    The attributes other than :obj:`COUNTED_METHODS` are passed on to the handler.
+    Note that csharp methods, e.g. the model run, must receive the handler itself, i.e. :obj:`handler`.
+    """
+    def __init__(self, handler):
+        self.handler = handler
+        self.stats = MetadataStats()
+
+    def __getattr__(self, name):
+        attr = getattr(self.handler, name)
+        if name not in COUNTED_METHODS:
+            return attr
+        def counted(option, *args):
+            start = time.perf_counter()
+            try:
+                return attr(option, *args)
+            finally:
+                seconds = time.perf_counter() - start
+                option = str(option)
+                with _LOCK:
+                    self.stats.add(name, option, seconds)
+                    for scope in _SCOPES:
+                        scope.add(name, option, seconds)
+        return counted
+
+
+@contextmanager
+def measure_metadata():
+    """
+    Count the metadata requests of all countries made within the scope.
+
+    Yields
+    ------
+    MetadataStats
+        The statistics of the requests made within the scope.
+
+    Example
+    --------
+    >>> from euromod import Model, measure_metadata
+    >>> mod=Model("C:\\EUROMOD_RELEASES_I6.0+")
+    >>> with measure_metadata() as stats:
+    ...     mod['SL']['SL_1996'].policies[0].functions
+    >>> stats.to_dict()
+    """
+    stats = MetadataStats()
+    with _LOCK:
+        _SCOPES.append(stats)
+    try:
+        yield stats
+    finally:
+        with _LOCK:
+            _SCOPES.remove(stats)
@@ -0,0 +1,102 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+import time
+from contextlib import contextmanager
+from tracing import get_tracer
+
+_PROFILER = None
+
+
+def set_profiler(callback):
+    """
+    Set a function receiving the timing of every phase of every simulation run.
+
+    The function is called as ``callback(event)`` at the end of every phase, with a :obj:`dict` containing:
+
+    - "phase": name of the phase, e.g. "columns", "to_net", "engine", "to_numpy" or "outputs";
+    - "seconds": wall time of the phase;
+    - "bytes": number of bytes moved in the phase, 0 if not applicable;
+    - "start": start time of the phase, as returned by :func:`time.time`;
+    - "system" and "dataset": names of the system and of the dataset of the run.
+
+    Parameters
+    ----------
+    callback : callable or None
+        Function receiving the events, or :obj:`None` to remove the profiler.
+
+    Returns
+    -------
+    callable or None
+        The previous profiler.
+
+    Example
+    --------
+    >>> import euromod
+    >>> events = []
+    >>> euromod.set_profiler(events.append)
+    >>> out = mod['SL']['SL_1996'].run(data,'sl_demo_v4')
+    >>> euromod.set_profiler(None)
+    """
+    global _PROFILER
+    previous = _PROFILER
+    _PROFILER = callback
+    return previous
+
+
+def get_profiler():
+    """Get the function set by :func:`set_profiler`, or :obj:`None`."""
+    return _PROFILER
+
+
+class RunTimer:
+    """Timings of the phases of a simulation run.
+
+    Parameters
+    ----------
+    **context
+        Information added to every event passed to the profiler, e.g. the system and dataset of the run.
+    """
+    def __init__(self, **context):
+        self.context = context
+        self.timings = {}
+        """: A :obj:`dict` with the wall time in seconds and the bytes moved, by phase."""
+
+    @contextmanager
+    def phase(self, name, nbytes=0):
+        """
+        Measure a phase of the run. 
+        
+        The context manager yields a :obj:`dict` in which the number of bytes moved can be set as "bytes" 
+        when it is only known at the end of the phase.
+        """
+        event = {"bytes": nbytes}
+        start, wall = time.perf_counter(), time.time()
+        try:
+            yield event
+        finally:
+            self.add(name, time.perf_counter() - start, event["bytes"], wall)
+
+    def add(self, name, seconds, nbytes=0, start=None):
+        """Add the time and bytes of a phase, and pass the event to the profiler."""
+        timing = self.timings.setdefault(name, {"seconds": 0.0, "bytes": 0})
+        timing["seconds"] += seconds
+        timing["bytes"] += int(nbytes)
+        if _PROFILER is not None:
+            _PROFILER({"phase": name, "seconds": seconds, "bytes": int(nbytes), "start": start, **self.context})
+        tracer = get_tracer()
+        if tracer is not None and start is not None:
+            tracer.add(name, start, seconds, "run", bytes=int(nbytes), **self.context)
@@ -0,0 +1,179 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import gc
+import threading
+from System import GC
+from System.Runtime import GCSettings, GCLargeObjectHeapCompactionMode
+from System.Diagnostics import Process
+from utils.clr_array_convert import BufferPool, _PinnedBuffer
+from cache import ResultCache
+
+
+def process_memory():
+    """:obj:`int`: Working set, i.e. resident memory, of the process in bytes."""
+    return int(Process.GetCurrentProcess().WorkingSet64)
+
+
+def runtime_stats():
+    """
+    Get the memory metrics of the .NET runtime and of the arrays held by the connector.
+
+    Returns
+    -------
+    :obj:`dict`
+        A :obj:`dict` with:
+
+        - "managed_bytes": size of the managed heap of the .NET runtime, without forcing a collection;
+        - "gen0_collections", "gen1_collections" and "gen2_collections": number of .NET garbage collections per generation;
+        - "pinned_handles" and "pinned_bytes": number and size of the pinned .NET arrays viewed by NumPy arrays (see ``zero_copy`` in :func:`~System.run`);
+        - "pool_bytes": size of the arrays held by the live :class:`BufferPool` objects;
+        - "cache_bytes": size of the results held in memory by the live :class:`ResultCache` objects;
+        - "process_bytes": working set of the process.
+
+    Example
+    --------
+    >>> import euromod
+    >>> euromod.runtime_stats()["managed_bytes"]
+    """
+    stats = {"managed_bytes": int(GC.GetTotalMemory(False))}
+    for generation in range(GC.MaxGeneration + 1):
+        stats[f"gen{generation}_collections"] = int(GC.CollectionCount(generation))
+    stats["pinned_handles"] = _PinnedBuffer.count
+    stats["pinned_bytes"] = _PinnedBuffer.nbytes
+    stats["pool_bytes"] = sum(pool.nbytes for pool in list(BufferPool._instances))
+    stats["cache_bytes"] = sum(cache.nbytes for cache in list(ResultCache._instances))
+    stats["process_bytes"] = process_memory()
+    return stats
+
+
+def release_memory():
+    """
+    Release the memory held by the connector and the .NET runtime.
+
+    The arrays held by the live :class:`BufferPool` objects and the results held in memory by the live 
+    :class:`ResultCache` objects are dropped (the on-disk results are kept). Then a full Python garbage collection 
+    frees the pinned .NET arrays that are no longer viewed, and a full .NET garbage collection, 
+    compacting the large-object heap, returns the memory of the unused .NET arrays.
+
+    Returns
+    -------
+    :obj:`dict`
+        The metrics after the release, see :func:`runtime_stats`.
+
+    Example
+    --------
+    >>> import euromod
+    >>> euromod.release_memory()
+    """
+    for pool in list(BufferPool._instances):
+        pool.clear()
+    for cache in list(ResultCache._instances):
+        cache.clear()
+    gc.collect() # drops the NumPy views and so the GCHandles of the pinned arrays
+    GCSettings.LargeObjectHeapCompactionMode = GCLargeObjectHeapCompactionMode.CompactOnce
+    GC.Collect()
+    GC.WaitForPendingFinalizers()
+    GC.Collect()
+    return runtime_stats()
+
+
+def release_memory_above(memory_limit):
+    """
+    Call :func:`release_memory` when the working set of the process exceeds a limit.
+
+    Parameters
+    ----------
+    memory_limit : :obj:`int` or None
+        Limit in bytes. Nothing is done when it is :obj:`None`.
+
+    Returns
+    -------
+    :obj:`bool`
+        True if the memory was released.
+    """
+    if memory_limit is None or process_memory() <= memory_limit:
+        return False
+    release_memory()
+    return True
+
+
+_WORKER_MODELS = {}
+
+def worker_model(model_path):
+    """
+    Get the model of a worker process.
+
+    The model is loaded once per process and kept for the next jobs and chunks.
+
+    Parameters
+    ----------
+    model_path : :obj:`str`
+        Path to the EUROMOD project.
+
+    Returns
+    -------
+    :class:`Model`
+        The model of the process.
+    """
+    from core import Model
+    if model_path not in _WORKER_MODELS:
+        _WORKER_MODELS[model_path] = Model(model_path)
+    return _WORKER_MODELS[model_path]
+
+
+class PeakMemory:
+    """Peak working set of the process while a block of code runs, sampled in a background thread.
+
+    Parameters
+    ----------
+    interval : :obj:`float`, optional
+        Time between two samples, in seconds. Default is 0.01.
+
+    Example
+    --------
+    >>> with PeakMemory() as memory:
+    ...     out = mod['SL']['SL_1996'].run(data,'sl_demo_v4')
+    >>> memory.increase
+    """
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start = 0
+        """: Working set when the block started, in bytes."""
+        self.peak = 0
+        """: Peak working set during the block, in bytes."""
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, process_memory())
+
+    def __enter__(self):
+        self.start = self.peak = process_memory()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, process_memory())
+
+    @property
+    def increase(self):
+        """:obj:`int`: Peak working set above the working set when the block started, in bytes."""
+        return self.peak - self.start
@@ -0,0 +1,488 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+import io
+import json
+import queue
+import time
+import threading
+import multiprocessing
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+from utils.frames import get_columns
+from engines import InProcessEngine, EngineResult
+from shared import share_arrays, read_shared_arrays
+
+NPZ = "application/x-npz"
+ARROW = "application/vnd.apache.arrow.stream"
+
+
+def run_options(options):
+    """
+    Convert the JSON options of a run to the arguments of :func:`~System.run`.
+
+    Parameters
+    ----------
+    options : :obj:`dict`
+        Options of the run. The constants to overwrite are given as a :obj:`list` of ``[[name, group], value]`` pairs,
+        the addons as a :obj:`list` of ``[addon, system]`` pairs and the switches as a :obj:`list` of ``[extension, on]`` pairs.
+        Other options are passed as they are, e.g. "euro" or "nowarnings".
+
+    Returns
+    -------
+    :obj:`dict`
+        The arguments of :func:`~System.run`.
+    """
+    kwargs = dict(options)
+    if kwargs.get("constantsToOverwrite") is not None:
+        constants = kwargs["constantsToOverwrite"]
+        if isinstance(constants, dict):
+            constants = constants.items()
+        kwargs["constantsToOverwrite"] = {tuple(key): str(value) for key, value in constants}
+    for key in ("addons", "switches"):
+        if key in kwargs:
+            kwargs[key] = [tuple(x) for x in kwargs[key]]
+    for key in ("outputpath", "cache", "sink", "buffer_pool", "keep_in_memory", "output_format", "zero_copy"):
+        if key in kwargs:
+            raise ValueError(f"Option '{key}' is not supported.")
+    return kwargs
+
+
+def _worker_main(conn, model_path, countries):
+    ### worker process: load the model once, then run the jobs received on the connection
+    from core import Model
+    try:
+        model = Model(model_path)
+        for country in countries:
+            model[country]._load()
+    except Exception as e:
+        conn.send(f"{type(e).__name__}: {e}")
+        return
+    engine = InProcessEngine()
+    conn.send("ready")
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        country, system, dataset_id, data, options, parameters, edits, shared_outputs = job
+        try:
+            sys = model[country][system]
+            snap = sys.snapshot()
+            previous = sys._set_edits(edits)
+            try:
+                sys.set_parameters(parameters)
+                result = engine.run(sys, data, dataset_id, options)
+            finally:
+                sys.restore(snap, keep=False)
+                sys._set_edits(previous)
+            outputs, blocks = share_arrays(result.outputs) if shared_outputs else (result.outputs, [])
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+        else:
+            conn.send(("ok", result.success, outputs, result.errors, result.timings))
+            if shared_outputs:
+                try:
+                    conn.recv() # the blocks are kept open until the parent read them
+                except EOFError:
+                    return
+                finally:
+                    for shm in blocks:
+                        shm.close()
+        if hasattr(data, "close"): # unmap the shared input
+            data.close()
+        del job, data
+
+
+class _Worker:
+    ### worker process with the connection to it
+    def __init__(self, context, model_path, countries):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child, model_path, countries), daemon=True)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+        self.error = None
+
+    def wait_ready(self):
+        try:
+            message = self.conn.recv()
+        except EOFError:
+            message = "The worker process stopped."
+        if message != "ready":
+            self.error = message
+        return self.error is None
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class JobTimeout(Exception):
+    """Raised when a job is not finished within the timeout of the :class:`WorkerPool`."""
+
+
+class ServerBusy(Exception):
+    """Raised when a :class:`WorkerPool` has no room for another job."""
+
+
+class WorkerPool:
+    """Pool of warm worker processes running simulations.
+
+    Every worker loads the model, and the handlers of the preloaded countries, when it starts, 
+    and keeps them for all the jobs it runs.
+    A worker running a job beyond the timeout is killed and replaced by a new worker.
+
+    Parameters
+    ----------
+    model_path : :obj:`str`
+        Path to the EUROMOD project.
+    workers : :obj:`int`, optional
+        Number of worker processes. Default is 2.
+    countries : :obj:`list` [ :obj:`str` ], optional
+        Countries loaded by the workers when they start. Default is [].
+    timeout : :obj:`float`, optional
+        Maximum run time of a job in seconds. Default is 300.
+    max_queue : :obj:`int`, optional
+        Maximum number of jobs waiting for a worker. Further jobs are refused. Default is 2 times the number of workers.
+    max_jobs : :obj:`int`, optional
+        Number of jobs after which a worker is replaced, e.g. to release its memory. Default is :obj:`None`, i.e. never.
+    """
+    max_restarts = 3 #: number of workers failing to start in a row after which the jobs fail
+    def __init__(self, model_path, workers=2, countries=(), timeout=300, max_queue=None, max_jobs=None):
+        self.model_path = model_path
+        self.countries = list(countries)
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self.n_workers = workers
+        self.jobs = 0
+        """: Number of jobs run."""
+        self._context = multiprocessing.get_context()
+        self._idle = queue.Queue()
+        self._slots = threading.BoundedSemaphore(workers + (2*workers if max_queue is None else max_queue))
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._failures = 0
+        self._startup_error = None
+        for i in range(workers):
+            self._start_worker(wait=True)
+
+    def _start_worker(self, wait=False):
+        worker = _Worker(self._context, self.model_path, self.countries)
+        with self._lock:
+            self._workers.add(worker)
+        def ready():
+            if worker.wait_ready() and not self._closed:
+                self._failures = 0
+                self._startup_error = None
+                self._idle.put(worker)
+                return
+            self._discard(worker, kill=True)
+            if worker.error is not None and not self._closed:
+                self._failures += 1
+                if self._failures < self.max_restarts:
+                    self._start_worker()
+                else:
+                    self._startup_error = f"The worker processes failed to start: {worker.error}"
+        if wait:
+            ready()
+        else:
+            threading.Thread(target=ready, daemon=True).start()
+
+    def _wait_idle(self):
+        ### wait for an idle worker, within the timeout, unless no worker can start
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            if self._closed:
+                raise RuntimeError("The worker pool is closed.")
+            with self._lock:
+                if self._startup_error is not None and len(self._workers) == 0:
+                    raise RuntimeError(self._startup_error)
+            wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+            if wait <= 0:
+                raise ServerBusy(f"No worker was available within {self.timeout} seconds.")
+            try:
+                return self._idle.get(timeout=wait)
+            except queue.Empty:
+                pass
+
+    def _discard(self, worker, kill=False):
+        with self._lock:
+            self._workers.discard(worker)
+        worker.stop(kill)
+
+    def run(self, country, system, dataset_id, data, options=None, parameters=None, shared_outputs=False, wait=False, edits=None):
+        """
+        Run a simulation in a worker.
+
+        Parameters
+        ----------
+        country, system, dataset_id : :obj:`str`
+            Names of the country and of the system, and ID of the dataset.
+        data : :class:`SharedDataset` or :obj:`dict` [ :obj:`str`, :class:`numpy.ndarray` ]
+            Input data. A :class:`SharedDataset` is passed to the worker by name only.
+        options : :obj:`dict`, optional
+            Other arguments of :func:`~System.run` defining the run, e.g. as converted by :func:`run_options`.
+        parameters : :obj:`dict`, optional
+            Parameter values set in the system for the run, by identifier of the parameter in the system. 
+            They are restored after the run. Default is :obj:`None`.
+        shared_outputs : :obj:`bool`, optional
+            If True, the worker returns the outputs in shared memory instead of through the connection. Default is :obj:`False`.
+        wait : :obj:`bool`, optional
+            If True, the job waits for room in the queue instead of raising :class:`ServerBusy`. Default is :obj:`False`.
+        edits : :obj:`dict`, optional
+            Metadata of the country changed for the run, e.g. policy switches and parameter values, as a value by type of information 
+            (a name of ``ReadCountryOptions``), identifier and key. They are undone after the run. Default is :obj:`None`.
+
+        Raises
+        ------
+        ServerBusy
+            Is raised if the maximum number of waiting jobs is reached, or if no worker is available within the timeout.
+        JobTimeout
+            Is raised if the job is not finished within the timeout.
+        RuntimeError
+            Is raised if the run fails, or if the worker processes fail to start.
+
+        Returns
+        -------
+        EngineResult
+            The outputs and messages of the run.
+        """
+        if not self._slots.acquire(blocking=wait):
+            raise ServerBusy("Too many jobs are waiting for a worker.")
+        try:
+            worker = self._wait_idle()
+            try:
+                worker.conn.send((country, system, dataset_id, data, options or {}, parameters or {}, edits or {}, shared_outputs))
+                if not worker.conn.poll(self.timeout):
+                    self._discard(worker, kill=True)
+                    worker = None
+                    raise JobTimeout(f"The job did not finish within {self.timeout} seconds.")
+                result = worker.conn.recv()
+                if shared_outputs and result[0] == "ok":
+                    try:
+                        result = result[:2] + (read_shared_arrays(result[2]),) + result[3:]
+                    finally:
+                        worker.conn.send("read") # the worker can close the blocks
+            except (EOFError, OSError) as e:
+                self._discard(worker, kill=True)
+                worker = None
+                raise RuntimeError("The worker process stopped.") from e
+            finally:
+                if worker is not None:
+                    worker.jobs += 1
+                    if self.max_jobs is not None and worker.jobs >= self.max_jobs:
+                        self._discard(worker)
+                        worker = None
+                    else:
+                        self._idle.put(worker)
+                if worker is None and not self._closed:
+                    self._start_worker()
+            with self._lock:
+                self.jobs += 1
+        finally:
+            self._slots.release()
+        if result[0] == "error":
+            raise RuntimeError(result[1])
+        status, success, outputs, errors, timings = result
+        return EngineResult(success, outputs, errors, timings)
+
+    def stats(self):
+        """:obj:`dict`: Number of workers, idle workers and jobs run."""
+        return {"workers": len(self._workers), "idle": self._idle.qsize(), "jobs": self.jobs}
+
+    def close(self):
+        """Stop the workers."""
+        self._closed = True
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            self._discard(worker)
+
+
+def read_payload(body, content_type):
+    """
+    Read the input data of a request.
+
+    Parameters
+    ----------
+    body : :obj:`bytes`
+        Body of the request: a ``.npz`` file with one array per variable, or an Arrow IPC stream.
+    content_type : :obj:`str`
+        Content type of the body, "application/x-npz" or "application/vnd.apache.arrow.stream".
+
+    Returns
+    -------
+    :obj:`tuple`
+        The names and the columns of the numeric variables.
+    """
+    if content_type == ARROW:
+        import pyarrow as pa
+        names, columns, attrs = get_columns(pa.ipc.open_stream(body).read_all())
+        return names, columns
+    if content_type == NPZ:
+        with np.load(io.BytesIO(body), allow_pickle=False) as npz:
+            names, columns, attrs = get_columns({name: npz[name] for name in npz.files})
+        return names, columns
+    raise ValueError(f"Content type must be {NPZ} or {ARROW}.")
+
+
+def write_payload(outputs, errors, content_type, output=None):
+    """
+    Write the outputs of a run as the body of a response.
+
+    A ``.npz`` body contains the arrays "data_<i>" and "columns_<i>" for the i-th output, the output file-names in "names", 
+    and the messages of the run in "messages" and "warnings". An Arrow body contains a single output, 
+    the one named `output` or the first one.
+    """
+    if content_type == ARROW:
+        import pyarrow as pa
+        name = output if output is not None else next(iter(outputs))
+        arr, columns = outputs[name]
+        table = pa.table([pa.array(arr[:, j]) for j in range(arr.shape[1])], names=list(columns))
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    arrays = {}
+    for i, (name, (arr, columns)) in enumerate(outputs.items()):
+        arrays[f"data_{i}"] = arr
+        arrays[f"columns_{i}"] = np.array(columns, dtype=str)
+    arrays["names"] = np.array(list(outputs.keys()), dtype=str)
+    arrays["messages"] = np.array([message for message, isWarning in errors], dtype=str)
+    arrays["warnings"] = np.array([isWarning for message, isWarning in errors], dtype=bool)
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    pool = None
+    quiet = False
+
+    def _reply(self, status, body, content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self._reply(200, self.pool.stats())
+        else:
+            self._reply(404, {"error": "Not found."})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/run":
+            return self._reply(404, {"error": "Not found."})
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            content_type = self.headers.get("Content-Type", NPZ).split(";")[0].strip()
+            accept = self.headers.get("Accept", content_type)
+            accept = ARROW if ARROW in accept else NPZ
+            names, columns = read_payload(body, content_type)
+            options = run_options(json.loads(query.get("options", "{}")))
+            country, system, dataset_id = query["country"], query["system"], query["dataset"]
+        except (KeyError, ValueError) as e:
+            return self._reply(400, {"error": f"Invalid request: {e}"})
+        try:
+            result = self.pool.run(country, system, dataset_id, dict(zip(names, columns)), options)
+        except ServerBusy as e:
+            return self._reply(503, {"error": str(e)}, headers={"Retry-After": "1"})
+        except JobTimeout as e:
+            return self._reply(504, {"error": str(e)})
+        except RuntimeError as e:
+            return self._reply(500, {"error": str(e)})
+        if not result.success:
+            return self._reply(500, {"error": f"Simulation for system {system} with dataset {dataset_id} aborted with errors.", 
+                                     "messages": [message for message, isWarning in result.errors]})
+        outputs, errors, timings = result.outputs, result.errors, result.timings
+        if accept == ARROW and query.get("output") is not None and query["output"] not in outputs:
+            return self._reply(404, {"error": f"Output {query['output']} not found."})
+        self._reply(200, write_payload(outputs, errors, accept, query.get("output")), accept,
+                    {"X-Euromod-Outputs": json.dumps(list(outputs.keys())),
+                     "X-Euromod-Timings": json.dumps({phase: timing["seconds"] for phase, timing in timings.items()})})
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def serve(model_path, host="127.0.0.1", port=8765, workers=2, countries=(), timeout=300, max_queue=None, max_jobs=None, quiet=False):
+    """
+    Serve simulation requests over HTTP with a pool of warm worker processes.
+
+    The server answers:
+
+    - ``POST /run?country=<country>&system=<system>&dataset=<dataset ID>[&options=<JSON>][&output=<output file-name>]``
+      with the input data as a ``.npz`` file ("application/x-npz") or an Arrow IPC stream ("application/vnd.apache.arrow.stream").
+      The outputs are returned in the format of the "Accept" header, by default the format of the request, see :func:`write_payload`.
+      The options are the other arguments of :func:`~System.run`, see :func:`run_options`. 
+      The status is 503 when too many jobs are waiting or no worker is available within the timeout, 504 when the job exceeds the timeout and 500 when the run fails.
+    - ``GET /health`` with the number of workers, idle workers and jobs run.
+
+    Parameters
+    ----------
+    model_path : :obj:`str`
+        Path to the EUROMOD project.
+    host : :obj:`str`, optional
+        Address on which the server listens. Default is "127.0.0.1", i.e. local requests only.
+    port : :obj:`int`, optional
+        Port of the server. Default is 8765.
+    workers, countries, timeout, max_queue, max_jobs
+        See :class:`WorkerPool`.
+    quiet : :obj:`bool`, optional
+        If True, the requests are not logged. Default is :obj:`False`.
+
+    Example
+    --------
+    >>> euromod serve --model "C:\\EUROMOD_RELEASES_I6.0+" --workers 4 --countries SL BE
+    """
+    pool = WorkerPool(model_path, workers, countries, timeout, max_queue, max_jobs)
+    handler = type("Handler", (_Handler,), {"pool": pool, "quiet": quiet})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+    print(f"Serving EUROMOD simulations on http://{host}:{httpd.server_address[1]} with {workers} workers.")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        pool.close()
@@ -0,0 +1,203 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+from utils.frames import get_columns
+
+
+def _attach(name):
+    ### attach to an existing block without registering it to the resource tracker when possible (Python 3.13+),
+    ### so that a worker never unlinks the block of the parent
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _create(size):
+    ### create a block that is released by the process reading it, see :func:`read_shared_arrays`
+    try:
+        return shared_memory.SharedMemory(create=True, size=size, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def share_arrays(outputs):
+    """
+    Copy simulation outputs to blocks of shared memory, to pass them to another process.
+
+    The blocks are released by the process reading them with :func:`read_shared_arrays`. 
+    This process must keep its handles of the blocks open until they are read, since on Windows
+    a block is destroyed when its last handle is closed.
+
+    Parameters
+    ----------
+    outputs : :obj:`dict`
+        A tuple of the output array and the list of output variables, by output file-name.
+
+    Returns
+    -------
+    :obj:`tuple`
+        A :obj:`dict` with a tuple of the name of the block, the shape and type of the array, and the list of output variables, by output file-name,
+        and the list of the blocks, to close once the other process read them.
+    """
+    shared = {}
+    blocks = []
+    for key, (arr, columns) in outputs.items():
+        shm = _create(max(1, arr.nbytes))
+        blocks.append(shm)
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        shared[key] = (shm.name, arr.shape, arr.dtype.str, list(columns))
+    return shared, blocks
+
+
+def read_shared_arrays(shared):
+    """Copy the simulation outputs written by :func:`share_arrays` from shared memory, and release the blocks."""
+    outputs = {}
+    for key, (name, shape, dtype, columns) in shared.items():
+        shm = _attach(name)
+        try:
+            outputs[key] = (np.ndarray(shape, dtype=dtype, buffer=shm.buf).copy(), columns)
+        finally:
+            shm.close()
+            shm.unlink()
+    return outputs
+
+
+class SharedDataset:
+    """Input dataset published once in shared memory for the worker processes.
+
+    The numeric variables of the data are copied once to a block of shared memory,
+    with the values of every variable stored contiguously (variable-major ``float64``).
+    A :class:`SharedDataset` is passed to worker processes by name only: unpickling it maps the block,
+    and its columns are read-only views of the block that are copied straight into the .NET input array of the model.
+    The memory therefore scales with the number of datasets, not with the number of workers.
+
+    A :class:`SharedDataset` can be passed as `data` to :func:`~System.run`. Slicing it by rows, e.g. ``dataset[a:b]``,
+    gives a :class:`SharedDataset` on the same block.
+
+    The process creating the dataset owns the block and must release it with :func:`unlink`, 
+    or by using the dataset as a context manager.
+
+    Parameters
+    ----------
+    data : :class:`pandas.DataFrame`, :class:`pyarrow.Table`, :class:`polars.DataFrame` or :obj:`dict` [ :obj:`str`, :class:`numpy.ndarray` ]
+        Input data. Only the numeric variables are published.
+    attrs : :obj:`dict`, optional
+        Attributes of the data, e.g. the dataset ID and path as set by :func:`~Country.load_data`.
+        Default is the attributes of a :class:`pandas.DataFrame`.
+
+    Example
+    --------
+    >>> from euromod import SharedDataset
+    >>> from concurrent.futures import ProcessPoolExecutor
+    >>> with SharedDataset(mod['SL'].load_data('sl_demo_v4')) as data, ProcessPoolExecutor(4) as pool:
+    ...     results = list(pool.map(run_system, systems, [data]*len(systems)))
+    """
+    def __init__(self, data, attrs=None):
+        names, columns, data_attrs = get_columns(data)
+        self.names = names
+        """: Names of the variables."""
+        self.attrs = {**data_attrs, **(attrs or {})}
+        """: Attributes of the data."""
+        self._rows = len(columns[0]) if len(columns) > 0 else 0
+        self._start, self._stop = 0, self._rows
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, len(names)*self._rows*8))
+        self._owner = True
+        block = self._block()
+        for i, column in enumerate(columns):
+            block[i] = column
+        del block
+
+    def _block(self):
+        return np.ndarray((len(self.names), self._rows), dtype=np.float64, buffer=self._shm.buf)
+
+    @property
+    def name(self):
+        """:obj:`str`: Name of the shared memory block."""
+        return self._shm.name
+
+    @property
+    def nbytes(self):
+        """:obj:`int`: Size of the rows of the dataset in bytes."""
+        return len(self.names)*len(self)*8
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def columns(self):
+        """
+        Get the variables.
+
+        Returns
+        -------
+        :obj:`list` [ :class:`numpy.ndarray` ]
+            A read-only view of the rows of the dataset for every variable.
+        """
+        block = self._block()
+        block.flags.writeable = False
+        return [block[i, self._start:self._stop] for i in range(len(self.names))]
+
+    def to_dict(self):
+        """:obj:`dict` [ :obj:`str`, :class:`numpy.ndarray` ]: The read-only views of the variables, by name."""
+        return dict(zip(self.names, self.columns()))
+
+    def __getitem__(self, rows):
+        if not isinstance(rows, slice) or rows.step not in (None, 1):
+            raise TypeError("A SharedDataset can only be sliced by a range of rows.")
+        start, stop, step = rows.indices(len(self))
+        view = SharedDataset.__new__(SharedDataset)
+        view.__setstate__(self.__getstate__())
+        view._start, view._stop = self._start + start, self._start + max(start, stop)
+        return view
+
+    def __getstate__(self):
+        return {"name": self._shm.name, "names": self.names, "attrs": self.attrs,
+                "rows": self._rows, "start": self._start, "stop": self._stop}
+
+    def __setstate__(self, state):
+        self.names = state["names"]
+        self.attrs = state["attrs"]
+        self._rows, self._start, self._stop = state["rows"], state["start"], state["stop"]
+        self._shm = _attach(state["name"])
+        self._owner = False
+
+    def close(self):
+        """Unmap the block from this process. The views returned by :func:`columns` must not be used afterwards."""
+        try:
+            self._shm.close()
+        except BufferError: # views still exist, the block is unmapped when they are garbage-collected
+            pass
+
+    def unlink(self):
+        """Release the block of shared memory. Only the process that created the dataset can release it."""
+        self.close()
+        if self._owner:
+            self._shm.unlink()
+            self._owner = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
+
+    def __repr__(self):
+        return f"SharedDataset {self.name} with {len(self.names)} variables and {len(self)} observations"
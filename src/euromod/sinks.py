@@ -0,0 +1,250 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+import os
+import struct
+import numpy as np
+import pandas as pd
+
+
+class Sink:
+    """Destination of the simulation outputs.
+
+    The outputs are passed to :func:`write` or :func:`write_array`, in the order of the chunks for chunked runs.
+    :func:`close` is called once all outputs of a run are written.
+    """
+    def write(self, name, df, chunk, scenario=None):
+        """
+        Write a simulation output.
+
+        Parameters
+        ----------
+        name : :obj:`str`
+            File-name of the simulation output.
+        df : :class:`pandas.DataFrame`
+            Simulation output.
+        chunk : :obj:`int`
+            Index of the chunk.
+        scenario : :obj:`str`, optional
+            Name of the scenario the output belongs to. Default is :obj:`None`.
+        """
+        raise NotImplementedError
+    def write_array(self, name, arr, columns, chunk=0, scenario=None):
+        """
+        Write a simulation output from an array, without building a :class:`pandas.DataFrame` when possible.
+
+        Parameters
+        ----------
+        name : :obj:`str`
+            File-name of the simulation output.
+        arr : :class:`numpy.ndarray`
+            Simulation output with one column per variable.
+        columns : :obj:`list` [ :obj:`str` ]
+            Names of the output variables.
+        chunk : :obj:`int`, optional
+            Index of the chunk. Default is 0.
+        scenario : :obj:`str`, optional
+            Name of the scenario the output belongs to. Default is :obj:`None`.
+        """
+        self.write(name, pd.DataFrame(arr, columns=columns, copy=False), chunk, scenario)
+    def close(self):
+        """
+        Finish writing the outputs.
+
+        Returns
+        -------
+        :obj:`dict`
+            A :obj:`dict` with the outputs kept in memory, by output file-name.
+        """
+        return {}
+
+
+class MemorySink(Sink):
+    """Sink concatenating the outputs of the chunks in memory."""
+    def __init__(self):
+        self._frames = {}
+    def write(self, name, df, chunk, scenario=None):
+        self._frames.setdefault(name, []).append(df)
+    def close(self):
+        outputs = {name: pd.concat(frames, ignore_index=True) for name, frames in self._frames.items()}
+        self._frames = {}
+        return outputs
+
+
+class CallbackSink(Sink):
+    """Sink passing every output to a function.
+
+    Parameters
+    ----------
+    callback : callable
+        Function called as ``callback(name, df, chunk)`` for every output of every chunk.
+    """
+    def __init__(self, callback):
+        self.callback = callback
+    def write(self, name, df, chunk, scenario=None):
+        self.callback(name, df, chunk)
+
+
+class FileSink(Sink):
+    """Base class of the sinks writing the outputs to files.
+
+    The files of an output are written to ``<path>/<scenario>/``, or to ``<path>/``
+    when no scenario is given.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Folder of the output files. It is created if it does not exist.
+    """
+    _extension = ""
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        """: A :obj:`dict` with the path of the written files, by tuple of scenario and output file-name."""
+        os.makedirs(path, exist_ok=True)
+    def _file(self, name, scenario):
+        folder = self.path if scenario is None else os.path.join(self.path, scenario)
+        os.makedirs(folder, exist_ok=True)
+        fname = os.path.join(folder, os.path.splitext(name)[0] + self._extension)
+        self.files[(scenario, name)] = fname
+        return fname
+    def write(self, name, df, chunk, scenario=None):
+        self.write_array(name, df.to_numpy(np.float64), list(df.columns), chunk, scenario)
+
+
+def _import_pyarrow(sink):
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(f"{sink} requires the package 'pyarrow'.") from e
+    return pyarrow
+
+
+def _arrow_table(pa, arr, columns):
+    ### one Arrow column per output variable, without building a DataFrame
+    return pa.table([pa.array(arr[:, j]) for j in range(arr.shape[1])], names=[str(x) for x in columns])
+
+
+class ParquetSink(FileSink):
+    """Sink writing the outputs to Parquet files.
+
+    Every output is written to a file ``<output file-name>.parquet`` to which the chunks
+    are appended as row groups. This requires the package ``pyarrow``.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Folder of the Parquet files. It is created if it does not exist.
+    """
+    _extension = ".parquet"
+    def __init__(self, path):
+        _import_pyarrow("ParquetSink")
+        super().__init__(path)
+        self._writers = {}
+    def write_array(self, name, arr, columns, chunk=0, scenario=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = _arrow_table(pa, arr, columns)
+        if (scenario, name) not in self._writers:
+            self._writers[(scenario, name)] = pq.ParquetWriter(self._file(name, scenario), table.schema)
+        self._writers[(scenario, name)].write_table(table)
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+        return {}
+
+
+class FeatherSink(FileSink):
+    """Sink writing the outputs to Feather (Arrow IPC) files.
+
+    Every output is written to a file ``<output file-name>.feather`` to which the chunks
+    are appended as record batches. This requires the package ``pyarrow``.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Folder of the Feather files. It is created if it does not exist.
+    """
+    _extension = ".feather"
+    def __init__(self, path):
+        _import_pyarrow("FeatherSink")
+        super().__init__(path)
+        self._writers = {}
+    def write_array(self, name, arr, columns, chunk=0, scenario=None):
+        import pyarrow as pa
+        table = _arrow_table(pa, arr, columns)
+        if (scenario, name) not in self._writers:
+            self._writers[(scenario, name)] = pa.ipc.new_file(self._file(name, scenario), table.schema)
+        self._writers[(scenario, name)].write_table(table)
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+        return {}
+
+
+_NPY_HEADER_LEN = 128
+
+def _npy_header(dtype, n):
+    ### fixed-size header of a 1-dimensional .npy file, so that it can be rewritten when rows are appended
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (np.dtype(dtype).str, n)
+    header = header.ljust(_NPY_HEADER_LEN - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class NpySink(FileSink):
+    """Sink writing every output variable to a ``.npy`` file.
+
+    The variables of an output are written to the folder ``<output file-name>``,
+    one file ``<variable>.npy`` per variable, to which the chunks are appended.
+    The files can be memory-mapped with ``numpy.load(..., mmap_mode="r")``.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Folder of the output files. It is created if it does not exist.
+    """
+    def __init__(self, path):
+        super().__init__(path)
+        self._rows = {}
+    def write_array(self, name, arr, columns, chunk=0, scenario=None):
+        folder = self._file(name, scenario)
+        os.makedirs(folder, exist_ok=True)
+        key = (scenario, name)
+        new = key not in self._rows
+        n = 0 if new else self._rows[key]
+        for j, column in enumerate(columns):
+            col = np.ascontiguousarray(arr[:, j])
+            with open(os.path.join(folder, f"{column}.npy"), "wb" if new else "r+b") as f:
+                f.write(_npy_header(col.dtype, n + len(col)))
+                f.seek(0, os.SEEK_END)
+                f.write(col.tobytes())
+        self._rows[key] = n + arr.shape[0]
+    def close(self):
+        self._rows = {}
+        return {}
+
+
+def get_sink(sink):
+    ### sink object from the argument of a chunked run
+    if sink is None:
+        return MemorySink()
+    if isinstance(sink, Sink):
+        return sink
+    if callable(sink):
+        return CallbackSink(sink)
+    raise TypeError("Parameter 'sink' must be a Sink object or a callable.")
@@ -0,0 +1,483 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+import os
+import hashlib
+import sqlite3
+import pandas as pd
+from container import Container
+
+SNAPSHOT_VERSION = "2"
+
+### types of information stored in the snapshot, named after the ReadCountryOptions
+COUNTRY_TYPES = ("SYS", "DATA", "LOCAL_EXTENSION", "POL", "REFPOL", "FUN", "PAR",
+                 "SYS_POL", "SYS_FUN", "SYS_PAR", "SYS_DATA",
+                 "EXTENSION_POL", "EXTENSION_FUN", "EXTENSION_PAR", "EXTENSION_SWITCH")
+MODEL_COUNTRY = "" # country label used for the model-level information (e.g. extensions)
+
+
+def model_fingerprint(model_path):
+    """
+    Fingerprint of the XMLParam folder of a EUROMOD project.
+
+    The fingerprint changes whenever a file in the folder is added, removed or modified.
+
+    Parameters
+    ----------
+    model_path : :obj:`str`
+        Path to the EUROMOD project.
+
+    Returns
+    -------
+    :obj:`str`
+        Hexadecimal digest of the names, sizes and modification times of the files.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    root = os.path.join(model_path, "XMLParam")
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            st = os.stat(os.path.join(dirpath, fname))
+            relpath = os.path.relpath(os.path.join(dirpath, fname), root)
+            digest.update(f"{relpath}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def write_snapshot(path, model_path, rows):
+    """
+    Write the model metadata to a snapshot file.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Path of the snapshot file. An existing file is replaced.
+    model_path : :obj:`str`
+        Path to the EUROMOD project the metadata was read from.
+    rows : iterable
+        Iterable of ``(country, type, id, info)`` tuples where ``info`` is a :obj:`dict`.
+    """
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    con = sqlite3.connect(tmp_path)
+    try:
+        con.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        columns = {}
+        for country, typ, id, info in rows:
+            if typ not in columns:
+                con.execute(f"CREATE TABLE {_quote(typ)} (_country TEXT, _id TEXT)") # column names are case-insensitive, the info has an ID key
+                con.execute(f"CREATE INDEX {_quote('idx_' + typ)} ON {_quote(typ)} (_country)")
+                columns[typ] = set()
+            for key in info.keys() - columns[typ]:
+                con.execute(f"ALTER TABLE {_quote(typ)} ADD COLUMN {_quote(key)} TEXT")
+                columns[typ].add(key)
+            keys = list(info.keys())
+            con.execute(f"INSERT INTO {_quote(typ)} (_country, _id{''.join(', ' + _quote(k) for k in keys)}) "
+                        f"VALUES (?, ?{', ?' * len(keys)})", [country, id] + [info[k] for k in keys])
+        meta = {"version": SNAPSHOT_VERSION,
+                "model_path": os.path.abspath(model_path),
+                "fingerprint": model_fingerprint(model_path)}
+        con.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp_path, path)
+
+
+def read_meta(path):
+    """Read the meta information (version, model_path and fingerprint) of a snapshot file."""
+    con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return dict(con.execute("SELECT key, value FROM meta").fetchall())
+    finally:
+        con.close()
+
+
+def is_stale(path):
+    """
+    Check whether a snapshot is out of date with respect to its EUROMOD project.
+
+    A snapshot is stale when the XMLParam files of the project changed after the snapshot was written.
+    When the project is not available on this device, the snapshot is considered up to date.
+    """
+    meta = read_meta(path)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        return True
+    model_path = meta.get("model_path", "")
+    if not os.path.isdir(os.path.join(model_path, "XMLParam")):
+        return False
+    return model_fingerprint(model_path) != meta.get("fingerprint")
+
+
+class SnapshotElement:
+    """Read-only element of a model snapshot.
+
+    The attributes of the element are the ones of the corresponding element of the
+    :class:`Model`. System-specific elements fall back on the attributes of
+    their country-level element.
+    """
+    def __init__(self, info, parent, base=None):
+        self.__dict__.update(info)
+        self.parent = parent
+        self._base = base
+    def __getattr__(self, name):
+        base = self.__dict__.get("_base")
+        if base is not None:
+            return getattr(base, name)
+        raise AttributeError(f"Attribute with name {name} not found.")
+    def get_properties(self):
+        properties = {x for x in self.__dict__ if not x.startswith("_") and x not in ["parent"]}
+        if self._base is not None:
+            properties |= set(self._base.get_properties())
+        return sorted(properties)
+    def __repr__(self):
+        rep = "-"*30 + "\n"
+        rep += self.__class__.__name__ + "\n"
+        rep += "-"*30 + "\n"
+        for el in self.get_properties():
+            attr = getattr(self, el)
+            attr_repr = attr._short_repr() if hasattr(attr, "_short_repr") else repr(attr)
+            rep += f"\t {el}: {attr_repr}\n"
+        return rep
+    def _short_repr(self):
+        return f"{self.name}"
+    def _container_begin_repr(self):
+        return f"{self.name}"
+    def _container_middle_repr(self):
+        if "value" in self.__dict__:
+            return f"{self.value}"
+        if "switch" in self.__dict__:
+            return f"{self.switch}"
+        if self.__dict__.get("bestMatch") == "yes":
+            return "best match"
+        return ""
+    def _container_end_repr(self):
+        comment = getattr(self, "comment", "") or ""
+        return comment if len(comment) < 50 else comment[:50] + " ..."
+
+
+class ExtensionSwitchSnapshot(SnapshotElement):
+    """Extension switch set for a policy, function or parameter."""
+    def _short_repr(self):
+        state = "on" if self.baseOff == "false" else "off"
+        return f"ExtensionSwitch {self._base.name}: {state}"
+
+
+class SystemSnapshot(SnapshotElement):
+    """Read-only EUROMOD system of a model snapshot.
+
+    The :obj:`policies` contain the system-specific values of the policies,
+    functions and parameters, ordered as in the spine of the system.
+    """
+    def __getattr__(self, name):
+        if name in ("policies", "datasets", "bestmatch_datasets"):
+            self._build()
+            return self.__dict__[name]
+        return super().__getattr__(name)
+
+    def _build(self):
+        ctry = self.parent
+        self.datasets = Container()
+        self.bestmatch_datasets = Container()
+        for dataset in ctry.datasets:
+            info = ctry._info["SYS_DATA"].get(self.ID + dataset.ID)
+            if info is None:
+                continue
+            el = SnapshotElement(info, self, dataset)
+            self.datasets.add(self.ID + dataset.ID, el)
+            if el.bestMatch == "yes":
+                self.bestmatch_datasets.add(dataset.name, el)
+
+        def _order(info):
+            return int(info.get("order", 0) or 0)
+        self.policies = Container()
+        pols = []
+        for pol in ctry.policies:
+            info = ctry._info["SYS_POL"].get(self.ID + pol.ID, {})
+            pols.append((info, pol))
+        pols.sort(key=lambda x: _order(x[0]))
+        for polinfo, pol in pols:
+            syspol = SnapshotElement(polinfo, self, pol)
+            syspol.functions = Container()
+            funs = [(ctry._info["SYS_FUN"].get(self.ID + fun.ID, {}), fun) for fun in pol.functions]
+            funs.sort(key=lambda x: _order(x[0]))
+            for funinfo, fun in funs:
+                sysfun = SnapshotElement(funinfo, syspol, fun)
+                sysfun.parameters = Container()
+                pars = [(ctry._info["SYS_PAR"].get(self.ID + par.ID, {}), par) for par in fun.parameters]
+                pars.sort(key=lambda x: _order(x[0]))
+                for parinfo, par in pars:
+                    sysfun.parameters.add(self.ID + par.ID, SnapshotElement(parinfo, sysfun, par))
+                syspol.functions.add(self.ID + fun.ID, sysfun)
+            self.policies.add(self.ID + pol.ID, syspol)
+
+    def parameter_values(self):
+        """
+        Get the values of all parameters in the system.
+
+        Returns
+        -------
+        :class:`pandas.DataFrame`
+            One row per parameter with the policy, function and parameter names and the parameter value, indexed by the parameter identifier.
+        """
+        records = []
+        for pol in self.policies:
+            for fun in pol.functions:
+                for par in fun.parameters:
+                    records.append((par._base.ID, pol.name, fun.name, par.name, getattr(par, "group", ""), getattr(par, "value", "")))
+        return pd.DataFrame(records, columns=["parID", "policy", "function", "parameter", "group", "value"]).set_index("parID")
+
+    def diff(self, other):
+        """
+        Compare the parameter values with the ones of another system.
+
+        Parameters
+        ----------
+        other : :class:`SystemSnapshot`
+            System to compare with. This can be a system of the same snapshot or of another snapshot.
+
+        Returns
+        -------
+        :class:`pandas.DataFrame`
+            Parameters of which the value differs, or which exist in only one of the systems.
+            The columns are suffixed with the system names, or with "left" and "right" if both systems have the same name.
+        """
+        names = (self.name, other.name) if self.name != other.name else ("left", "right")
+        left = self.parameter_values()
+        right = other.parameter_values()
+        joined = left.join(right, how="outer", lsuffix="_" + names[0], rsuffix="_" + names[1])
+        value_left = joined["value_" + names[0]]
+        value_right = joined["value_" + names[1]]
+        return joined[value_left.ne(value_right) & ~(value_left.isna() & value_right.isna())]
+
+    def _short_repr(self):
+        return f"{self.name}"
+
+
+class CountrySnapshot(SnapshotElement):
+    """Read-only country model of a model snapshot.
+
+    The information of the country is read from the snapshot file the first time it is accessed.
+    """
+    def __init__(self, name, model):
+        self.name = name
+        self.parent = model
+        self.model = model
+        self._base = None
+        self._loaded = False
+
+    def __getattr__(self, name):
+        if name in ("systems", "datasets", "policies", "local_extensions", "extensions") and not self.__dict__.get("_loaded"):
+            self._load()
+            return self.__dict__[name]
+        return super().__getattr__(name)
+
+    def _load(self):
+        self._info = self.model._read_country(self.name)
+        info = self._info
+        self.local_extensions = Container(True)
+        for ext in info["LOCAL_EXTENSION"].values():
+            el = SnapshotElement(ext, self)
+            self.local_extensions.add(el.shortName, el, el.ID)
+        self.extensions = self.local_extensions + self.model.extensions
+
+        self.systems = Container(True)
+        for sys in sorted(info["SYS"].values(), key=lambda x: int(x.get("order", 0) or 0)):
+            el = SystemSnapshot(sys, self)
+            self.systems.add(el.name, el, el.ID)
+        self.datasets = Container(True)
+        for data in info["DATA"].values():
+            el = SnapshotElement(data, self)
+            self.datasets.add(el.name, el, el.ID)
+
+        last_sys = self.systems[-1].ID if len(self.systems) > 0 else ""
+        first_sys = self.systems[0].ID if len(self.systems) > 0 else ""
+        funs_by_pol, pars_by_fun = {}, {}
+        for fun in info["FUN"].values():
+            funs_by_pol.setdefault(fun.get("polID"), []).append(fun)
+        for par in info["PAR"].values():
+            pars_by_fun.setdefault(par.get("funID"), []).append(par)
+
+        self.policies = Container()
+        for pol in info["POL"].values():
+            el = self._spine_element(pol, self, "EXTENSION_POL", info["SYS_POL"].get(last_sys + pol["ID"], {}))
+            el.functions = Container()
+            for fun in funs_by_pol.get(pol["ID"], []):
+                funel = self._spine_element(fun, el, "EXTENSION_FUN", info["SYS_FUN"].get(first_sys + fun["ID"], {}))
+                funel.parameters = Container()
+                for par in pars_by_fun.get(fun["ID"], []):
+                    parel = self._spine_element(par, funel, "EXTENSION_PAR", info["SYS_PAR"].get(first_sys + par["ID"], {}))
+                    funel.parameters.add(parel.ID, parel)
+                funel.parameters.containerList.sort(key=lambda x: int(x.order))
+                el.functions.add(funel.ID, funel)
+            el.functions.containerList.sort(key=lambda x: int(x.order))
+            self.policies.add(el.ID, el)
+        for refpol in info["REFPOL"].values():
+            el = self._spine_element(refpol, self, "EXTENSION_POL", info["SYS_POL"].get(last_sys + refpol["ID"], {}))
+            el.name = info["POL"].get(refpol.get("refPolID"), {}).get("name", "")
+            el.functions = Container()
+            self.policies.add(el.ID, el)
+        self.policies.containerList.sort(key=lambda x: int(x.order))
+        self._loaded = True
+
+    def _spine_element(self, info, parent, extension_type, sysinfo):
+        el = SnapshotElement(info, parent)
+        el.order = sysinfo.get("order", "0") or "0"
+        el.extensions = Container()
+        for ext in self.extensions:
+            link = self._info[extension_type].get(el.ID + ext.ID)
+            if link is not None:
+                el.extensions.add(el.ID + ext.ID, ExtensionSwitchSnapshot(link, el, ext))
+        return el
+
+    def get_switch_value(self):
+        """
+        Get the configuration of all extension switches of the country.
+
+        Returns
+        -------
+        :class:`pandas.DataFrame`
+            One row per switch that is explicitly set 'on' or 'off' with the extension, dataset and system names.
+        """
+        records = []
+        for switch in self._info["EXTENSION_SWITCH"].values():
+            ext = self.extensions._get_by_id(switch["extensionID"])
+            data = self.datasets._get_by_id(switch["dataID"])
+            sys = self.systems._get_by_id(switch["sysID"])
+            records.append((ext.shortName, data.name, sys.name, switch.get("value", "")))
+        return pd.DataFrame(records, columns=["extension", "dataset", "system", "value"])
+
+    def __getitem__(self, system):
+        return self.systems[system]
+
+    def _short_repr(self):
+        return f"Country {self.name}"
+    def _container_middle_repr(self):
+        return ""
+    def _container_end_repr(self):
+        return ""
+
+
+class ModelSnapshot(SnapshotElement):
+    """Read-only EUROMOD model read from a snapshot file.
+
+    The snapshot offers browsing, searching and comparison of the countries, systems,
+    policies, functions and parameters without starting the EUROMOD software.
+    Snapshots are written with :func:`~Model.save_snapshot` and opened with :func:`open_snapshot` or :func:`~Model.from_snapshot`.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Path to the snapshot file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._base = None
+        self.parent = None
+        meta = read_meta(path)
+        self.model_path = meta["model_path"]
+        self.fingerprint = meta["fingerprint"]
+        self.extensions = Container(True)
+        for ext in self._read_type(MODEL_COUNTRY, "EXTENSIONS").values():
+            el = SnapshotElement(ext, self)
+            self.extensions.add(el.shortName, el, el.ID)
+        self.countries = Container()
+        for country in sorted({x["_country"] for x in self._read_countries()}):
+            self.countries.add(country, CountrySnapshot(country, self))
+
+    def _connect(self):
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+
+    def _read_countries(self):
+        con = self._connect()
+        con.row_factory = sqlite3.Row
+        try:
+            return con.execute('SELECT DISTINCT _country FROM "SYS"').fetchall()
+        except sqlite3.OperationalError: # snapshot without countries
+            return []
+        finally:
+            con.close()
+
+    def _read_type(self, country, typ, con=None):
+        own_con = con is None
+        con = self._connect() if own_con else con
+        try:
+            cur = con.execute(f"SELECT * FROM {_quote(typ)} WHERE _country = ?", (country,))
+            names = [x[0] for x in cur.description]
+            rows = {}
+            for row in cur:
+                rows[row[1]] = {k: v for k, v in zip(names[2:], row[2:]) if v is not None}
+            return rows
+        except sqlite3.OperationalError: # type not present in the snapshot
+            return {}
+        finally:
+            if own_con:
+                con.close()
+
+    def _read_country(self, country):
+        con = self._connect()
+        try:
+            return {typ: self._read_type(country, typ, con) for typ in COUNTRY_TYPES}
+        finally:
+            con.close()
+
+    def is_stale(self):
+        """:obj:`bool`: True if the XMLParam files of the EUROMOD project changed since the snapshot was written."""
+        return is_stale(self.path)
+
+    def __getitem__(self, country):
+        return self.countries[country]
+
+    def __repr__(self):
+        return f"ModelSnapshot of {self.model_path} ({len(self.countries)} countries)"
+
+
+def open_snapshot(path, rebuild=True):
+    """
+    Open a snapshot of the model metadata for read-only browsing, see :func:`~Model.from_snapshot`.
+
+    Unlike :func:`~Model.from_snapshot`, this function is available from ``import euromod`` without loading 
+    pythonnet and the EUROMOD assemblies. They are only loaded when a stale snapshot is rebuilt.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Path of the snapshot file written by :func:`~Model.save_snapshot`.
+    rebuild : :obj:`bool`, optional
+        If True, a snapshot of which the XMLParam files of the EUROMOD project changed 
+        is rebuilt from the project before it is opened. If False, an exception is raised instead. Default is :obj:`True`.
+
+    Returns
+    -------
+    ModelSnapshot
+        The read-only model.
+
+    Example
+    --------
+    >>> import euromod
+    >>> snap=euromod.open_snapshot("C:\\temp\\euromod.snapshot")
+    """
+    if is_stale(path):
+        if not rebuild:
+            raise Exception(f"Snapshot {path} is out of date with respect to its EUROMOD project.")
+        from core import Model
+        snap = ModelSnapshot(path)
+        Model(snap.model_path).save_snapshot(path, list(snap.countries.keys()))
+    return ModelSnapshot(path)
@@ -0,0 +1,158 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+_TRACER = None
+
+
+class Tracer:
+    """Recorder of the spans of a workload in the Chrome trace-event format.
+
+    The spans are recorded as complete events ("ph": "X") with the process and thread identifiers,
+    so that every worker process and thread is shown on its own track. The file written by :func:`save` 
+    can be opened in Perfetto (https://ui.perfetto.dev) or in ``chrome://tracing``.
+
+    Parameters
+    ----------
+    process_name : :obj:`str`, optional
+        Name of the track of the process recording the spans. Default is "euromod".
+    """
+    def __init__(self, process_name="euromod"):
+        self.process_name = process_name
+        self.events = []
+        """: A :obj:`list` with the recorded trace events."""
+        self._lock = threading.Lock()
+        self._named = set()
+
+    def _name_process(self):
+        pid = os.getpid()
+        if pid not in self._named:
+            self._named.add(pid)
+            self.events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": self.process_name}})
+
+    def add(self, name, start, seconds, cat="euromod", **args):
+        """
+        Record a span.
+
+        Parameters
+        ----------
+        name : :obj:`str`
+            Name of the span.
+        start : :obj:`float`
+            Start time, as returned by :func:`time.time`.
+        seconds : :obj:`float`
+            Duration of the span.
+        cat : :obj:`str`, optional
+            Category of the span. Default is "euromod".
+        **args
+            Information shown with the span.
+        """
+        event = {"name": name, "cat": cat, "ph": "X", "ts": start*1e6, "dur": seconds*1e6,
+                 "pid": os.getpid(), "tid": threading.get_ident(), "args": {k: _jsonable(v) for k, v in args.items()}}
+        with self._lock:
+            self._name_process()
+            self.events.append(event)
+
+    def merge(self, events):
+        """Add the events recorded by another tracer, e.g. in a worker process."""
+        with self._lock:
+            for event in events:
+                if event["ph"] == "M":
+                    if event["pid"] in self._named:
+                        continue
+                    self._named.add(event["pid"])
+                self.events.append(event)
+
+    def save(self, path):
+        """Write the events to a Chrome trace-event JSON file."""
+        with self._lock:
+            trace = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        with open(path, "w") as f:
+            json.dump(trace, f)
+
+
+def _jsonable(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def get_tracer():
+    """Get the active :class:`Tracer`, or :obj:`None` when no trace is recorded."""
+    return _TRACER
+
+
+def set_tracer(tracer):
+    ### activate a tracer, e.g. in a worker process, and return the previous one
+    global _TRACER
+    previous = _TRACER
+    _TRACER = tracer
+    return previous
+
+
+@contextmanager
+def span(name, cat="euromod", **args):
+    """Record the code within the scope as a span of the active :class:`Tracer`. Nothing is recorded when no trace is active."""
+    if _TRACER is None:
+        yield
+        return
+    start = time.time()
+    try:
+        yield
+    finally:
+        tracer = _TRACER
+        if tracer is not None:
+            tracer.add(name, start, time.time() - start, cat, **args)
+
+
+@contextmanager
+def trace(path):
+    """
+    Record a trace of the workload within the scope and write it to a Chrome trace-event JSON file.
+
+    The trace contains spans for the country loading and translation, the phases of every run, 
+    i.e. input conversion ("to_net"), model run ("engine"), output conversion ("to_numpy", "outputs") 
+    and sink writes ("sink"), and the chunks run by worker processes.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Path to the JSON file.
+
+    Yields
+    ------
+    Tracer
+        The tracer recording the spans.
+
+    Example
+    --------
+    >>> import euromod
+    >>> with euromod.trace("C:\\temp\\batch.json"):
+    ...     for sys in mod['SL'].systems:
+    ...         sys.run(data, 'sl_demo_v4')
+    """
+    tracer = Tracer()
+    previous = set_tracer(tracer)
+    try:
+        yield tracer
+    finally:
+        set_tracer(previous)
+        tracer.save(path)
@@ -16,6 +16,10 @@ See the Licence for the specific language governing permissions and limitations
 
 
 import ctypes
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
@@ -51,7 +55,143 @@ _MAP_NET_NP = {
     'Boolean': np.dtype(bool),
 }
 
-def asNumpyArray(netArray: System.Array):
+class BufferPool:
+    """
+    Pool recycling .NET and NumPy arrays of the same type and shape across runs, 
+    instead of allocating new arrays on the large-object heaps for every run.
+
+    Parameters
+    ----------
+    max_bytes: int, optional
+        Maximum size of the arrays held by the pool. Released arrays that 
+        do not fit are left to the garbage collector. Default is 1 GiB
+
+    Example
+    --------
+    >>> from euromod import BufferPool
+    >>> pool = BufferPool()
+    >>> for data in frames:
+    ...     out = sys.run(data, 'sl_demo_v4', buffer_pool=pool)
+    ...     results.append(out.outputs[0]['ils_dispy'].sum())
+    ...     out.release()
+    """
+    _instances = weakref.WeakSet() #: live pools, cleared by :func:`euromod.release_memory`
+    def __init__(self, max_bytes: int = 2**30):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._free = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        BufferPool._instances.add(self)
+
+    @property
+    def nbytes(self):
+        """int: Size of the arrays held by the pool."""
+        return self._nbytes
+
+    def _take(self, key):
+        with self._lock:
+            arrays = self._free.get(key)
+            if arrays:
+                arr, nbytes = arrays.pop()
+                self._nbytes -= nbytes
+                self.hits += 1
+                return arr
+            self.misses += 1
+            return None
+
+    def get_net_array(self, dtype, dims):
+        """
+        Get a .NET array, recycled if one of the same type and shape is available. 
+        Note that a recycled array is not cleared.
+        """
+        dtype = np.dtype(dtype)
+        dims = tuple(int(x) for x in dims)
+        netArray = self._take(('net', dtype.str, dims))
+        if netArray is None:
+            try:
+                netArray = Array.CreateInstance(_MAP_NP_NET[dtype], *dims)
+            except KeyError:
+                raise NotImplementedError(f'BufferPool does not yet support dtype {dtype}')
+        return netArray
+
+    def get_numpy_array(self, dtype, dims):
+        """
+        Get a NumPy array, recycled if one of the same type and shape is available. 
+        Note that a recycled array is not cleared.
+        """
+        dtype = np.dtype(dtype)
+        dims = tuple(int(x) for x in dims)
+        npArray = self._take(('numpy', dtype.str, dims))
+        if npArray is None:
+            npArray = np.empty(dims, order='C', dtype=dtype)
+        return npArray
+
+    def release(self, arr):
+        """
+        Return an array to the pool. The array must not be used afterwards. 
+        NumPy arrays that do not own their memory, e.g. views, are not recycled.
+        """
+        if isinstance(arr, np.ndarray):
+            if arr.base is not None or not arr.flags.c_contiguous:
+                return
+            key, nbytes = ('numpy', arr.dtype.str, arr.shape), arr.nbytes
+        else:
+            netType = arr.GetType().GetElementType().Name
+            if netType not in _MAP_NET_NP:
+                return
+            dtype = _MAP_NET_NP[netType]
+            key = ('net', dtype.str, tuple(arr.GetLength(I) for I in range(arr.Rank)))
+            nbytes = arr.Length * dtype.itemsize
+        with self._lock:
+            if self._nbytes + nbytes > self.max_bytes:
+                return
+            self._free.setdefault(key, []).append((arr, nbytes))
+            self._nbytes += nbytes
+
+    def clear(self):
+        """Drop all arrays held by the pool."""
+        with self._lock:
+            self._free.clear()
+            self._nbytes = 0
+
+    def __repr__(self):
+        return f"BufferPool with {self._nbytes} bytes held, {self.hits} hits and {self.misses} misses"
+
+
+class _PinnedBuffer:
+    """
+    Owner of a pinned .NET array exposed to NumPy through the array interface. 
+    The NumPy arrays viewing the buffer keep it as their ``base``, and the 
+    GCHandle is freed when the last of them is garbage-collected.
+    """
+    _lock = threading.RLock() # reentrant: __del__ can be called by the garbage collector on a thread holding the lock
+    count = 0 #: number of live pinned buffers
+    nbytes = 0 #: size of the live pinned buffers
+    def __init__(self, netArray, shape, dtype):
+        self._netArray = netArray
+        self._handle = GCHandle.Alloc(netArray, GCHandleType.Pinned)
+        self._nbytes = int(np.prod(shape))*dtype.itemsize
+        with _PinnedBuffer._lock:
+            _PinnedBuffer.count += 1
+            _PinnedBuffer.nbytes += self._nbytes
+        self.__array_interface__ = {
+            'data': (self._handle.AddrOfPinnedObject().ToInt64(), False),
+            'shape': tuple(int(x) for x in shape),
+            'typestr': dtype.str,
+            'version': 3,
+        }
+    def __del__(self):
+        handle = getattr(self, '_handle', None)
+        if handle is not None and handle.IsAllocated:
+            handle.Free()
+            with _PinnedBuffer._lock:
+                _PinnedBuffer.count -= 1
+                _PinnedBuffer.nbytes -= self._nbytes
+
+
+def asNumpyArray(netArray: System.Array, copy: bool = True):
     """
     Converts a .NET array to a NumPy array. See `_MAP_NET_NP` for 
     the mapping of CLR types to Numpy ``dtype``.
@@ -60,6 +200,10 @@ def asNumpyArray(netArray: System.Array):
     ----------
     netArray: System.Array
         The array to be converted
+    copy: bool, optional
+        If False, the .NET array is pinned and the NumPy array is a view of 
+        its memory, so that no copy is made. The array stays pinned until the 
+        NumPy array and all views of it are garbage-collected. Default is True
 
     Returns
     -------
@@ -70,10 +214,12 @@ def asNumpyArray(netArray: System.Array):
         dims[I] = netArray.GetLength(I)
     netType = netArray.GetType().GetElementType().Name
 
-    try:
-        npArray = np.empty(dims, order='C', dtype=_MAP_NET_NP[netType])
-    except KeyError:
+    if netType not in _MAP_NET_NP:
         raise NotImplementedError(f'asNumpyArray does support System type {netType}')
+    if not copy: # View of the pinned memory
+        return np.asarray(_PinnedBuffer(netArray, dims, _MAP_NET_NP[netType]))
+
+    npArray = np.empty(dims, order='C', dtype=_MAP_NET_NP[netType])
 
     try: # Memmove 
         sourceHandle = GCHandle.Alloc(netArray, GCHandleType.Pinned)
@@ -86,6 +232,57 @@ def asNumpyArray(netArray: System.Array):
     return npArray
 
 
+_BLOCK_BYTES = 1 << 25 # Size of the blocks copied in parallel
+
+def asNumpyArrays(netArrays, workers=None, pool=None):
+    """
+    Converts several .NET arrays to NumPy arrays, see :func:`asNumpyArray`.
+    The arrays are split in blocks of rows that are copied in parallel 
+    threads, as ``ctypes.memmove`` releases the GIL.
+
+    Parameters
+    ----------
+    netArrays: list of System.Array
+        The arrays to be converted
+    workers: int, optional
+        Number of threads. Default is the number of CPUs, at most 8
+    pool: BufferPool, optional
+        Pool from which the NumPy arrays are taken. Default is None
+
+    Returns
+    -------
+    list of numpy.ndarray 
+    """
+    npArrays, handles, blocks = [], [], []
+    try:
+        for netArray in netArrays:
+            dims = [netArray.GetLength(I) for I in range(netArray.Rank)]
+            netType = netArray.GetType().GetElementType().Name
+            if netType not in _MAP_NET_NP:
+                raise NotImplementedError(f'asNumpyArrays does support System type {netType}')
+            if pool is not None:
+                npArray = pool.get_numpy_array(_MAP_NET_NP[netType], dims)
+            else:
+                npArray = np.empty(dims, order='C', dtype=_MAP_NET_NP[netType])
+            handles.append(GCHandle.Alloc(netArray, GCHandleType.Pinned))
+            sourcePtr = handles[-1].AddrOfPinnedObject().ToInt64()
+            destPtr = npArray.__array_interface__['data'][0]
+            for start in range(0, npArray.nbytes, _BLOCK_BYTES):
+                blocks.append((destPtr + start, sourcePtr + start, min(_BLOCK_BYTES, npArray.nbytes - start)))
+            npArrays.append(npArray)
+        if len(blocks) > 1:
+            with ThreadPoolExecutor(workers or min(8, os.cpu_count() or 1)) as executor:
+                list(executor.map(lambda block: ctypes.memmove(*block), blocks))
+        else:
+            for block in blocks:
+                ctypes.memmove(*block)
+    finally:
+        for handle in handles:
+            if handle.IsAllocated: 
+                handle.Free()
+    return npArrays
+
+
 def asNetArray(npArray):
     """
     Converts a NumPy array to a .NET array. See `_MAP_NP_NET` for 
@@ -137,4 +334,48 @@ def asNetArray(npArray):
     finally:
         if destHandle.IsAllocated: 
             destHandle.Free()
+    return netArray
+
+
+def asNetArrayFromColumns(columns, dtype=np.float64, pool=None):
+    """
+    Converts a list of 1-dimensional NumPy arrays to a 2-dimensional .NET array 
+    with one row per column, i.e. the transpose of the table formed by the columns.
+    Every column is copied straight into the .NET array, without building 
+    the table as a NumPy array first.
+
+    Parameters
+    ----------
+    columns: list of numpy.ndarray
+        The columns to be converted, all of the same length
+    dtype: numpy.dtype, optional
+        The type of the .NET array. Default is ``float64``
+    pool: BufferPool, optional
+        Pool from which the .NET array is taken. Default is None
+
+    Returns
+    -------
+    System.Array
+    """
+    dtype = np.dtype(dtype)
+    nrows = len(columns[0]) if len(columns) > 0 else 0
+    if pool is not None:
+        netArray = pool.get_net_array(dtype, (len(columns), nrows))
+    else:
+        try:
+            netArray = Array.CreateInstance(_MAP_NP_NET[dtype], len(columns), nrows)
+        except KeyError:
+            raise NotImplementedError(f'asNetArrayFromColumns does not yet support dtype {dtype}')
+
+    try: # Memmove column by column
+        destHandle = GCHandle.Alloc(netArray, GCHandleType.Pinned)
+        destPtr = destHandle.AddrOfPinnedObject().ToInt64()
+        for I, column in enumerate(columns):
+            column = np.ascontiguousarray(column, dtype=dtype)
+            if len(column) != nrows:
+                raise ValueError('asNetArrayFromColumns requires columns of the same length')
+            ctypes.memmove(destPtr + I*nrows*dtype.itemsize, column.__array_interface__['data'][0], column.nbytes)
+    finally:
+        if destHandle.IsAllocated: 
+            destHandle.Free()
     return netArray
\ No newline at end of file
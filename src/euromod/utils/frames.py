@@ -0,0 +1,130 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+import numpy as np
+import pandas as pd
+
+OUTPUT_FORMATS = ("pandas", "numpy", "arrow")
+
+
+def _module(data):
+    return type(data).__module__.split(".")[0]
+
+
+def _is_shared(data):
+    from shared import SharedDataset # shared imports this module
+    return isinstance(data, SharedDataset)
+
+
+def get_columns(data):
+    """
+    Get the numeric columns of the input data.
+
+    Non-numeric columns, including boolean columns, are left out for every type of data, 
+    as ``select_dtypes(['number'])`` does for a :class:`pandas.DataFrame`.
+    The columns are not copied when they are already stored as contiguous ``float64`` buffers.
+
+    Parameters
+    ----------
+    data : :class:`pandas.DataFrame`, :class:`pyarrow.Table`, :class:`polars.DataFrame`, :class:`SharedDataset` or :obj:`dict` [ :obj:`str`, :class:`numpy.ndarray` ]
+        Input data.
+
+    Raises
+    ------
+    TypeError
+        Is raised if the type of the data is not supported.
+
+    Returns
+    -------
+    :obj:`tuple`
+        The names of the numeric variables, a :obj:`list` with a 1-dimensional ``float64`` array per variable,
+        and a :obj:`dict` with the attributes of the data (for a :class:`pandas.DataFrame` only).
+    """
+    if isinstance(data, pd.DataFrame):
+        data = data.select_dtypes(['number'])
+        return [str(x) for x in data.columns], [data[x].to_numpy(np.float64) for x in data.columns], dict(data.attrs)
+    if _module(data) == "pyarrow":
+        import pyarrow.types as pat
+        names = [field.name for field in data.schema if pat.is_integer(field.type) or pat.is_floating(field.type)]
+        columns = [np.asarray(data.column(x).to_numpy(), dtype=np.float64) for x in names]
+        return names, columns, {}
+    if _module(data) == "polars":
+        names = [x for x, dtype in data.schema.items() if dtype.is_numeric()]
+        columns = [np.asarray(data.get_column(x).to_numpy(), dtype=np.float64) for x in names]
+        return names, columns, {}
+    if _is_shared(data):
+        return list(data.names), data.columns(), dict(data.attrs)
+    if isinstance(data, dict):
+        names, columns = [], []
+        for name, col in data.items():
+            col = np.asarray(col)
+            if col.ndim != 1:
+                raise ValueError(f"Variable {name} must be a 1-dimensional array.")
+            if col.dtype.kind in "iuf":
+                names.append(str(name))
+                columns.append(col.astype(np.float64, copy=False))
+        if len({len(x) for x in columns}) > 1:
+            raise ValueError("All variables must have the same number of observations.")
+        return names, columns, {}
+    raise TypeError("Parameter 'data' must be a pandas.DataFrame, a pyarrow.Table, a polars.DataFrame, a SharedDataset or a dict of numpy arrays.")
+
+
+def get_column_names(data):
+    """Get the names of all variables of the input data, see :func:`get_columns`."""
+    if isinstance(data, pd.DataFrame):
+        return [str(x) for x in data.columns]
+    if _module(data) == "pyarrow":
+        return list(data.column_names)
+    if _module(data) == "polars":
+        return list(data.columns)
+    if _is_shared(data):
+        return list(data.names)
+    if isinstance(data, dict):
+        return [str(x) for x in data.keys()]
+    raise TypeError("Parameter 'data' must be a pandas.DataFrame, a pyarrow.Table, a polars.DataFrame, a SharedDataset or a dict of numpy arrays.")
+
+
+def make_output(arr, columns, output_format):
+    """
+    Build a simulation output in the requested format.
+
+    Parameters
+    ----------
+    arr : :class:`numpy.ndarray`
+        Simulation output with one column per variable. It is not copied for the "pandas" and "numpy" formats.
+    columns : :obj:`list` [ :obj:`str` ]
+        Names of the output variables.
+    output_format : :obj:`str`
+        "pandas" for a :class:`pandas.DataFrame`, "numpy" for the :class:`numpy.ndarray` itself
+        or "arrow" for a :class:`pyarrow.Table`.
+    """
+    if output_format == "pandas":
+        return pd.DataFrame(arr, columns=columns, copy=False)
+    if output_format == "numpy":
+        return arr
+    if output_format == "arrow":
+        import pyarrow as pa
+        return pa.table([pa.array(arr[:, j]) for j in range(arr.shape[1])], names=list(columns))
+    raise ValueError(f"Parameter 'output_format' must be one of {OUTPUT_FORMATS}.")
+
+
+def output_array(output):
+    """Get the simulation output built by :func:`make_output` as a 2-dimensional ``float64`` array."""
+    if isinstance(output, np.ndarray):
+        return output
+    if isinstance(output, pd.DataFrame):
+        return output.to_numpy(np.float64)
+    return np.column_stack([x.to_numpy() for x in output.columns]).astype(np.float64, copy=False)
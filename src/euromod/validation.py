@@ -0,0 +1,107 @@
+__license__='''
+Copyright 2024 European Commission
+*
+Licensed under the EUPL, Version 1.2;
+You may not use this work except in compliance with the Licence.
+You may obtain a copy of the Licence at:
+
+*
+   https://joinup.ec.europa.eu/software/page/eupl
+*
+
+Unless required by applicable law or agreed to in writing, software distributed under the Licence is distributed on an "AS IS" basis,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the Licence for the specific language governing permissions and limitations under the Licence.
+'''
+
+import numpy as np
+
+ID_VARIABLES = ("idhh", "idperson")
+LINK_VARIABLES = ("idpartner", "idmother", "idfather")
+_MAX_LISTED = 10
+
+
+class InputValidationError(ValueError):
+    """Error raised when the input data of a simulation run is not valid.
+
+    Attributes
+    ----------
+    problems : :obj:`list` [ :obj:`str` ]
+        Description of every problem found in the data.
+    """
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__("The input data is not valid:\n" + "\n".join("- " + x for x in self.problems))
+
+
+def _listed(names):
+    names = list(names)
+    more = f" and {len(names) - _MAX_LISTED} more" if len(names) > _MAX_LISTED else ""
+    return ", ".join(f"{x:.15g}" if isinstance(x, (float, np.floating)) else str(x) for x in names[:_MAX_LISTED]) + more
+
+
+def validate_columns(names, columns, dropped=(), required=ID_VARIABLES):
+    """
+    Check the numeric input variables of a simulation run.
+
+    Parameters
+    ----------
+    names : :obj:`list` [ :obj:`str` ]
+        Names of the numeric variables.
+    columns : :obj:`list` [ :class:`numpy.ndarray` ]
+        Values of the numeric variables.
+    dropped : :obj:`list` [ :obj:`str` ], optional
+        Names of the non-numeric variables, which are not passed to the model. Default is no variable.
+    required : :obj:`list` [ :obj:`str` ], optional
+        Names of the variables that must be in the data. Default is the household and person identifiers.
+
+    Returns
+    -------
+    :obj:`list` [ :obj:`str` ]
+        Description of every problem found, empty if the data is valid.
+    """
+    problems = []
+    index = {name: i for i, name in enumerate(names)}
+    missing = [x for x in required if x not in index]
+    if len(missing) > 0:
+        problems.append(f"Required variables missing or not numeric: {_listed(missing)}.")
+    if len(dropped) > 0:
+        problems.append(f"Non-numeric variables that would not be passed to the model: {_listed(dropped)}.")
+
+    ### missing and infinite values
+    not_finite = [(name, int(np.count_nonzero(~np.isfinite(col)))) for name, col in zip(names, columns)]
+    not_finite = [f"{name} ({n} rows)" for name, n in not_finite if n > 0]
+    if len(not_finite) > 0:
+        problems.append(f"Variables with NaN or infinite values: {_listed(not_finite)}.")
+    if "idperson" not in index:
+        return problems
+
+    ### identifiers, which can only be checked when they are all finite
+    idperson = columns[index["idperson"]]
+    if not np.isfinite(idperson).all():
+        return problems
+    order = np.argsort(idperson, kind="stable")
+    sorted_ids = idperson[order]
+    duplicated = np.unique(sorted_ids[1:][sorted_ids[1:] == sorted_ids[:-1]])
+    if len(duplicated) > 0:
+        problems.append(f"Duplicated person identifiers: {_listed(duplicated)}.")
+    if "idhh" not in index or not np.isfinite(columns[index["idhh"]]).all():
+        return problems
+
+    ### links to persons of the same household
+    idhh = columns[index["idhh"]]
+    sorted_hh = idhh[order]
+    for name in LINK_VARIABLES:
+        if name not in index or len(sorted_ids) == 0:
+            continue
+        link = columns[index[name]]
+        linked = (link != 0) & np.isfinite(link) # missing links are reported above
+        pos = np.minimum(np.searchsorted(sorted_ids, link), len(sorted_ids) - 1)
+        found = sorted_ids[pos] == link
+        unknown = linked & ~found
+        if unknown.any():
+            problems.append(f"Variable {name} refers to unknown persons for persons {_listed(idperson[unknown])}.")
+        other_household = linked & found & (sorted_hh[pos] != idhh)
+        if other_household.any():
+            problems.append(f"Variable {name} refers to persons of another household for persons {_listed(idperson[other_household])}.")
+    return problems